@@ -0,0 +1,188 @@
+# p-center-problem/src/batch.py
+
+import argparse
+import csv
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from src.io_utils.read_instance import COORDINATE_EXTENSIONS, INSTANCE_EXTENSIONS, read_instance
+from src.solver.solve import solve
+
+# Columns of the results file (CSV header, same keys in JSONL)
+FIELDS = ['file', 'model', 'alpha', 'objective_value', 'gurobi_status', 'gap', 'centers',
+          'read_time', 'preprocessing_time', 'build_time', 'solve_time', 'extraction_time', 'total_time', 'error']
+
+
+def list_instances(paths):
+    """
+    Instance files of a list of directories, files or glob patterns (sorted, without duplicates).
+    The directories give their files of every format read by read_instance (INSTANCE_EXTENSIONS).
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in os.listdir(path) if name.endswith(INSTANCE_EXTENSIONS))
+        else:
+            files.extend(glob.glob(path))
+    return sorted(set(files))
+
+
+def job_key(file, model, alpha):
+    """Identifier of a job in the results file."""
+    return (os.path.normpath(file), model, float(alpha))
+
+
+def completed_jobs(output):
+    """
+    Keys of the jobs already in the results file, they are skipped when a batch is resumed.
+    The jobs that failed (error column set) are run again.
+    """
+    if not os.path.exists(output):
+        return set()
+    with open(output, newline='') as file:
+        if output.endswith('.csv'):
+            rows = list(csv.DictReader(file))
+        else:
+            rows = [json.loads(line) for line in file if line.strip()]
+    return {job_key(row['file'], row['model'], row['alpha']) for row in rows if not row['error']}
+
+
+def write_result(output, result):
+    """
+    Append one result to the results file (one line per job) and flush it,
+    so that an interrupted batch loses at most the running jobs.
+    """
+    is_csv = output.endswith('.csv')
+    new_file = not os.path.exists(output) or os.path.getsize(output) == 0
+    with open(output, 'a', newline='') as file:
+        if is_csv:
+            writer = csv.DictWriter(file, fieldnames=FIELDS)
+            if new_file:
+                writer.writeheader()
+            writer.writerow(dict(result, centers=' '.join(map(str, result['centers']))))
+        else:
+            file.write(json.dumps(result) + '\n')
+        file.flush()
+        os.fsync(file.fileno())
+
+
+def _quiet_worker():
+    """Pool initializer : the solver and Gurobi logs of the workers are discarded."""
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    os.close(devnull)
+
+
+def run_job(file, model, alpha, time_limit, threads, options):
+    """
+    Read an instance and solve it with one model class.
+    Returns:
+        dict: One row of the results file (see FIELDS). The error column is set if the job failed.
+    """
+    result = dict.fromkeys(FIELDS)
+    result.update({'file': os.path.normpath(file), 'model': model, 'alpha': float(alpha), 'centers': []})
+    job_start = time.perf_counter()
+    try:
+        instance_data = read_instance(file, capacitated=model == 'capacitated', failure=model == 'failure',
+                                      alpha=alpha, use_cache=options.get('use_cache', True))
+        result['read_time'] = time.perf_counter() - job_start
+        solution = solve(instance_data, model_class=model, time_limit=time_limit, threads=threads,
+                         warm_start=options.get('warm_start', True), reduce=options.get('reduce', True),
+                         lazy=options.get('lazy', False))
+        result.update({
+            'objective_value': solution['objective_value'],
+            'gurobi_status': solution['gurobi_status'],
+            'gap': solution.get('gap'),
+            'centers': [int(j) for j in solution['centers']],
+        })
+        for phase, phase_time in solution.get('times', {}).items():
+            if f'{phase}_time' in result:
+                result[f'{phase}_time'] = phase_time
+    except Exception as e:
+        result['error'] = str(e)
+    result['total_time'] = time.perf_counter() - job_start
+    return result
+
+
+def run_batch(files, models, alphas, output, workers=None, threads=1, time_limit=3600, options=None):
+    """
+    Solve every (instance, model class, alpha) job on a process pool, the results are appended to output
+    (.csv or .jsonl) as soon as each job ends. The jobs already in output are skipped, and so are the
+    coordinate instances (_clients files) with another model class than 'radius', which cannot solve them.
+    Args:
+        files (list): Instance files.
+        models (list): Model classes (see solve), alpha is only used by the 'failure' model.
+        alphas (list): Failure foresight alpha values.
+        output (str): Results file.
+        workers (int): Number of parallel jobs, by default the number of cores divided by threads.
+        threads (int): Number of Gurobi threads of each job.
+        time_limit (float): Gurobi time limit (seconds) of each job : the reading, the shortest paths and the
+            preprocessing are not counted.
+        options (dict): warm_start, reduce, lazy and use_cache options given to read_instance and solve.
+    Returns:
+        list: The results of the jobs run by this call.
+    """
+    options = options or {}
+    if workers is None:
+        workers = max(1, (os.cpu_count() or 1) // threads)
+
+    done = completed_jobs(output)
+    jobs = []
+    for file in files:
+        for model in models:
+            if file.endswith(COORDINATE_EXTENSIONS) and model != 'radius':
+                continue
+            for alpha in (alphas if model == 'failure' else [0.0]):
+                if job_key(file, model, alpha) not in done:
+                    jobs.append((file, model, alpha))
+    print(f"{len(jobs)} jobs to run ({len(done)} already in {output}), {workers} workers x {threads} threads")
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_quiet_worker) as pool:
+        futures = {pool.submit(run_job, file, model, alpha, time_limit, threads, options): (file, model, alpha)
+                   for file, model, alpha in jobs}
+        for k, future in enumerate(as_completed(futures)):
+            result = future.result()
+            write_result(output, result)
+            results.append(result)
+            status = f"error: {result['error']}" if result['error'] else f"objective {result['objective_value']}"
+            print(f"[{k+1}/{len(jobs)}] {result['file']} {result['model']} alpha={result['alpha']}: "
+                  f"{status} ({result['total_time']:.1f}s)")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Solve a batch of p-center instances in parallel')
+    parser.add_argument('instances', nargs='+', help='Instance directories, files or glob patterns.')
+    parser.add_argument('--models', nargs='+', default=['classical'],
+                        choices=['classical', 'compact', 'radius', 'capacitated', 'failure'], help='Model classes to run.')
+    parser.add_argument('--alphas', nargs='+', type=float, default=[0.5], help='Failure foresight alpha values (failure model only).')
+    parser.add_argument('--output', default='results.jsonl', help='Results file (.jsonl or .csv), appended and resumed.')
+    parser.add_argument('--workers', type=int, default=None, help='Number of parallel jobs (default: number of cores / threads).')
+    parser.add_argument('--threads', type=int, default=1, help='Number of Gurobi threads of each job.')
+    parser.add_argument('--time-limit', type=float, default=3600, help='Gurobi time limit (seconds) of each job, the reading, shortest paths and preprocessing times are not counted.')
+    parser.add_argument('--no-warm-start', action='store_true', help='If set, the heuristic solution is not given to Gurobi as MIP start.')
+    parser.add_argument('--no-reduction', action='store_true', help='If set, the models are built over all the client-center pairs.')
+    parser.add_argument('--lazy', action='store_true', help='If set, the distance constraints of the classical, capacitated and failure models are added only when violated.')
+    parser.add_argument('--no-cache', action='store_true', help='If set, the distance matrix cache is not used.')
+    args = parser.parse_args()
+
+    if any(alpha < 0 or alpha > 1 for alpha in args.alphas):
+        parser.error("alpha must be between 0 and 1.")
+
+    # The results file may be in an instance directory
+    files = [file for file in list_instances(args.instances) if os.path.abspath(file) != os.path.abspath(args.output)]
+    if not files:
+        parser.error("no instance file found.")
+
+    options = {'warm_start': not args.no_warm_start, 'reduce': not args.no_reduction,
+               'lazy': args.lazy, 'use_cache': not args.no_cache}
+    run_batch(files, args.models, args.alphas, args.output, workers=args.workers, threads=args.threads,
+              time_limit=args.time_limit, options=options)
+
+
+if __name__ == "__main__":
+    main()
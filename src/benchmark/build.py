@@ -0,0 +1,148 @@
+# p-center-problem/src/benchmark/build.py
+#
+# Model build time and peak memory of each model class, with the matrix API builders of src/models
+# ("matrix") and with the previous term by term builders ("reference"). Usage:
+#   python -m src.benchmark.build [--instances instances/pmed] [--models classical capacitated failure] [--max-nodes 400]
+#
+# pmed files have no demands nor capacities : they are generated (generate_capacities, seed 42) for
+# the capacitated and failure models. Each build runs in a separate process so that the peak memory
+# (maximum resident set size) of one build does not hide the next one.
+
+import argparse
+import glob
+import multiprocessing
+import os
+import resource
+import time
+
+from gurobipy import Model, GRB, quicksum
+
+from src.io_utils.read_instance import read_instance
+from src.io_utils.generate_instance import generate_capacities
+from src.models.classical import classical_model
+from src.models.capacitated import capacitated_model
+from src.models.failure import failure_model
+from src.benchmark.shortest_paths import instance_key
+
+
+def reference_classical_model(instance_data):
+    # Term by term builder previously used by classical_model
+    model = Model("p-center")
+    distances = instance_data['distances']
+    num_nodes = instance_data['num_nodes']
+    x = model.addVars(num_nodes, num_nodes, vtype=GRB.BINARY, name="x")
+    y = model.addVars(num_nodes, vtype=GRB.BINARY, name="y")
+    max_distance = model.addVar(vtype=GRB.CONTINUOUS, name="max_distance")
+    model.setObjective(max_distance, GRB.MINIMIZE)
+    model.addConstr(y.sum() == instance_data['num_centers'], "num_centers")
+    model.addConstrs((x.sum(i, '*') == 1 for i in range(num_nodes)), "client_assignment")
+    model.addConstrs((x[i, j] <= y[j] for i in range(num_nodes) for j in range(num_nodes)), "assignment")
+    model.addConstrs((x[i, j] * distances[i][j] <= max_distance for i in range(num_nodes) for j in range(num_nodes)), "max_distance_constraint")
+    return model, x, y
+
+
+def reference_capacitated_model(instance_data):
+    # Term by term builder previously used by capacitated_model
+    model, x, y = reference_classical_model(instance_data)
+    num_nodes = instance_data['num_nodes']
+    demands = instance_data['demands']
+    capacities = instance_data['capacities']
+    model.addConstrs((sum(x[i, j] * demands[i] for i in range(num_nodes)) <= capacities[j] for j in range(num_nodes)), name="capacity_limit")
+    return model, x, y
+
+
+def reference_failure_model(instance_data):
+    # Term by term builder previously used by failure_model
+    model, x, y = reference_capacitated_model(instance_data)
+    distances = instance_data['distances']
+    num_nodes = instance_data['num_nodes']
+    demands = instance_data['demands']
+    capacities = instance_data['capacities']
+    alpha = instance_data['alpha']
+    model.update()
+    max_distance = model.getVarByName("max_distance")
+    w = model.addVars(num_nodes, num_nodes, vtype=GRB.BINARY, name="w")
+    model.addConstrs((w.sum(i, '*') == 1 for i in range(num_nodes)), "backup_assignment")
+    model.addConstrs((w[i, j] <= y[j] for i in range(num_nodes) for j in range(num_nodes)), "backup_assignment_open")
+    model.addConstrs((quicksum(w[i, j] * distances[i][j] for j in range(num_nodes)) >= quicksum(x[i, j] * distances[i][j] for j in range(num_nodes)) for i in range(num_nodes)), name="backup_distance_constraint")
+    model.addConstrs((x[i, j] + w[i, j] <= 1 for i in range(num_nodes) for j in range(num_nodes)), "different_centers")
+    model.addConstrs((sum(x[i, j] * demands[i] for i in range(num_nodes)) + sum(w[i, j] * demands[i] for i in range(num_nodes)) <= (1+alpha)*capacities[j] for j in range(num_nodes)), name="capacity_limit")
+    model.addConstrs((x[i, j] * distances[i][j] <= max_distance for i in range(num_nodes) for j in range(num_nodes)), name="distance_limit")
+    return model, x, w, y
+
+
+BUILDERS = {
+    'matrix': {
+        'classical': classical_model,
+        'capacitated': capacitated_model,
+        'failure': failure_model,
+    },
+    'reference': {
+        'classical': reference_classical_model,
+        'capacitated': reference_capacitated_model,
+        'failure': reference_failure_model,
+    },
+}
+
+
+def current_rss():
+    # resident set size (bytes) of the current process
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * resource.getpagesize()
+
+
+def build_job(instance_data, implementation, model_class, queue):
+    try:
+        rss_before = current_rss()
+        start = time.perf_counter()
+        model = BUILDERS[implementation][model_class](instance_data)[0]
+        model.update()
+        build_time = time.perf_counter() - start
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # kilobytes on Linux
+        queue.put((build_time, max(0, peak - rss_before), model.NumVars, model.NumConstrs))
+    except Exception as e:
+        queue.put(e)
+
+
+def measure(instance_data, implementation, model_class):
+    context = multiprocessing.get_context('fork')
+    queue = context.Queue()
+    process = context.Process(target=build_job, args=(instance_data, implementation, model_class, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    if isinstance(result, Exception):
+        raise result
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark of the model build time and peak memory.')
+    parser.add_argument('--instances', default='instances/pmed', help='Directory containing the instance files.')
+    parser.add_argument('--models', nargs='+', choices=['classical', 'capacitated', 'failure'], default=['classical', 'capacitated', 'failure'])
+    parser.add_argument('--implementations', nargs='+', choices=list(BUILDERS), default=['reference', 'matrix'])
+    parser.add_argument('--max-nodes', type=int, default=None, help='Skip the instances with more nodes.')
+    args = parser.parse_args()
+
+    files = sorted(glob.glob(os.path.join(args.instances, '*.txt')), key=instance_key)
+
+    print("| instance | n | model | builder | build (s) | peak memory (MB) | vars | constrs |")
+    print("| --- | ---: | --- | --- | ---: | ---: | ---: | ---: |")
+    for file_path in files:
+        name = os.path.splitext(os.path.basename(file_path))[0]
+        instance_data = read_instance(file_path)
+        num_nodes = instance_data['num_nodes']
+        if args.max_nodes is not None and num_nodes > args.max_nodes:
+            continue
+        demands, capacities = generate_capacities(num_nodes, instance_data['num_centers'], seed=42)
+        instance_data.update(demands=demands.tolist(), capacities=capacities.tolist(), alpha=0.2)
+
+        for model_class in args.models:
+            for implementation in args.implementations:
+                build_time, peak, num_vars, num_constrs = measure(instance_data, implementation, model_class)
+                print(f"| {name} | {num_nodes} | {model_class} | {implementation} | {build_time:.2f} | {peak / 1024**2:.0f} "
+                      f"| {num_vars} | {num_constrs} |", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# p-center-problem/src/benchmark/models.py
+#
+# Compare the formulations of the classical p-center problem on a set of instances :
+# build time, model size, root (LP relaxation) bound and solve time. Usage:
+#   python -m src.benchmark.models [--instances instances/pmed] [--models classical compact] [--time-limit 600] [--no-solve]
+
+import argparse
+import glob
+import os
+import time
+
+from gurobipy import GurobiError
+
+from src.io_utils.read_instance import read_instance
+from src.models.classical import classical_model
+from src.models.compact import compact_model
+from src.benchmark.shortest_paths import instance_key
+
+BUILDERS = {
+    'classical': classical_model,
+    'compact': compact_model,
+}
+
+
+def benchmark_model(instance_data, model_class, time_limit, run_solve=True):
+    start = time.perf_counter()
+    model = BUILDERS[model_class](instance_data)[0]
+    model.update()
+    build_time = time.perf_counter() - start
+
+    result = {
+        'build_time': build_time,
+        'num_vars': model.NumVars,
+        'num_constrs': model.NumConstrs,
+        'num_nzs': model.NumNZs,
+        'root_bound': float('nan'),
+        'objective_value': float('nan'),
+        'solve_time': float('nan'),
+    }
+
+    model.setParam('OutputFlag', 0)
+    relaxed = model.relax()
+    relaxed.optimize()
+    if relaxed.SolCount > 0:
+        result['root_bound'] = relaxed.ObjVal
+
+    if run_solve:
+        model.setParam('Timelimit', time_limit)
+        start = time.perf_counter()
+        model.optimize()
+        result['solve_time'] = time.perf_counter() - start
+        if model.SolCount > 0:
+            result['objective_value'] = model.ObjVal
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark of the classical p-center formulations.')
+    parser.add_argument('--instances', default='instances/pmed', help='Directory containing the instance files.')
+    parser.add_argument('--models', nargs='+', choices=list(BUILDERS), default=list(BUILDERS), help='Formulations to compare.')
+    parser.add_argument('--time-limit', type=float, default=600, help='Time limit (seconds) of each solve.')
+    parser.add_argument('--no-solve', action='store_true', help='If set, only the build and the root relaxation are measured.')
+    args = parser.parse_args()
+
+    files = sorted(glob.glob(os.path.join(args.instances, '*.txt')), key=instance_key)
+
+    print("| instance | model | build (s) | vars | constrs | nonzeros | root bound | objective | solve (s) |")
+    print("| --- | --- | ---: | ---: | ---: | ---: | ---: | ---: | ---: |")
+    for file_path in files:
+        name = os.path.splitext(os.path.basename(file_path))[0]
+        instance_data = read_instance(file_path)
+        for model_class in args.models:
+            try:
+                r = benchmark_model(instance_data, model_class, args.time_limit, run_solve=not args.no_solve)
+            except GurobiError as e:
+                print(f"| {name} | {model_class} | error: {e} |")
+                continue
+            print(f"| {name} | {model_class} | {r['build_time']:.2f} | {r['num_vars']} | {r['num_constrs']} | {r['num_nzs']} "
+                  f"| {r['root_bound']:.2f} | {r['objective_value']:.0f} | {r['solve_time']:.2f} |", flush=True)
+
+
+if __name__ == "__main__":
+    main()
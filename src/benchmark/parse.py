@@ -0,0 +1,138 @@
+# p-center-problem/src/benchmark/parse.py
+#
+# Parse throughput (lines per second) of the bulk pmed parser (parse_pmed) against the line by line parser
+# previously used by read_instance, on plain text and (with --compressed) gzip and xz copies. Usage:
+#   python -m src.benchmark.parse [--instances "instances/pmed/*.txt"] [--compressed] [--skip-reference]
+#
+# --check-formats generates instances in the txt, txt.gz and bin formats and checks that read_instance gives the
+# same instance for each format (exit code 1 otherwise).
+
+import argparse
+import glob
+import gzip
+import lzma
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from src.io_utils.read_instance import parse_pmed, open_instance, read_instance
+from src.io_utils.shortest_paths import floyd_warshall
+from src.io_utils.generate_instance import (generate_clients, generate_capacities, save_distance_matrix_txt,
+                                            save_distance_matrix_bin, save_capacity)
+from src.benchmark.shortest_paths import instance_key
+
+
+def reference_parse(file_path):
+    # Line by line parser previously used by read_instance (edges, then capacities and demands if present)
+    with open_instance(file_path) as file:
+        num_nodes, num_edges, _ = map(int, file.readline().split())
+        edges = []
+        for _ in range(num_edges):
+            node1, node2, distance = map(int, file.readline().strip().split())
+            edges.append((node1-1, node2-1, distance))
+        extra = [int(line) for line in file if line.strip()]
+    return np.array(edges).reshape(-1, 3), extra
+
+
+def count_lines(file_path):
+    with open_instance(file_path) as file:
+        return sum(block.count(b'\n') for block in iter(lambda: file.read(1 << 20), b''))
+
+
+def compressed_copies(file_path, directory):
+    # gzip and xz copies of an instance file
+    name = os.path.basename(file_path)
+    copies = []
+    for suffix, opener in (('.gz', gzip.open), ('.xz', lzma.open)):
+        path = os.path.join(directory, name + suffix)
+        with open(file_path, 'rb') as source, opener(path, 'wb') as target:
+            shutil.copyfileobj(source, target)
+        copies.append(path)
+    return copies
+
+
+def check_formats(directory, num_nodes=60, num_centers=5, seed=42):
+    """
+    Generate instances (integer and float distances, capacitated) in the txt, txt.gz and bin formats and compare
+    the instances read from each format : sizes, distance rows, capacities and demands.
+    The text instances are read as graphs (shortest paths over the pairs) while the bin files hold the direct
+    distances, which differ where the rounding breaks the triangle inequality : the text distances are compared
+    with the shortest paths over the bin matrix.
+    Returns:
+        list: Description of each difference, empty if the formats agree.
+    """
+    coords = generate_clients(num_nodes, 'euclidean', seed)
+    demands, capacities = generate_capacities(num_nodes, num_centers, seed)
+    differences = []
+    for integer in (True, False):
+        paths = {}
+        for distance_format in ('txt', 'txt.gz', 'bin'):
+            path = os.path.join(directory, f"check_{int(integer)}.{distance_format}")
+            if distance_format == 'bin':
+                save_distance_matrix_bin(coords, num_centers, path, integer=integer, demands=demands, capacities=capacities)
+            else:
+                save_distance_matrix_txt(coords, num_centers, path, integer=integer)
+                save_capacity(demands, capacities, path)
+            paths[distance_format] = path
+
+        reference = read_instance(paths['bin'], capacitated=True, use_cache=False)
+        shortest = floyd_warshall(reference['distances'])
+        for distance_format in ('txt', 'txt.gz'):
+            instance = read_instance(paths[distance_format], capacitated=True, use_cache=False)
+            name = f"{distance_format} ({'integer' if integer else 'float'} distances)"
+            for key in ('num_nodes', 'num_edges', 'num_centers', 'capacities', 'demands'):
+                if not np.array_equal(instance[key], reference[key]):
+                    differences.append(f"{name}: {key} differs from the bin instance")
+            # the text files hold the float distances with 2 decimals, the bin files in float32
+            if not np.allclose(instance['distances'], shortest, rtol=1e-6, atol=0 if integer else 0.02):
+                differences.append(f"{name}: distances differ from the bin instance")
+    return differences
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Parse throughput of the pmed instance parser.')
+    parser.add_argument('--instances', nargs='+', default=['instances/pmed/*.txt'], help='Instance files or glob patterns.')
+    parser.add_argument('--compressed', action='store_true', help='If set, gzip and xz copies of each instance are also parsed.')
+    parser.add_argument('--skip-reference', action='store_true', help='If set, the line by line parser is not run.')
+    parser.add_argument('--check-formats', action='store_true', help='If set, only checks that the txt, txt.gz and bin formats of generated instances are read as the same instance.')
+    args = parser.parse_args()
+
+    if args.check_formats:
+        with tempfile.TemporaryDirectory() as directory:
+            differences = check_formats(directory)
+        print('\n'.join(differences) if differences else "txt, txt.gz and bin instances are the same")
+        sys.exit(1 if differences else 0)
+
+    files = sorted({f for pattern in args.instances for f in glob.glob(pattern)}, key=lambda f: (os.path.dirname(f), instance_key(f)))
+    print(f"{'instance':<28}{'lines':>10}{'bulk (s)':>10}{'lines/s':>12}{'reference (s)':>15}{'lines/s':>12}{'speedup':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        for file_path in files:
+            paths = [file_path] + (compressed_copies(file_path, directory) if args.compressed else [])
+            for path in paths:
+                lines = count_lines(path)
+                start = time.perf_counter()
+                # edges only, the capacity and demand lines of capacitated files are accepted but not kept
+                parsed = parse_pmed(path)
+                bulk_time = time.perf_counter() - start
+
+                reference_time = float('nan')
+                if not args.skip_reference:
+                    start = time.perf_counter()
+                    try:
+                        edges, _ = reference_parse(path)
+                        reference_time = time.perf_counter() - start
+                        if not np.array_equal(edges, parsed['edges']):
+                            print(f"{os.path.basename(path)}: parsed edges differ from the reference")
+                    except ValueError:
+                        pass  # the line by line parser only reads integer distances
+
+                print(f"{os.path.basename(path):<28}{lines:>10}{bulk_time:>10.4f}{lines / bulk_time:>12.0f}"
+                      f"{reference_time:>15.4f}{lines / reference_time:>12.0f}{reference_time / bulk_time:>8.1f}x", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# p-center-problem/src/benchmark/portfolio.py
+#
+# Portfolio races (src/solver/portfolio.py) over instance sets : the winning strategy of each instance and the
+# number of wins of each strategy per instance family (directory of the file), to choose the default
+# formulation and Gurobi settings of each family. Usage:
+#   python -m src.benchmark.portfolio --instances "instances/pmed/*.txt" [--problem classical] [--workers 8]
+#
+# pmed files have no demands nor capacities : they are generated (generate_capacities, seed 42).
+
+import argparse
+import glob
+import os
+from collections import Counter, defaultdict
+
+from src.io_utils.read_instance import read_instance
+from src.solver.portfolio import portfolio
+from src.benchmark.regression import add_capacities
+from src.benchmark.shortest_paths import instance_key
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Winning strategies of portfolio races.')
+    parser.add_argument('--instances', nargs='+', required=True, help='Instance files or glob patterns.')
+    parser.add_argument('--problem', choices=['classical', 'capacitated', 'failure'], default='classical', help='Problem solved.')
+    parser.add_argument('--workers', type=int, default=None, help='Number of strategies raced (default: number of cores).')
+    parser.add_argument('--time-limit', type=float, default=600, help='Time limit (seconds) of each race.')
+    args = parser.parse_args()
+
+    files = sorted({f for pattern in args.instances for f in glob.glob(pattern)}, key=lambda f: (os.path.dirname(f), instance_key(f)))
+    wins = defaultdict(Counter)
+    print("| instance | objective | winner | best solution by | time (s) |")
+    print("|---|---|---|---|---|")
+    for file_path in files:
+        instance_data = read_instance(file_path)
+        if args.problem in ('capacitated', 'failure'):
+            instance_data = add_capacities(instance_data)
+        solution = portfolio(instance_data, args.problem, workers=args.workers, time_limit=args.time_limit)
+        family = os.path.basename(os.path.dirname(file_path))
+        wins[family][solution['winner'] or 'none'] += 1
+        print(f"| {file_path} | {solution['objective_value']} | {solution['winner'] or '-'} | "
+              f"{solution['incumbent_strategy'] or '-'} | {solution['time']:.3f} |", flush=True)
+
+    print()
+    print("| family | wins |")
+    print("|---|---|")
+    for family, counter in wins.items():
+        print(f"| {family} | {', '.join(f'{name} {count}' for name, count in counter.most_common())} |")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+# p-center-problem/src/benchmark/regression.py
+#
+# Regression benchmark : times the reading (read_instance), the build of each model of src/models and
+# solve() on a profile of instances, checks the objective values against the known optima
+# (optima.json, optimal radius of the pmed instances of the OR-Library) and compares the timings
+# with a baseline JSON file. Usage:
+#   python -m src.benchmark.regression [--profile quick|full] [--baseline <file>] [--update-baseline] [--tolerance 0.5]
+#
+# The quick profile (pmed1-5 and the generated instances) runs in less than a minute, the full profile
+# (every instance) is meant for nightly runs. The exit code is 1 if an objective is wrong, a run fails,
+# the baseline file is missing or a phase is slower than baseline * (1 + tolerance) + min-slack.
+# baseline.json holds the reference timings of the quick profile (1 core, size-limited Gurobi license :
+# the phases missing from it are not compared), rerun with --update-baseline on the machine used as gate.
+# Every run also checks that the radius search of coordinate instances returns when its covering models
+# exceed max_nonzeros (bisection on the neighbour lists, see euclidean_radius_search).
+
+import argparse
+import contextlib
+import glob
+import io
+import json
+import multiprocessing
+import os
+import queue
+import sys
+import time
+
+from gurobipy import GRB
+from scipy.spatial import cKDTree
+
+from src.io_utils.instance import Instance
+from src.io_utils.read_instance import read_instance
+from src.io_utils.generate_instance import generate_capacities, generate_clients
+from src.solver.euclidean import euclidean_radius_search
+from src.models.classical import classical_model
+from src.models.compact import compact_model
+from src.models.capacitated import capacitated_model
+from src.models.failure import failure_model
+from src.solver.solve import solve
+from src.benchmark.shortest_paths import instance_key
+
+OPTIMA_PATH = os.path.join(os.path.dirname(__file__), 'optima.json')
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+BUILDERS = {
+    'classical': classical_model,
+    'compact': compact_model,
+    'capacitated': capacitated_model,
+    'failure': failure_model,
+}
+
+PROFILES = {
+    'quick': {
+        'instances': ['instances/pmed/pmed[1-5].txt', 'instances/generated/*_instance.txt'],
+        'builders': ['classical', 'compact', 'capacitated', 'failure'],
+        'solvers': ['radius', 'classical'],
+        'repeats': 3,
+        'time_limit': 60,
+    },
+    'full': {
+        'instances': ['instances/pmed/*.txt', 'instances/generated/*_instance.txt'],
+        'builders': ['classical', 'compact', 'capacitated', 'failure'],
+        'solvers': ['radius', 'compact', 'classical'],
+        'repeats': 1,
+        'time_limit': 600,
+    },
+}
+
+
+@contextlib.contextmanager
+def silence():
+    # discard the solver and Gurobi logs (Gurobi writes directly to the file descriptor 1)
+    sys.stdout.flush()
+    saved = os.dup(1)
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        os.dup2(saved, 1)
+        os.close(saved)
+        os.close(devnull)
+
+
+def best_time(function, repeats):
+    # minimum time (less noisy than the mean) over the repeats, and the last result
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def add_capacities(instance_data, alpha=0.2):
+    # pmed files have no demands nor capacities : they are generated as in src.benchmark.build
+    demands, capacities = generate_capacities(instance_data['num_nodes'], instance_data['num_centers'], seed=42)
+    return dict(instance_data, demands=demands.tolist(), capacities=capacities.tolist(), alpha=alpha)
+
+
+def build(builder, instance_data):
+    model = builder(instance_data)[0]
+    model.update()
+    return model
+
+
+def run_profile(files, builders, solvers, repeats, time_limit, optima):
+    """
+    Time every phase of every instance of the profile.
+    Returns:
+        tuple: (timings, failures) where timings maps 'instance/phase[/model]' to seconds
+            and failures lists the wrong objective values and the failed runs.
+    """
+    timings, failures = {}, []
+    for file_path in files:
+        name = os.path.splitext(os.path.basename(file_path))[0]
+        read_time, instance_data = best_time(lambda: read_instance(file_path, use_cache=False), repeats)
+        timings[f"{name}/read"] = read_time
+        print(f"{name}: read {read_time:.3f}s", end='', flush=True)
+
+        capacitated_data = add_capacities(instance_data)
+        for model_class in builders:
+            data = capacitated_data if model_class in ('capacitated', 'failure') else instance_data
+            try:
+                with silence():
+                    build_time, model = best_time(lambda: build(BUILDERS[model_class], data), repeats)
+            except Exception as e:
+                failures.append(f"{name}: build {model_class} failed ({e})")
+                continue
+            timings[f"{name}/build/{model_class}"] = build_time
+            print(f", build {model_class} {build_time:.3f}s", end='', flush=True)
+
+        for model_class in solvers:
+            data = capacitated_data if model_class in ('capacitated', 'failure') else instance_data
+            try:
+                with silence():
+                    solve_time, solution = best_time(lambda: solve(data, model_class, time_limit=time_limit), 1)
+            except Exception as e:
+                failures.append(f"{name}: solve {model_class} failed ({e})")
+                continue
+            timings[f"{name}/solve/{model_class}"] = solve_time
+            objective = solution['objective_value']
+            print(f", solve {model_class} {solve_time:.3f}s ({objective})", end='', flush=True)
+            if name in optima and (objective is None or abs(objective - optima[name]) > 1e-6):
+                failures.append(f"{name}: solve {model_class} objective {objective}, known optimum {optima[name]}")
+        print()
+    return timings, failures
+
+
+def capped_searches(results, seeds, num_nodes, num_centers, max_nonzeros):
+    # Process of check_capped_search : status of the radius search of each generated instance
+    for seed in seeds:
+        coordinates = generate_clients(num_nodes, 'euclidean', seed)
+        instance_data = Instance(num_nodes, num_centers, coordinates=coordinates, tree=cKDTree(coordinates))
+        with silence():
+            solution = euclidean_radius_search(instance_data, time_limit=60, max_nonzeros=max_nonzeros)
+        results.put((seed, solution['gurobi_status']))
+
+
+def check_capped_search(seeds=range(20), num_nodes=18, num_centers=4, max_nonzeros=54, timeout=120):
+    """
+    Run the radius search of small generated coordinate instances with a max_nonzeros below the size of the
+    covering models (bisection on the neighbour lists) in a separate process : every search must return,
+    interrupted or optimal, within the timeout.
+    Returns:
+        list: One message per search that failed or did not return.
+    """
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=capped_searches, args=(results, list(seeds), num_nodes, num_centers, max_nonzeros),
+                              daemon=True)
+    process.start()
+    statuses = {}
+    deadline = time.perf_counter() + timeout
+    while len(statuses) < len(seeds):
+        try:
+            seed, status = results.get(timeout=max(0.0, deadline - time.perf_counter()))
+        except queue.Empty:
+            break  # a search did not return (or the process died)
+        statuses[seed] = status
+    if process.is_alive():
+        process.terminate()
+    process.join()
+
+    failures = [f"capped radius search (seed {seed}): status {status}" for seed, status in statuses.items()
+                if status not in (GRB.OPTIMAL, GRB.INTERRUPTED)]
+    missing = [seed for seed in seeds if seed not in statuses]
+    if missing:
+        failures.append(f"capped radius search did not return within {timeout}s (seeds {missing})")
+    return failures
+
+
+def compare(timings, baseline, tolerance, min_slack):
+    """
+    Phases slower than baseline * (1 + tolerance) + min_slack (min_slack absorbs the noise of the short phases).
+    Returns:
+        list: One message per regression.
+    """
+    regressions = []
+    for key, value in sorted(timings.items()):
+        reference = baseline.get(key)
+        if reference is not None and value > reference * (1 + tolerance) + min_slack:
+            regressions.append(f"{key}: {value:.3f}s, baseline {reference:.3f}s (+{(value / reference - 1) * 100 if reference > 0 else float('inf'):.0f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Regression benchmark of the reading, build and solve phases.')
+    parser.add_argument('--profile', choices=list(PROFILES), default='quick', help='quick (routine runs) or full (nightly runs).')
+    parser.add_argument('--instances', nargs='+', default=None, help='Instance files or glob patterns (override the profile).')
+    parser.add_argument('--builders', nargs='+', choices=list(BUILDERS), default=None, help='Model builders to time (override the profile).')
+    parser.add_argument('--solvers', nargs='+', choices=['classical', 'compact', 'radius', 'capacitated', 'failure'], default=None,
+                        help='Model classes given to solve() (override the profile).')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON file.')
+    parser.add_argument('--update-baseline', action='store_true', help='If set, the timings are written to the baseline file.')
+    parser.add_argument('--tolerance', type=float, default=0.5, help='Allowed relative slowdown of each phase.')
+    parser.add_argument('--min-slack', type=float, default=0.05, help='Allowed absolute slowdown (seconds) of each phase.')
+    args = parser.parse_args()
+
+    profile = PROFILES[args.profile]
+    patterns = args.instances or profile['instances']
+    files = sorted({f for pattern in patterns for f in glob.glob(pattern)}, key=lambda f: (os.path.dirname(f), instance_key(f)))
+    with open(OPTIMA_PATH) as f:
+        optima = json.load(f)
+
+    start = time.perf_counter()
+    timings, failures = run_profile(files, args.builders or profile['builders'], args.solvers or profile['solvers'],
+                                    profile['repeats'], profile['time_limit'], optima)
+    print(f"{len(files)} instances, {len(timings)} timed phases in {time.perf_counter() - start:.1f}s")
+    failures += check_capped_search()
+
+    regressions = []
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(timings)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=4, sort_keys=True)
+        print(f"Baseline written to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare(timings, json.load(f), args.tolerance, args.min_slack)
+    else:
+        failures.append(f"no baseline {args.baseline}, run with --update-baseline to create it")
+
+    for message in failures:
+        print(f"FAILED {message}")
+    for message in regressions:
+        print(f"REGRESSION {message}")
+    if failures or regressions:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
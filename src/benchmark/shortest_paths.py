@@ -0,0 +1,82 @@
+# p-center-problem/src/benchmark/shortest_paths.py
+#
+# Compare the all pairs shortest path engine with the original pure Python Floyd-Warshall
+# on the pmed instances. Usage:
+#   python -m src.benchmark.shortest_paths [--instances instances/pmed] [--skip-reference]
+
+import argparse
+import glob
+import os
+import re
+import time
+
+import numpy as np
+
+from src.io_utils.shortest_paths import all_pairs_shortest_paths
+
+
+def read_edges(file_path):
+    with open(file_path, 'r') as file:
+        num_nodes, num_edges, _ = map(int, file.readline().split())
+        edges = []
+        for _ in range(num_edges):
+            node1, node2, distance = map(int, file.readline().split())
+            edges.append((node1-1, node2-1, distance))
+    return num_nodes, edges
+
+
+def reference_floyd_warshall(num_nodes, edges):
+    # Implementation previously used by read_instance, kept as the reference
+    distances = [[float('inf')] * num_nodes for _ in range(num_nodes)]
+    for i in range(num_nodes):
+        distances[i][i] = 0
+    for node1, node2, distance in edges:
+        distances[node1][node2] = distance
+        distances[node2][node1] = distance
+    for k in range(num_nodes):
+        for i in range(num_nodes):
+            for j in range(num_nodes):
+                if distances[i][j] > distances[i][k] + distances[k][j]:
+                    distances[i][j] = distances[i][k] + distances[k][j]
+    return distances
+
+
+def instance_key(file_path):
+    numbers = re.findall(r'\d+', os.path.basename(file_path))
+    return int(numbers[-1]) if numbers else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark of the all pairs shortest path computation.')
+    parser.add_argument('--instances', default='instances/pmed', help='Directory containing the instance files.')
+    parser.add_argument('--skip-reference', action='store_true', help='If set, the pure Python Floyd-Warshall is not run.')
+    args = parser.parse_args()
+
+    files = sorted(glob.glob(os.path.join(args.instances, '*.txt')), key=instance_key)
+
+    print(f"{'instance':<12}{'n':>6}{'m':>8}{'auto (s)':>11}{'dijkstra (s)':>14}{'floyd (s)':>11}{'python (s)':>12}{'speedup':>10}  same")
+    for file_path in files:
+        num_nodes, edges = read_edges(file_path)
+
+        timings = {}
+        results = {}
+        for method in ('auto', 'dijkstra', 'floyd_warshall'):
+            start = time.perf_counter()
+            results[method] = all_pairs_shortest_paths(num_nodes, edges, method=method)
+            timings[method] = time.perf_counter() - start
+
+        same = all(np.array_equal(results['auto'], results[m]) for m in results)
+        reference_time = float('nan')
+        if not args.skip_reference:
+            start = time.perf_counter()
+            reference = reference_floyd_warshall(num_nodes, edges)
+            reference_time = time.perf_counter() - start
+            same = same and np.array_equal(results['auto'], np.array(reference))
+
+        name = os.path.splitext(os.path.basename(file_path))[0]
+        print(f"{name:<12}{num_nodes:>6}{len(edges):>8}{timings['auto']:>11.4f}{timings['dijkstra']:>14.4f}"
+              f"{timings['floyd_warshall']:>11.4f}{reference_time:>12.3f}{reference_time / timings['auto']:>9.0f}x  {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# p-center-problem/src/benchmark/sweep.py
+#
+# Parametric sweep (src/solver/sweep.py, one model whose right-hand sides change between the points) against
+# independent solve() runs, one per point. The objective values of both must be equal. Usage:
+#   python -m src.benchmark.sweep --instances instances/pmed/pmed1.txt [--model classical] [--points 10]
+#   python -m src.benchmark.sweep --instances <file> --model failure --alphas 0 0.1 0.2 0.3
+#
+# By default the p values are the p of the instance and the next points - 1 values.
+# pmed files have no demands nor capacities : they are generated (generate_capacities, seed 42).
+
+import argparse
+import glob
+import time
+
+from src.io_utils.instance import as_instance
+from src.io_utils.read_instance import read_instance
+from src.solver.solve import solve
+from src.solver.sweep import sweep
+from src.benchmark.regression import add_capacities, silence
+
+
+def compare_sweep(instance_data, model_class, num_centers=None, alphas=None, time_limit=600):
+    """
+    Time a sweep and the independent runs over the same points.
+    Returns:
+        tuple: (sweep time, independent time, list of the points whose objective values differ).
+    """
+    instance_data = as_instance(instance_data)
+    start = time.perf_counter()
+    with silence():
+        solutions = sweep(instance_data, model_class, num_centers=num_centers, alphas=alphas, time_limit=time_limit)
+    sweep_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    mismatches = []
+    for solution in solutions:
+        fields = {'num_centers': solution['num_centers']}
+        if alphas is not None:
+            fields['alpha'] = solution['alpha']
+        data = instance_data.replace(**fields)
+        with silence():
+            independent = solve(data, model_class, time_limit=time_limit)
+        expected, found = independent['objective_value'], solution['objective_value']
+        if (expected is None) != (found is None) or (expected is not None and abs(expected - found) > 1e-6):
+            mismatches.append((solution['num_centers'], solution['alpha'], found, expected))
+    return sweep_time, time.perf_counter() - start, mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Parametric sweep against independent runs.')
+    parser.add_argument('--instances', nargs='+', required=True, help='Instance files or glob patterns.')
+    parser.add_argument('--model', choices=['classical', 'compact', 'capacitated', 'failure'], default='classical', help='Model class.')
+    parser.add_argument('--points', type=int, default=10, help='Number of p values (p of the instance and the next ones).')
+    parser.add_argument('--alphas', nargs='+', type=float, default=None, help='If set, alpha values of the sweep (failure model) instead of p values.')
+    parser.add_argument('--time-limit', type=float, default=600, help='Time limit (seconds) of each point.')
+    args = parser.parse_args()
+
+    files = sorted({f for pattern in args.instances for f in glob.glob(pattern)})
+    print("| instance | model | points | sweep (s) | independent (s) | speedup | objectives |")
+    print("|---|---|---|---|---|---|---|")
+    for file_path in files:
+        instance_data = read_instance(file_path)
+        if args.model in ('capacitated', 'failure'):
+            instance_data = add_capacities(instance_data)
+        num_centers = None
+        if args.alphas is None:
+            first = instance_data['num_centers']
+            num_centers = list(range(first, min(first + args.points, instance_data['num_nodes'] + 1)))
+        sweep_time, independent_time, mismatches = compare_sweep(instance_data, args.model, num_centers, args.alphas, args.time_limit)
+        points = len(num_centers) if num_centers is not None else len(set(args.alphas))
+        status = 'equal' if not mismatches else f"{len(mismatches)} different {mismatches}"
+        print(f"| {file_path} | {args.model} | {points} | {sweep_time:.3f} | {independent_time:.3f} | "
+              f"{independent_time / sweep_time:.1f}x | {status} |", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+# p-center-problem/src/benchmark/updates.py
+#
+# Re-planning after incremental updates (src/io_utils/updates.py) : for random single changes of the pmed
+# instances, time of the repair of the distance matrix against a full all pairs shortest path computation, and
+# time of the re-solve warm-started from the previous centers against a solve from the heuristic. Usage:
+#   python -m src.benchmark.updates --instances "instances/pmed/pmed4*.txt" [--model radius] [--updates 10]
+#
+# The repaired matrix is compared with the full computation, the two solves must give the same objective.
+#
+# --check runs each kind of update on a small graph and compares the repaired matrices with a Dijkstra from every
+# node, including the updates that would disconnect the graph (rejected, instance unchanged). It needs no
+# instance file and solves no model (exit code 1 if a repair differs).
+
+import argparse
+import contextlib
+import glob
+import io
+import os
+import sys
+import time
+
+import numpy as np
+
+from src.io_utils.updates import InstanceGraph
+from src.io_utils.shortest_paths import dijkstra_all_pairs, shorter_edge, repair_rows, compact
+from src.solver.solve import solve
+from src.solver.resolve import resolve
+from src.benchmark.shortest_paths import instance_key
+
+UPDATES = ('longer', 'shorter', 'remove', 'add_edge', 'add_node', 'deactivate')
+
+
+def random_update(graph, kind, rng):
+    """Apply a random update of the given kind, returns its description."""
+    edges = np.argwhere(np.triu(np.isfinite(graph.weights), 1))
+    i, j = edges[rng.integers(len(edges))]
+    node1, node2 = int(graph.node_ids[i]), int(graph.node_ids[j])
+    length = graph.weights[i, j]
+    if kind == 'longer':
+        graph.set_edge(node1, node2, 2 * length)
+        return f"edge ({node1}, {node2}) {length:g} -> {2 * length:g}"
+    if kind == 'shorter':
+        graph.set_edge(node1, node2, length // 2)
+        return f"edge ({node1}, {node2}) {length:g} -> {length // 2:g}"
+    if kind == 'remove':
+        graph.remove_edge(node1, node2)
+        return f"edge ({node1}, {node2}) removed"
+    if kind == 'add_edge':
+        node1, node2 = (int(node) for node in rng.choice(graph.node_ids, 2, replace=False))
+        length = int(rng.integers(1, 100))
+        graph.set_edge(node1, node2, length)
+        return f"edge ({node1}, {node2}) {length} added"
+    if kind == 'add_node':
+        neighbors = {int(node): int(rng.integers(1, 100)) for node in rng.choice(graph.node_ids, 3, replace=False)}
+        capacity = {'demand': 1, 'capacity': 1} if 'capacities' in graph.instance else {}
+        return f"node {graph.add_node(neighbors, **capacity)} added"
+    node = int(rng.choice(graph.node_ids))
+    graph.deactivate_node(node)
+    return f"node {node} deactivated"
+
+
+def toy_graph(seed=0):
+    """
+    InstanceGraph of a small graph with random integer lengths : a cycle 0-1-2-3-4-5, node 6 linked to 5 and
+    node 7 linked to 6, so (5, 6) and (6, 7) are bridges and 6 is a cut node.
+    """
+    rng = np.random.default_rng(seed)
+    edges = [(k, (k + 1) % 6) for k in range(6)] + [(0, 3), (5, 6), (6, 7)]
+    weights = np.full((8, 8), np.inf)
+    np.fill_diagonal(weights, 0)
+    for (i, j), length in zip(edges, rng.integers(1, 20, len(edges))):
+        weights[i, j] = weights[j, i] = length
+    instance = {'num_nodes': 8, 'num_edges': len(edges), 'num_centers': 2, 'distances': dijkstra_all_pairs(weights)}
+    return InstanceGraph(instance, weights)
+
+
+def check_updates(seed=0):
+    """
+    Apply each kind of update to toy_graph and compare the repaired distance matrix (and the distances and
+    number of edges of the instance) with a Dijkstra from every node over the updated graph. The removal of a
+    bridge and the deactivation of a cut node must raise ValueError and leave the instance unchanged.
+    Returns:
+        list: Description of each difference, empty if every repair is exact.
+    """
+    differences = []
+
+    def compare(graph, name):
+        reference = dijkstra_all_pairs(graph.weights)
+        if not np.array_equal(graph.distances, reference):
+            differences.append(f"{name}: repaired distances differ from the shortest paths")
+        if not np.array_equal(graph.instance['distances'], compact(reference)):
+            differences.append(f"{name}: instance distances differ from the shortest paths")
+        num_edges = (np.isfinite(graph.weights).sum() - len(graph.weights)) // 2
+        if graph.instance['num_edges'] != num_edges or graph.instance['num_nodes'] != len(graph.weights):
+            differences.append(f"{name}: wrong instance sizes")
+
+    def rejected(graph, name, update):
+        weights, distances = graph.weights.copy(), graph.distances.copy()
+        sizes = (graph.instance['num_nodes'], graph.instance['num_edges'])
+        try:
+            update()
+            differences.append(f"{name}: accepted although it disconnects the graph")
+        except ValueError:
+            if not (np.array_equal(graph.weights, weights) and np.array_equal(graph.distances, distances)
+                    and sizes == (graph.instance['num_nodes'], graph.instance['num_edges'])):
+                differences.append(f"{name}: rejected update changed the instance")
+        compare(graph, name)
+
+    # Repair functions on their own : shorter edge in place, rows of given sources
+    graph = toy_graph(seed)
+    distances = graph.distances.copy()
+    graph.weights[1, 4] = graph.weights[4, 1] = 1
+    shorter_edge(distances, 1, 4, 1)
+    if not np.array_equal(distances, dijkstra_all_pairs(graph.weights)):
+        differences.append("shorter_edge: distances differ from the shortest paths")
+    graph.weights[1, 4] = graph.weights[4, 1] = 40
+    repair_rows(graph.weights, distances, np.arange(len(distances)))
+    if not np.array_equal(distances, dijkstra_all_pairs(graph.weights)):
+        differences.append("repair_rows: distances differ from the shortest paths")
+    graph.weights[5, 6] = graph.weights[6, 5] = np.inf
+    before = distances.copy()
+    try:
+        repair_rows(graph.weights, distances, np.array([5, 6]))
+        differences.append("repair_rows: no error on a disconnected graph")
+    except ValueError:
+        if not np.array_equal(distances, before):
+            differences.append("repair_rows: distances changed on a disconnected graph")
+
+    # Updates of an InstanceGraph, applied one after the other
+    graph = toy_graph(seed)
+    length = graph.weights[0, 1]
+    for name, update in [
+        ('shorter edge', lambda: graph.set_edge(0, 3, 1)),
+        ('added edge', lambda: graph.set_edge(2, 5, 2)),
+        ('longer edge', lambda: graph.set_edge(0, 1, 3 * length)),
+        ('removed edge', lambda: graph.remove_edge(0, 3)),
+        ('added node', lambda: graph.add_node({1: 4, 7: 30})),
+        ('deactivated node', lambda: graph.deactivate_node(3)),
+        ('removed edge of the added node', lambda: graph.remove_edge(8, 7)),
+        ('longer bridge', lambda: graph.set_edge(5, 6, 50)),
+    ]:
+        update()
+        compare(graph, name)
+    rejected(graph, 'removed bridge', lambda: graph.remove_edge(6, 7))
+    rejected(graph, 'removed longer bridge', lambda: graph.remove_edge(5, 6))
+    rejected(graph, 'deactivated cut node', lambda: graph.deactivate_node(6))
+    return differences
+
+
+def quiet(function, *args, **kwargs):
+    # the solvers print their preprocessing and the Gurobi logs
+    with contextlib.redirect_stdout(io.StringIO()):
+        return function(*args, **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark of the incremental instance updates.')
+    parser.add_argument('--instances', nargs='+', default=['instances/pmed/pmed40.txt'], help='Instance files or glob patterns.')
+    parser.add_argument('--model', choices=['classical', 'compact', 'radius'], default='radius', help='Formulation of the re-solves.')
+    parser.add_argument('--updates', type=int, default=10, help='Number of random updates per instance.')
+    parser.add_argument('--kinds', nargs='+', choices=UPDATES, default=['longer', 'shorter', 'remove', 'add_edge'], help='Kinds of updates drawn.')
+    parser.add_argument('--no-solve', action='store_true', help='If set, only the distance matrix repairs are timed.')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the random updates.')
+    parser.add_argument('--check', action='store_true', help='If set, only checks the repairs of each kind of update on a small graph against the full shortest paths.')
+    args = parser.parse_args()
+
+    if args.check:
+        differences = check_updates(args.seed)
+        print('\n'.join(differences) if differences else "repaired distances are the shortest paths")
+        sys.exit(1 if differences else 0)
+
+    rng = np.random.default_rng(args.seed)
+    files = sorted({f for pattern in args.instances for f in glob.glob(pattern)}, key=instance_key)
+    print("| instance | update | repair (s) | APSP (s) | same | warm re-solve (s) | solve (s) | objective | start |")
+    print("|---|---|---|---|---|---|---|---|---|")
+    for file_path in files:
+        graph = InstanceGraph.from_file(file_path)
+        solution = None if args.no_solve else quiet(solve, graph.instance, args.model)
+        name = os.path.splitext(os.path.basename(file_path))[0]
+        for _ in range(args.updates):
+            start = time.perf_counter()
+            try:
+                update = random_update(graph, rng.choice(args.kinds), rng)
+            except ValueError as e:
+                print(f"| {name} | {e} | - | - | - | - | - | - | - |")
+                continue
+            repair_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            reference = dijkstra_all_pairs(graph.weights)
+            apsp_time = time.perf_counter() - start
+            same = np.array_equal(reference, graph.distances)
+
+            if args.no_solve:
+                print(f"| {name} | {update} | {repair_time:.4f} | {apsp_time:.4f} | {same} | - | - | - | - |", flush=True)
+                continue
+            start = time.perf_counter()
+            warm = quiet(resolve, graph, args.model, previous=solution)
+            warm_time = time.perf_counter() - start
+            start = time.perf_counter()
+            cold = quiet(solve, graph.instance, args.model)
+            cold_time = time.perf_counter() - start
+            objective = warm['objective_value'] if warm['objective_value'] == cold['objective_value'] else \
+                f"{warm['objective_value']} != {cold['objective_value']}"
+            print(f"| {name} | {update} | {repair_time:.4f} | {apsp_time:.4f} | {same} | {warm_time:.3f} | "
+                  f"{cold_time:.3f} | {objective} | {warm['start_value']} |", flush=True)
+            solution = warm
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# p-center-problem/src/client.py
+#
+# Client of the solver service (src/service.py) : submits jobs over the Unix socket or the localhost HTTP port
+# and prints the JSON solutions. Only the standard library is imported, so that a job costs no Python import.
+
+import argparse
+import http.client
+import json
+import socket
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP connection over a Unix socket."""
+
+    def __init__(self, socket_path, timeout=None):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def request(method, path, body=None, socket_path=None, host=DEFAULT_HOST, port=DEFAULT_PORT, timeout=None):
+    """
+    Send a request to the solver service.
+    Returns:
+        tuple: (HTTP status, decoded JSON response).
+    """
+    if socket_path is not None:
+        connection = UnixHTTPConnection(socket_path, timeout=timeout)
+    else:
+        connection = http.client.HTTPConnection(host, port, timeout=timeout)
+    try:
+        payload = json.dumps(body) if body is not None else None
+        connection.request(method, path, body=payload, headers={'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        return response.status, json.loads(response.read() or b'{}')
+    finally:
+        connection.close()
+
+
+def submit(job, **connection):
+    """Solve a job on the service (see src/service.py for the job fields), returns (HTTP status, response)."""
+    return request('POST', '/solve', job, **connection)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Submit p-center jobs to the solver service')
+    parser.add_argument('files', nargs='*', help='Instance files, one job each (paths as seen by the service).')
+    parser.add_argument('--socket', default=None, help='Unix socket of the service (default: localhost HTTP port).')
+    parser.add_argument('--host', default=DEFAULT_HOST, help='Host of the service.')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='HTTP port of the service.')
+    parser.add_argument('--model', choices=['classical', 'compact', 'radius'], default='classical', help='Formulation of the classical p-center problem.')
+    parser.add_argument('--capacitated', action='store_true', help='If set, the capacitated p-center problem is solved.')
+    parser.add_argument('--failure', type=float, default=None, help='If set, the p-center problem with failure foresight is solved with this alpha.')
+    parser.add_argument('--num-centers', type=int, default=None, help='Number of centers p, overrides the value of the instance file.')
+    parser.add_argument('--heuristic', action='store_true', help='If set, the problem is solved with the heuristic only.')
+    parser.add_argument('--time-limit', type=float, default=3600, help='Time limit (seconds) of each job.')
+    parser.add_argument('--no-warm-start', action='store_true', help='If set, the heuristic solution is not given to Gurobi as MIP start.')
+    parser.add_argument('--no-reduction', action='store_true', help='If set, the models are built over all the client-center pairs.')
+    parser.add_argument('--lazy', action='store_true', help='If set, the distance constraints of the classical, capacitated and failure models are added only when violated.')
+    parser.add_argument('--repeat', type=int, default=1, help='Number of times each job is submitted.')
+    parser.add_argument('--concurrency', type=int, default=1, help='Number of jobs submitted at the same time.')
+    parser.add_argument('--json', action='store_true', help='If set, the full JSON responses are printed (one per line).')
+    parser.add_argument('--status', action='store_true', help='If set, the state of the service (cache, queue) is printed.')
+    parser.add_argument('--shutdown', action='store_true', help='If set, the service is stopped.')
+    args = parser.parse_args()
+
+    connection = {'socket_path': args.socket, 'host': args.host, 'port': args.port}
+    try:
+        if args.status:
+            print(json.dumps(request('GET', '/status', **connection)[1], indent=4))
+        if args.shutdown:
+            print(request('POST', '/shutdown', **connection)[1].get('status'))
+    except OSError as e:
+        sys.exit(f"Error: the service is not reachable ({e})")
+
+    if args.failure is not None:
+        model = 'failure'
+    elif args.capacitated:
+        model = 'capacitated'
+    else:
+        model = args.model
+    jobs = [{
+        'file': file, 'model': model, 'alpha': args.failure or 0.0, 'num_centers': args.num_centers,
+        'heuristic': args.heuristic, 'time_limit': args.time_limit, 'warm_start': not args.no_warm_start,
+        'reduce': not args.no_reduction, 'lazy': args.lazy,
+    } for file in args.files for _ in range(args.repeat)]
+
+    def run(job):
+        start = time.perf_counter()
+        try:
+            status, response = submit(job, **connection)
+        except OSError as e:
+            status, response = None, {'error': f"the service is not reachable ({e})"}
+        return job, status, response, time.perf_counter() - start
+
+    failed = False
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+        for job, status, response, latency in pool.map(run, jobs):
+            failed = failed or status != 200
+            if args.json:
+                print(json.dumps(response))
+            elif status == 200:
+                solution, times = response['solution'], response['times']
+                print(f"{job['file']} {job['model']}: objective {solution['objective_value']} "
+                      f"(status {solution['gurobi_status']}, {latency:.3f}s : queue {times['queue']:.3f}s, "
+                      f"load {times['load']:.3f}s{' cached' if response['cached'] else ''}, run {times['run']:.3f}s)")
+            else:
+                print(f"{job['file']} {job['model']}: error {status}: {response.get('error')}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
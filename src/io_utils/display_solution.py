@@ -2,4 +2,53 @@ def display_solution(solution):
     print("Solution:")
     print(f"Solving status: {solution['gurobi_status']}")
     print(f"Objective value: {solution['objective_value']}")
-    print(f"Centers: {solution['centers']}")
\ No newline at end of file
+    print(f"Centers: {solution['centers']}")
+    if solution.get('violations'):
+        # Evaluated solution : rules violated by the assignments
+        print(f"Infeasible: {'; '.join(solution['violations'])}")
+    if solution.get('heuristic_only'):
+        # Radius search stopped before its first covering model : the radius is that of the heuristic
+        print("Heuristic only: no covering model fits in max_nonzeros")
+    if 'iterations' in solution:
+        # Radius search : one line per covering problem solved
+        print(f"Iterations: {len(solution['iterations'])}")
+        for k, iteration in enumerate(solution['iterations']):
+            print(f"  {k+1}: radius {iteration['radius']} {'feasible' if iteration['feasible'] else 'infeasible'} ({iteration['time']:.3f}s)")
+
+    if 'lazy_constraints' in solution:
+        # Lazy constraint callback : number of cuts and time per round
+        rounds = solution['lazy_constraints']['rounds']
+        total_time = sum(r['time'] for r in rounds)
+        print(f"Lazy constraints: {solution['lazy_constraints']['cuts']} cuts in {len(rounds)} rounds "
+              f"({total_time:.3f}s, {total_time / max(1, len(rounds)):.4f}s per round)")
+
+    if 'strategies' in solution:
+        # Portfolio : strategy that proved the optimality and result of each strategy
+        print(f"Winner: {solution['winner'] or 'none (optimality not proved)'}, best solution found by {solution['incumbent_strategy']} "
+              f"({solution['time']:.3f}s, lower bound {solution['lower_bound']})")
+        for strategy in solution['strategies']:
+            if strategy['error']:
+                result = f"error: {strategy['error']}"
+            elif strategy['time'] is None:
+                result = "stopped"
+            else:
+                result = f"objective {strategy['objective_value']}{' (proved)' if strategy['proved'] else ''} ({strategy['time']:.3f}s)"
+            print(f"  {strategy['name']:<24} {strategy['model_class']:<12} {result}")
+
+def display_preprocessing(records):
+    # Bounds of the optimal radius and reduction of the model of each solve (see Trace.record_preprocessing)
+    for record in records:
+        upper_bound = record['upper_bound'] if record['upper_bound'] is not None else 'inf'
+        print(f"Preprocessing: optimal radius in [{record['lower_bound']}, {upper_bound}]")
+        if 'removed_variables' in record:
+            print(f"Preprocessing: removed {record['removed_variables']} variables and {record['removed_constraints']} constraints")
+
+def display_sweep(solutions):
+    # Trade-off curve of a parametric sweep : one line per point
+    print("Sweep:")
+    print(f"{'p':>6} {'alpha':>6} {'objective':>12} {'status':>6} {'gap':>8} {'time (s)':>9}  centers")
+    for solution in solutions:
+        alpha = f"{solution['alpha']:.3g}" if solution['alpha'] is not None else '-'
+        gap = f"{solution['gap']:.2%}" if solution['gap'] is not None else '-'
+        print(f"{solution['num_centers']:>6} {alpha:>6} {str(solution['objective_value']):>12} {solution['gurobi_status']:>6} "
+              f"{gap:>8} {solution['time']:>9.3f}  {solution['centers']}")
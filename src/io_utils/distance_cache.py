@@ -0,0 +1,113 @@
+import hashlib
+import os
+import uuid
+
+import numpy as np
+
+# Cache directory, next to the instance families
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'instances', '.cache')
+# Maximum total size of the cached matrices (bytes), least recently used files are evicted above it
+DEFAULT_MAX_SIZE = 2 * 1024**3
+# Change it when the way distances are computed changes, old entries are then never reused
+CACHE_VERSION = 3
+
+
+def instance_hash(file_path):
+    """
+    Hash of the content of an instance file, used as the cache key.
+    """
+    digest = hashlib.sha256(f"v{CACHE_VERSION}".encode())
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_path(key, cache_dir=DEFAULT_CACHE_DIR):
+    return os.path.join(cache_dir, f"{key}.npy")
+
+
+def load_distances(key, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Memory-map a cached distance matrix.
+    Returns:
+        np.ndarray or None: Read-only memory-mapped matrix, None if the key is not cached.
+    """
+    path = cache_path(key, cache_dir)
+    try:
+        distances = np.load(path, mmap_mode='r')
+    except (OSError, ValueError):
+        return None
+    # Mark the entry as recently used for the LRU eviction (not possible in a read-only cache directory)
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return distances
+
+
+def store_distances(key, distances, cache_dir=DEFAULT_CACHE_DIR, max_size=DEFAULT_MAX_SIZE):
+    """
+    Save a distance matrix in the cache, then evict old entries if the cache is too large.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    path = cache_path(key, cache_dir)
+    # Write to a temporary file first so that a concurrent reader never sees a partial matrix
+    tmp_path = os.path.join(cache_dir, f".{key}.{uuid.uuid4().hex}.tmp.npy")
+    np.save(tmp_path, np.ascontiguousarray(distances))
+    os.replace(tmp_path, path)
+    evict(cache_dir, max_size, keep=path)
+
+
+def cache_entries(cache_dir=DEFAULT_CACHE_DIR):
+    """
+    List the cached files as (path, size, last use time), least recently used first.
+    """
+    if not os.path.isdir(cache_dir):
+        return []
+    entries = []
+    for name in os.listdir(cache_dir):
+        if not name.endswith('.npy') or name.startswith('.'):
+            continue
+        path = os.path.join(cache_dir, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        entries.append((path, stat.st_size, stat.st_mtime))
+    entries.sort(key=lambda entry: entry[2])
+    return entries
+
+
+def evict(cache_dir=DEFAULT_CACHE_DIR, max_size=DEFAULT_MAX_SIZE, keep=None):
+    """
+    Remove the least recently used matrices until the cache fits in max_size bytes.
+    The file keep (the one just written) is never removed.
+    """
+    entries = cache_entries(cache_dir)
+    total_size = sum(size for _, size, _ in entries)
+    for path, size, _ in entries:
+        if total_size <= max_size:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total_size -= size
+
+
+def clear_cache(cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Remove every cached matrix.
+    Returns:
+        int: Number of removed files.
+    """
+    entries = cache_entries(cache_dir)
+    for path, _, _ in entries:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    return len(entries)
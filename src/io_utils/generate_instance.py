@@ -1,10 +1,20 @@
 import argparse
 import json
 import csv
+import gzip
 import os
 import random
 import numpy as np
 
+# Maximum number of distances computed (and formatted) at once : row blocks of the distance matrix, 2 MB in
+# float64 and about 50 MB of Python numbers while a block of text lines is formatted
+BLOCK_ELEMENTS = 2**18
+# Binary instance files : 64 bytes header, (n, n) distance matrix, then capacities and demands (int64) if capacitated
+BINARY_MAGIC = b'PCENTERB'
+BINARY_VERSION = 1
+BINARY_HEADER = np.dtype([('magic', 'S8'), ('version', '<i4'), ('integer', '<i4'), ('num_nodes', '<i8'),
+                          ('num_edges', '<i8'), ('num_centers', '<i8'), ('capacitated', '<i8'), ('padding', 'V16')])
+
 def generate_clients(n_clients, space_type, seed, distribution='uniform'):
     random.seed(seed)
     np.random.seed(seed)
@@ -19,11 +29,11 @@ def generate_clients(n_clients, space_type, seed, distribution='uniform'):
         elif distribution == 'clustered':
             n_clusters = max(2, n_clients // 10)
             cluster_centers = np.random.uniform(coord_min, coord_max, size=(n_clusters, 2))
-            coords = []
-            for _ in range(n_clients):
-                center = cluster_centers[random.randint(0, n_clusters - 1)]
-                point = np.random.normal(loc=center, scale=0.05*coord_max, size=2)
-                coords.append(point)
+            # cluster of each client (same draws as the former loop over the clients), then all the points at
+            # once around their cluster center : the NumPy draws come in the same order, the seeded instances
+            # are unchanged
+            labels = [random.randint(0, n_clusters - 1) for _ in range(n_clients)]
+            coords = np.random.normal(loc=cluster_centers[labels], scale=0.05*coord_max)
             coords = np.clip(coords, coord_min, coord_max)
         else:
             raise ValueError("Unsupported distribution type for euclidean space.")
@@ -90,36 +100,81 @@ def save_to_json(coords, file_path):
     with open(file_path, 'w') as f:
         json.dump(data, f, indent=4)
 
-def save_distance_matrix_txt(coords, p_centers, file_path, integer=False):
+def distance_blocks(coords, block_elements=BLOCK_ELEMENTS):
+    """
+    Rows of the distance matrix by blocks of at most block_elements distances (bounded memory).
+    Yields:
+        tuple: (first row, (rows, n) distance block).
+    """
     from scipy.spatial.distance import cdist
-    dist_matrix = cdist(coords, coords)
     num_nodes = len(coords)
-    num_edges = num_nodes * (num_nodes - 1) // 2
+    block_rows = max(1, block_elements // max(1, num_nodes))
+    for start in range(0, num_nodes, block_rows):
+        yield start, cdist(coords[start:start + block_rows], coords)
 
-    if integer:
-        dist_matrix = np.rint(dist_matrix).astype(int)
 
-    with open(file_path, 'w') as f:
+def open_text(file_path, mode):
+    # gzip-compressed text if the path ends with .gz
+    if file_path.endswith('.gz'):
+        return gzip.open(file_path, mode + 't', compresslevel=6)
+    return open(file_path, mode)
+
+
+def save_distance_matrix_txt(coords, p_centers, file_path, integer=False, block_elements=BLOCK_ELEMENTS):
+    """
+    pmed-style text instance : one line (i, j, distance) per pair i < j, with 1-based node numbers as the pmed
+    files, gzip-compressed if file_path ends with .gz. The distances are computed by row blocks of at most
+    block_elements distances, the lines of a block are formatted by a single % on the block values.
+    """
+    num_nodes = len(coords)
+    num_edges = num_nodes * (num_nodes - 1) // 2
+    line = '%d %d %d\n' if integer else '%d %d %.2f\n'
+
+    with open_text(file_path, 'w') as f:
         f.write(f"{num_nodes} {num_edges} {p_centers}\n")
-        
-        for i in range(num_nodes):
-            for j in range(i + 1, num_nodes):  # upper triangle only (no duplicates)
-                dist = dist_matrix[i][j]
-                if integer:
-                    f.write(f"{i} {j} {int(dist)}\n")
-                else:
-                    f.write(f"{i} {j} {dist:.2f}\n")
-
-        # OLD FORMAT : print the full distance matrix
-        # for row in dist_matrix:
-        #     if integer:
-        #         f.write(' '.join(str(d) for d in row) + '\n')
-        #     else:
-        #         f.write(' '.join(f"{d:.2f}" for d in row) + '\n')
+
+        for start, block in distance_blocks(coords, block_elements):
+            # upper triangle only (no duplicates)
+            rows, columns = np.nonzero(np.arange(num_nodes)[None, :] > np.arange(start, start + len(block))[:, None])
+            values = block[rows, columns]
+            if integer:
+                values = np.rint(values)
+            lines = np.column_stack((rows + start + 1, columns + 1, values))
+            f.write(line * len(lines) % tuple(lines.ravel().tolist()))
+
+
+def save_distance_matrix_bin(coords, p_centers, file_path, integer=False, demands=None, capacities=None,
+                             block_elements=BLOCK_ELEMENTS):
+    """
+    Binary instance : header (BINARY_HEADER), full (n, n) distance matrix in little-endian int32 (integer)
+    or float32, then capacities and demands (int64) if given. The matrix is written by row blocks and
+    read back as a memory map (read_instance), without parsing.
+    """
+    num_nodes = len(coords)
+    capacitated = capacities is not None and demands is not None
+    header = np.zeros(1, dtype=BINARY_HEADER)
+    header[0]['magic'] = BINARY_MAGIC
+    header[0]['version'] = BINARY_VERSION
+    header[0]['integer'] = int(integer)
+    header[0]['num_nodes'] = num_nodes
+    header[0]['num_edges'] = num_nodes * (num_nodes - 1) // 2
+    header[0]['num_centers'] = p_centers
+    header[0]['capacitated'] = int(capacitated)
+
+    with open(file_path, 'wb') as f:
+        f.write(header.tobytes())
+        for _, block in distance_blocks(coords, block_elements):
+            if integer:
+                f.write(np.rint(block).astype('<i4').tobytes())
+            else:
+                f.write(block.astype('<f4').tobytes())
+        if capacitated:
+            f.write(np.asarray(capacities, dtype='<i8').tobytes())
+            f.write(np.asarray(demands, dtype='<i8').tobytes())
 
 def save_capacity(demands, capacities, txt_path):
 
-    with open(txt_path, 'a') as f:
+    with open_text(txt_path, 'a') as f:
         for i in range(len(capacities)):
             f.write(f"{capacities[i]}\n")
 
@@ -153,6 +208,7 @@ def main():
     parser.add_argument('--output_format', choices=['csv', 'json'], default='csv')
     parser.add_argument('--output_dir', type=str, default='instances/generated', help='Directory to save the generated instance files. By default, it is "instances/generated".')
     parser.add_argument('--compute_distances', action='store_true')
+    parser.add_argument('--distance_format', choices=['txt', 'txt.gz', 'bin'], default='txt', help='Format of the distance file: pmed-style text, gzip-compressed text or binary (memory-mapped by the reader).')
     parser.add_argument('--integer_distances', action='store_true', help='If set, distances will be rounded to integers.')
     parser.add_argument('--show_plot', action='store_true', help='If set, displays a 2D scatter plot of the instance using matplotlib.')
     parser.add_argument('--capacitated', action='store_true', help='If set, generates a capacitated instance.')
@@ -206,11 +262,15 @@ def main():
         save_to_json(coords, os.path.join(args.output_dir, base_name + "_clients.json"))
 
     if args.compute_distances:
-        dist_matrix = compute_distance_matrix(coords)
-        txt_path = os.path.join(args.output_dir, base_name + "_instance.txt")
-        save_distance_matrix_txt(coords, args.p_centers, txt_path, integer=args.integer_distances)
-        if args.capacitated:
-            save_capacity(demands, capacities, txt_path)
+        instance_path = os.path.join(args.output_dir, base_name + "_instance." + args.distance_format)
+        if args.distance_format == 'bin':
+            save_distance_matrix_bin(coords, args.p_centers, instance_path, integer=args.integer_distances,
+                                     demands=demands if args.capacitated else None,
+                                     capacities=capacities if args.capacitated else None)
+        else:
+            save_distance_matrix_txt(coords, args.p_centers, instance_path, integer=args.integer_distances)
+            if args.capacitated:
+                save_capacity(demands, capacities, instance_path)
 
     print(f"Instance generated: {base_name}")
 
@@ -0,0 +1,144 @@
+from collections.abc import MutableMapping
+
+import numpy as np
+
+from src.io_utils.shortest_paths import compact, narrow_dtype
+
+
+class Instance(MutableMapping):
+    """
+    Instance of the p-center problem and its variants, with NumPy arrays of the narrowest exact dtype
+    for the distances, demands and capacities (see compact : a list of Python numbers costs about 30 bytes
+    per value, an uint16 array 2 bytes).
+    The distances can be given as a function called on the first access (lazy distances), and the
+    rows of the distance matrix sorted by increasing distance (neighbors) are computed once and kept.
+    Instance is also a mapping over the keys of the instance_data dictionaries ('num_nodes', 'distances',
+    'demands', ...) : the solvers and the model builders written for dictionaries accept it unchanged.
+    """
+
+    __slots__ = ('num_nodes', 'num_edges', 'num_centers', 'alpha', 'demands', 'capacities', 'coordinates', 'tree',
+                 '_distances', '_distance_loader', '_neighbors')
+
+    # Keys of the dictionary view, a key whose value is None is absent
+    KEYS = ('num_nodes', 'num_edges', 'num_centers', 'distances', 'demands', 'capacities', 'alpha', 'coordinates', 'tree')
+
+    def __init__(self, num_nodes, num_centers, num_edges=None, distances=None, demands=None, capacities=None,
+                 alpha=None, coordinates=None, tree=None):
+        """
+        Args:
+            num_nodes, num_centers, num_edges (int): Sizes of the instance.
+            distances: (n, n) distance matrix, or a function without arguments returning it (lazy distances).
+            demands, capacities: Demand and capacity of each node (capacitated variants).
+            alpha (float): Failure foresight overload coefficient.
+            coordinates, tree: Points and KD-tree of coordinate instances (see src/solver/euclidean.py).
+        """
+        self.num_nodes = num_nodes
+        self.num_centers = num_centers
+        self.num_edges = num_edges
+        self.alpha = alpha
+        self.coordinates = coordinates
+        self.tree = tree
+        self._distances, self._distance_loader, self._neighbors = None, None, None
+        self.set_distances(distances)
+        # signed : the loads and remaining capacities are computed by subtraction
+        self.demands = None if demands is None else compact(demands, unsigned=False)
+        self.capacities = None if capacities is None else compact(capacities, unsigned=False)
+
+    def set_distances(self, distances):
+        """Distance matrix (or function returning it), the sorted neighbors are computed again when needed."""
+        self._neighbors = None
+        if callable(distances):
+            self._distances, self._distance_loader = None, distances
+        else:
+            # memory-mapped matrices (cache, binary instances) are kept as they are
+            self._distances = distances if distances is None or isinstance(distances, np.memmap) else compact(distances)
+            self._distance_loader = None
+
+    def replace(self, **fields):
+        """
+        Instance with some fields changed (num_centers, alpha, ...), sharing the arrays, the lazy distances
+        and the sorted neighbors of this one.
+        """
+        instance = Instance.__new__(Instance)
+        for name in self.__slots__:
+            setattr(instance, name, getattr(self, name))
+        for key, value in fields.items():
+            instance[key] = value
+        return instance
+
+    @property
+    def distances(self):
+        """(n, n) distance matrix, computed on the first access for lazy distances."""
+        if self._distances is None and self._distance_loader is not None:
+            loader, self._distance_loader = self._distance_loader, None
+            self.set_distances(loader())
+        return self._distances
+
+    @property
+    def has_distances(self):
+        """True if the distance matrix is available or can be computed (without computing it)."""
+        return self._distances is not None or self._distance_loader is not None
+
+    def neighbors(self):
+        """
+        Nodes sorted by increasing distance for each node (stable argsort of the rows of the distance matrix),
+        computed on the first call and shared by the solvers.
+        """
+        if self._neighbors is None:
+            self._neighbors = np.argsort(self.distances, axis=1, kind='stable').astype(narrow_dtype([self.num_nodes]))
+        return self._neighbors
+
+    # Dictionary view
+
+    def __getitem__(self, key):
+        if key not in self.KEYS or (key == 'distances' and not self.has_distances):
+            raise KeyError(key)
+        value = getattr(self, key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        if key not in self.KEYS:
+            raise KeyError(f"{key} is not an instance field")
+        if key == 'distances':
+            self.set_distances(value)
+        elif key in ('demands', 'capacities'):
+            setattr(self, key, None if value is None else compact(value, unsigned=False))
+        else:
+            setattr(self, key, value)
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self[key] = None
+
+    def __contains__(self, key):
+        # without computing lazy distances
+        if key == 'distances':
+            return self.has_distances
+        return key in self.KEYS and getattr(self, key) is not None
+
+    def __iter__(self):
+        return (key for key in self.KEYS if key in self)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return (f"Instance(num_nodes={self.num_nodes}, num_centers={self.num_centers}, "
+                f"keys={list(self)}, distances={'lazy' if self._distance_loader is not None else self._distances.dtype if self._distances is not None else None})")
+
+
+def as_instance(instance_data):
+    """Instance of an instance_data dictionary (the instance itself if it is already one)."""
+    if isinstance(instance_data, Instance):
+        return instance_data
+    return Instance(**{key: instance_data[key] for key in instance_data if key in Instance.KEYS})
+
+
+def sorted_neighbors(instance_data):
+    """Sorted neighbors of each node (Instance.neighbors), computed from the distance matrix for dictionaries."""
+    if isinstance(instance_data, Instance):
+        return instance_data.neighbors()
+    return np.argsort(np.asarray(instance_data['distances']), axis=1, kind='stable')
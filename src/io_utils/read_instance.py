@@ -1,55 +1,222 @@
-def read_instance(file_path, capacitated=False, failure=False, alpha=0.0):
-    instance_data = {}
-    with open(file_path, 'r') as file:
-        # Only pmed instance are supported here, add other formats depending on the instance family
-        # first line : number of nodes, number of edges, number of centers
-        line = file.readline().strip()
-        num_nodes, num_edges, num_centers = map(int, line.split())
-        
-        instance_data['num_nodes'] = num_nodes
-        instance_data['num_edges'] = num_edges
-        instance_data['num_centers'] = num_centers
-
-        # edges reading : format (node1, node2, distance)
-        edges = []
-        for _ in range(num_edges):
-            line = file.readline().strip()
-            node1, node2, distance = map(int, line.split())
-            edges.append((node1-1, node2-1, distance))
-        
-        distances = [[float('inf')] * num_nodes for _ in range(num_nodes)]
-        for i in range(num_nodes):
-            distances[i][i] = 0
-        for node1, node2, distance in edges:
-            distances[node1][node2] = distance
-            distances[node2][node1] = distance
-
-        # Floyd-Warshall algorithm to compute all pairs shortest paths (to avoid inf distances)
-        for k in range(num_nodes):
-            for i in range(num_nodes):
-                for j in range(num_nodes):
-                    if distances[i][j] > distances[i][k] + distances[k][j]:
-                        distances[i][j] = distances[i][k] + distances[k][j]
-
-        instance_data['distances'] = distances
+import csv
+import gzip
+import json
+import lzma
+import os
+import re
 
-        if capacitated or failure:
-            # Read capacities
-            capacities = []
-            for _ in range(num_nodes):
-                line = file.readline().strip()
-                capacities.append(int(line))
-            instance_data['capacities'] = capacities
-
-            # Read demands
-            demands = []
-            for _ in range(num_nodes):
-                line = file.readline().strip()
-                demands.append(int(line))
-            instance_data['demands'] = demands
+import numpy as np
+from scipy.spatial import cKDTree
+
+from src.io_utils.shortest_paths import all_pairs_shortest_paths
+from src.io_utils import distance_cache
+from src.io_utils.generate_instance import BINARY_HEADER, BINARY_MAGIC, BINARY_VERSION
+from src.io_utils.trace import Trace
+from src.io_utils.instance import Instance
+
+# Size of the buffers parsed at once by parse_pmed (bytes) : their tokens are about 10 times larger
+PARSE_BLOCK = 1 << 20
+# Extensions of the instance files read by read_instance, the coordinate ones are only solved by the radius search
+COORDINATE_EXTENSIONS = ('.csv', '.json')
+INSTANCE_EXTENSIONS = ('.txt', '.gz', '.xz', '.bin') + COORDINATE_EXTENSIONS
+
+
+def open_instance(file_path):
+    """Binary file object of an instance file, decompressed on the fly for .gz and .xz files."""
+    if file_path.endswith('.gz'):
+        return gzip.open(file_path, 'rb')
+    if file_path.endswith('.xz'):
+        return lzma.open(file_path, 'rb')
+    return open(file_path, 'rb')
+
+
+def parse_numbers(file_path, buffer):
+    """Numbers of a buffer of whole lines (any whitespace), as a float64 array."""
+    try:
+        return np.array(buffer.split(), dtype=np.float64)
+    except ValueError as e:
+        raise ValueError(f"{file_path}: {e}")
+
+
+def parse_pmed(file_path, edges=True, capacities=False):
+    """
+    Bulk parser of pmed-format instances : the header line (nodes, edges, centers), then the numbers of the
+    edge lines (node1, node2, distance) and of the capacity and demand lines, parsed by buffers (split into
+    tokens, converted by NumPy at once) instead of line by line. The counts are checked against the header.
+    Args:
+        file_path (str): Instance file (.txt, .gz or .xz).
+        edges (bool): If not set, only the header is read (the distances come from the cache).
+        capacities (bool): If set, the num_nodes capacities then the num_nodes demands are required.
+    Returns:
+        dict: num_nodes, num_edges, num_centers, edges ((m, 3) array, 0-based nodes as in read_instance),
+            capacities and demands (int arrays), None for the parts not read.
+    Raises:
+        ValueError: If the header is malformed, a value is not a number or the file does not hold the announced
+            numbers of lines.
+    """
+    with open_instance(file_path) as file:
+        header = file.readline().split()
+        if len(header) != 3:
+            raise ValueError(f"Malformed header in {file_path}: expected 'nodes edges centers'")
+        num_nodes, num_edges, num_centers = map(int, header)
+        parsed = {'num_nodes': num_nodes, 'num_edges': num_edges, 'num_centers': num_centers,
+                  'edges': None, 'capacities': None, 'demands': None}
+        if not edges and not capacities:
+            return parsed
+
+        # Whole lines only in each buffer, the partial last line is carried to the next one
+        blocks, rest = [], b''
+        for buffer in iter(lambda: file.read(PARSE_BLOCK), b''):
+            buffer = rest + buffer
+            end = buffer.rfind(b'\n') + 1
+            buffer, rest = buffer[:end], buffer[end:]
+            blocks.append(parse_numbers(file_path, buffer))
+        blocks.append(parse_numbers(file_path, rest))
+    values = np.concatenate(blocks)
+
+    expected = 3 * num_edges + (2 * num_nodes if capacities else 0)
+    # a capacitated file read for the classical problem has 2 * num_nodes extra numbers
+    if len(values) != expected and (capacities or len(values) != expected + 2 * num_nodes):
+        raise ValueError(f"{file_path}: {len(values)} numbers after the header, expected {expected} "
+                         f"({num_edges} edges" + (f", {num_nodes} capacities and demands)" if capacities else ")"))
+
+    edge_values = values[:3 * num_edges].reshape(-1, 3)
+    nodes = edge_values[:, :2]
+    # 1-based node numbers, as the generated text instances : node i is row i - 1 of the distance matrix, as
+    # in the binary instances and the coordinate files
+    if num_edges and (nodes.min() < 1 or nodes.max() > num_nodes):
+        raise ValueError(f"{file_path}: node index out of range [1, {num_nodes}]")
+    if edges:
+        parsed['edges'] = edge_values.copy()
+        parsed['edges'][:, :2] -= 1
+    if capacities:
+        parsed['capacities'] = values[3 * num_edges:3 * num_edges + num_nodes].astype(np.int64)
+        parsed['demands'] = values[3 * num_edges + num_nodes:].astype(np.int64)
+    return parsed
+
+
+def read_clients(file_path, num_centers=None, trace=None):
+    """
+    Coordinate instance from the _clients.csv / _clients.json files of the generator (client_id, x, y).
+    The distance matrix is not computed : instance_data holds the (n, 2) coordinates and a KD-tree over them
+    (see src/solver/euclidean.py). The number of centers is read from the generator file name
+    (pc_<n>_<p>_...) if not given.
+    """
+    trace = trace if trace is not None else Trace()
+    if num_centers is None:
+        match = re.match(r'pc_\d+_(\d+)_', os.path.basename(file_path))
+        if match is None:
+            raise ValueError(f"Number of centers not given and not in the file name: {file_path}")
+        num_centers = int(match.group(1))
+
+    with trace.phase('parse'):
+        with open(file_path, 'r', newline='') as file:
+            if file_path.endswith('.json'):
+                rows = [(client['client_id'], client['x'], client['y']) for client in json.load(file)]
+            else:
+                reader = csv.reader(file)
+                next(reader)  # header : client_id, x, y
+                rows = [(int(i), float(x), float(y)) for i, x, y in reader]
+        table = np.array(rows, dtype=float).reshape(-1, 3)
+        coordinates = np.empty((len(table), 2))
+        coordinates[table[:, 0].astype(int)] = table[:, 1:]
+
+    with trace.phase('spatial_index'):
+        tree = cKDTree(coordinates)
 
+    num_nodes = len(coordinates)
+    # complete graph, as the generated _instance.txt files
+    return Instance(num_nodes, num_centers, num_edges=num_nodes * (num_nodes - 1) // 2, coordinates=coordinates, tree=tree)
+
+
+def read_binary_instance(file_path, capacitated=False, failure=False, alpha=0.0, num_centers=None, trace=None):
+    """
+    Binary instance of the generator (save_distance_matrix_bin) : the distance matrix is memory-mapped
+    (read-only, 0-based node indices) instead of being parsed and recomputed.
+    """
+    trace = trace if trace is not None else Trace()
+    with trace.phase('parse'):
+        header = np.fromfile(file_path, dtype=BINARY_HEADER, count=1)
+        if len(header) == 0 or header[0]['magic'] != BINARY_MAGIC or header[0]['version'] != BINARY_VERSION:
+            raise ValueError(f"Not a binary p-center instance (version {BINARY_VERSION}): {file_path}")
+        header = header[0]
+        num_nodes = int(header['num_nodes'])
+        dtype = np.dtype('<i4') if header['integer'] else np.dtype('<f4')
+        matrix_size = num_nodes * num_nodes * dtype.itemsize
+        expected = BINARY_HEADER.itemsize + matrix_size + (16 * num_nodes if header['capacitated'] else 0)
+        if os.path.getsize(file_path) != expected:
+            raise ValueError(f"Truncated binary instance: {os.path.getsize(file_path)} bytes instead of {expected}")
+
+        instance_data = Instance(
+            num_nodes, num_centers if num_centers is not None else int(header['num_centers']),
+            num_edges=int(header['num_edges']),
+            distances=np.memmap(file_path, dtype=dtype, mode='r', offset=BINARY_HEADER.itemsize, shape=(num_nodes, num_nodes)))
+        if capacitated or failure:
+            if not header['capacitated']:
+                raise ValueError(f"Binary instance without capacities: {file_path}")
+            values = np.fromfile(file_path, dtype='<i8', count=2 * num_nodes, offset=BINARY_HEADER.itemsize + matrix_size)
+            instance_data['capacities'] = values[:num_nodes]
+            instance_data['demands'] = values[num_nodes:]
         if failure:
-            # Read failure foresight alpha
             instance_data['alpha'] = alpha
-        
-    return instance_data
\ No newline at end of file
+    return instance_data
+
+
+def read_instance(file_path, capacitated=False, failure=False, alpha=0.0, use_cache=True, trace=None, num_centers=None,
+                  lazy=False):
+    """
+    Read an instance file : pmed text files (.txt, .gz, .xz), binary instances (.bin) and coordinate
+    instances (.csv, .json) of the generator.
+    Args:
+        lazy (bool): If set, the shortest paths of the text instances are only computed (and cached) on the
+            first access to the distances.
+    Returns:
+        Instance: The instance data (num_nodes, num_edges, num_centers, distances, capacities, demands, alpha).
+    """
+    trace = trace if trace is not None else Trace()
+
+    # Coordinate instances (generator _clients files), only for the classical problem
+    if file_path.endswith(COORDINATE_EXTENSIONS):
+        if capacitated or failure:
+            raise ValueError("Coordinate instances have no demands nor capacities")
+        return read_clients(file_path, num_centers=num_centers, trace=trace)
+    if file_path.endswith('.bin'):
+        return read_binary_instance(file_path, capacitated, failure, alpha, num_centers=num_centers, trace=trace)
+
+    # Distance matrix already computed for this file content : memory-map it instead of recomputing it
+    distances = None
+    if use_cache:
+        with trace.phase('cache'):
+            cache_key = distance_cache.instance_hash(file_path)
+            distances = distance_cache.load_distances(cache_key)
+
+    # Only pmed instance are supported here, add other formats depending on the instance family
+    # first line : number of nodes, number of edges, number of centers, then the edges (node1, node2, distance)
+    # and the capacities and demands of the capacitated instances (.gz and .xz files are decompressed on the fly)
+    with trace.phase('parse'):
+        parsed = parse_pmed(file_path, edges=distances is None, capacities=capacitated or failure)
+    num_nodes = parsed['num_nodes']
+
+    def shortest_paths():
+        # All pairs shortest paths (to avoid inf distances), Dijkstra or Floyd-Warshall depending on the density
+        with trace.phase('shortest_paths'):
+            matrix = all_pairs_shortest_paths(num_nodes, parsed['edges'])
+        if use_cache:
+            with trace.phase('cache'):
+                distance_cache.store_distances(cache_key, matrix)
+        return matrix
+
+    if distances is None:
+        distances = shortest_paths if lazy else shortest_paths()
+
+    instance_data = Instance(num_nodes, num_centers if num_centers is not None else parsed['num_centers'],
+                             num_edges=parsed['num_edges'], distances=distances)
+    if capacitated or failure:
+        instance_data['capacities'] = parsed['capacities']
+        instance_data['demands'] = parsed['demands']
+
+    if failure:
+        # Read failure foresight alpha
+        instance_data['alpha'] = alpha
+
+    return instance_data
@@ -0,0 +1,174 @@
+import numpy as np
+
+# Above this edge density (edges / possible edges) the vectorized Floyd-Warshall (one NumPy update of the whole matrix per k) is used,
+# below it a Dijkstra from every source over the sparse graph is faster
+DENSE_THRESHOLD = 0.25
+# Relative tolerance of the shortest path tests of the incremental updates (float distances)
+TOLERANCE = 1e-9
+
+
+def build_weight_matrix(num_nodes, edges):
+    """
+    Build the dense direct-distance matrix from an edge list.
+    Args:
+        num_nodes (int): Number of nodes.
+        edges (np.ndarray): Array of shape (m, 3) with (node1, node2, distance), 0-based.
+    Returns:
+        np.ndarray: (num_nodes, num_nodes) float matrix, inf where there is no edge.
+    """
+    weights = np.full((num_nodes, num_nodes), np.inf)
+    np.fill_diagonal(weights, 0)
+    if len(edges) == 0:
+        return weights
+
+    node1 = edges[:, 0].astype(np.int64)
+    node2 = edges[:, 1].astype(np.int64)
+    distance = edges[:, 2]
+
+    # Self loops never shorten a path, the diagonal stays at 0
+    keep = node1 != node2
+    node1, node2, distance = node1[keep], node2[keep], distance[keep]
+
+    # When an edge appears several times, the last occurrence in the file wins
+    key = np.minimum(node1, node2) * num_nodes + np.maximum(node1, node2)
+    _, last = np.unique(key[::-1], return_index=True)
+    last = len(key) - 1 - last
+
+    weights[node1[last], node2[last]] = distance[last]
+    weights[node2[last], node1[last]] = distance[last]
+    return weights
+
+
+def floyd_warshall(weights):
+    """
+    Floyd-Warshall where each k iteration updates the whole matrix at once with NumPy.
+    """
+    distances = np.array(weights, dtype=float, copy=True)
+    for k in range(distances.shape[0]):
+        np.minimum(distances, distances[:, k, None] + distances[None, k, :], out=distances)
+    return distances
+
+
+def dijkstra_all_pairs(weights, sources=None):
+    """
+    Dijkstra from every source (or from the given sources only) over the CSR representation of the graph.
+    Returns:
+        np.ndarray: (len(sources), num_nodes) distances, a row per source.
+    """
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import dijkstra
+
+    # csgraph treats zeros as missing edges, keep zero-length edges as explicit entries
+    finite = np.isfinite(weights)
+    np.fill_diagonal(finite, False)
+    rows, cols = np.nonzero(finite)
+    graph = csr_matrix((weights[rows, cols], (rows, cols)), shape=weights.shape)
+    return dijkstra(graph, directed=True, indices=sources)
+
+
+def shorter_edge(distances, node1, node2, distance):
+    """
+    Repair a float distance matrix in place after an edge got shorter (or was added) : a pair can only get
+    closer through the new edge, in one direction or the other (two n x n minimums, no shortest path computation).
+    """
+    through = distances[:, node1, None] + distance + distances[None, node2, :]
+    through = np.minimum(through, through.T)
+    np.minimum(distances, through, out=distances)
+
+
+def edge_sources(distances, node1, node2, distance):
+    """
+    Sources having a shortest path that goes through the edge (node1, node2) of the given length : the only rows
+    of the distance matrix that can change when this edge gets longer or is removed.
+    """
+    # the prefix of a shortest path is a shortest path, tolerance for the float sums
+    to_node2 = distances[:, node1] + distance <= distances[:, node2] * (1 + TOLERANCE) + TOLERANCE
+    to_node1 = distances[:, node2] + distance <= distances[:, node1] * (1 + TOLERANCE) + TOLERANCE
+    return np.flatnonzero(to_node2 | to_node1)
+
+
+def node_sources(distances, node):
+    """
+    Sources having a shortest path that goes through the node (to another node) : the only rows of the distance
+    matrix that can change when this node is removed.
+    """
+    through = distances[:, node, None] + distances[None, node, :] <= distances * (1 + TOLERANCE) + TOLERANCE
+    np.fill_diagonal(through, False)
+    through[node, :] = False
+    through[:, node] = False
+    return np.flatnonzero(through.any(axis=1))
+
+
+def repair_rows(weights, distances, sources):
+    """
+    Recompute the rows (and by symmetry the columns) of the given sources in a float distance matrix, with a
+    Dijkstra from these sources only.
+    Raises:
+        ValueError: If a source cannot reach every node anymore (disconnected graph), distances is unchanged.
+    """
+    if len(sources) == 0:
+        return
+    rows = dijkstra_all_pairs(weights, sources)
+    if not np.isfinite(rows).all():
+        raise ValueError("the graph is not connected anymore")
+    distances[sources, :] = rows
+    distances[:, sources] = rows.T
+
+
+def narrow_dtype(values, unsigned=True):
+    """
+    Narrowest dtype that represents the values exactly : uint16 (if unsigned), int32 or int64 for integers,
+    float32 when the values survive the conversion, float64 otherwise (inf is kept by both float types).
+    """
+    values = np.asarray(values)
+    if values.size == 0:
+        return np.dtype(np.int32)
+    if np.issubdtype(values.dtype, np.integer) or (np.isfinite(values).all() and np.array_equal(values, np.rint(values))):
+        low, high = values.min(), values.max()
+        if unsigned and low >= 0 and high <= np.iinfo(np.uint16).max:
+            return np.dtype(np.uint16)
+        if low >= np.iinfo(np.int32).min and high <= np.iinfo(np.int32).max:
+            return np.dtype(np.int32)
+        return np.dtype(np.int64)
+    if np.array_equal(values.astype(np.float32), values, equal_nan=True):
+        return np.dtype(np.float32)
+    return np.dtype(np.float64)
+
+
+def compact(distances, unsigned=True):
+    """
+    Return the distance matrix with the narrowest dtype that represents it exactly (see narrow_dtype) :
+    uint16 for the pmed instances, 2 bytes per pair instead of 8.
+    """
+    distances = np.asarray(distances)
+    dtype = narrow_dtype(distances, unsigned)
+    return distances if distances.dtype == dtype else distances.astype(dtype)
+
+
+def all_pairs_shortest_paths(num_nodes, edges, method='auto'):
+    """
+    Compute all pairs shortest path distances of an undirected graph.
+    Args:
+        num_nodes (int): Number of nodes.
+        edges (array-like): (node1, node2, distance) triplets, 0-based.
+        method (str): 'dijkstra', 'floyd_warshall' or 'auto' to pick from the edge density.
+    Returns:
+        np.ndarray: (num_nodes, num_nodes) distance matrix (see compact for the dtype).
+    Raises:
+        ValueError: If the method is not recognized.
+    """
+    edges = np.asarray(edges).reshape(-1, 3)
+    weights = build_weight_matrix(num_nodes, edges)
+
+    if method == 'auto':
+        possible_edges = max(1, num_nodes * (num_nodes - 1) // 2)
+        method = 'floyd_warshall' if len(edges) / possible_edges > DENSE_THRESHOLD else 'dijkstra'
+
+    if method == 'dijkstra':
+        distances = dijkstra_all_pairs(weights)
+    elif method == 'floyd_warshall':
+        distances = floyd_warshall(weights)
+    else:
+        raise ValueError(f"Unknown shortest path method: {method}")
+
+    return compact(distances)
@@ -0,0 +1,59 @@
+import json
+
+import numpy as np
+
+# Entries of a solution stored as arrays, the other entries (objective value, status, gap, times...) are metadata
+ARRAY_KEYS = ('centers', 'assignments', 'primary_assignments', 'backup_assignments')
+
+
+def save_solution(solution, file_path):
+    """
+    Save a solution to a .npz file (assignments stored as int32 arrays, the other entries as JSON metadata)
+    or, if the path ends with .json, to a JSON file.
+    """
+    arrays = {key: np.asarray(solution[key], dtype=np.int32) for key in ARRAY_KEYS if key in solution}
+    metadata = {key: value for key, value in solution.items() if key not in ARRAY_KEYS}
+
+    if file_path.endswith('.json'):
+        with open(file_path, 'w') as f:
+            json.dump(dict(metadata, **{key: array.tolist() for key, array in arrays.items()}), f, default=_to_builtin)
+    else:
+        with open(file_path, 'wb') as f:
+            np.savez_compressed(f, metadata=np.array(json.dumps(metadata, default=_to_builtin)), **arrays)
+
+
+def load_solution(file_path):
+    """
+    Load a solution saved by save_solution.
+    Returns:
+        dict: The solution, the assignments are int32 arrays and the centers a list.
+    """
+    if file_path.endswith('.json'):
+        with open(file_path) as f:
+            solution = json.load(f)
+        arrays = {key: np.asarray(solution[key], dtype=np.int32) for key in ARRAY_KEYS if key in solution}
+    else:
+        with np.load(file_path) as data:
+            solution = json.loads(data['metadata'].item())
+            arrays = {key: data[key] for key in ARRAY_KEYS if key in data}
+
+    solution.update(arrays)
+    if 'centers' in solution:
+        solution['centers'] = solution['centers'].tolist()
+    return solution
+
+
+def solution_to_json(solution):
+    """
+    JSON-compatible copy of a solution (lists instead of arrays, Python numbers instead of NumPy scalars).
+    """
+    return json.loads(json.dumps(solution, default=_to_builtin))
+
+
+def _to_builtin(value):
+    # NumPy scalars and arrays in the metadata (e.g. objective value of a NumPy distance matrix)
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
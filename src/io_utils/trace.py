@@ -0,0 +1,112 @@
+import json
+import time
+from contextlib import contextmanager
+
+from gurobipy import GRB
+
+
+class Trace:
+    """
+    Timings of the phases of a run (reading, shortest paths, preprocessing, build, optimization, extraction),
+    results of the preprocessing, size of the models and samples of the optimization progress (incumbent, bound, gap).
+    The phases are always timed (two clock reads per phase) and the preprocessing results always kept,
+    the progress is only sampled when enabled.
+    """
+
+    def __init__(self, enabled=False, interval=1.0):
+        self.enabled = enabled
+        self.interval = interval  # seconds between two progress samples
+        self.origin = time.perf_counter()
+        self.phases = []   # {'name', 'start', 'duration'} in seconds since origin
+        self.models = []   # {'name', 'num_vars', 'num_constrs', 'num_nzs'}
+        self.preprocessing = []  # {'lower_bound', 'upper_bound', 'removed_variables', 'removed_constraints'}
+        self.samples = []  # {'time', 'incumbent', 'bound', 'gap'}
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append({'name': name, 'start': start - self.origin, 'duration': time.perf_counter() - start})
+
+    @staticmethod
+    def total_times(phases):
+        """Total time (seconds) of each phase name of a list of phases."""
+        times = {}
+        for phase in phases:
+            times[phase['name']] = times.get(phase['name'], 0.0) + phase['duration']
+        return times
+
+    def record_model(self, model, name=None):
+        """Size of a Gurobi model (the pending modifications must have been processed)."""
+        if not self.enabled:
+            return
+        self.models.append({
+            'name': name or model.ModelName,
+            'num_vars': model.NumVars,
+            'num_constrs': model.NumConstrs,
+            'num_nzs': model.NumNZs,
+        })
+
+    def record_preprocessing(self, **values):
+        """
+        Results of the preprocessing of a solve (bounds of the optimal radius, then the variables and
+        constraints removed from the model).
+        Returns:
+            dict: The record, completed by update once the model is built.
+        """
+        record = {key: value.item() if hasattr(value, 'item') else value for key, value in values.items()}
+        self.preprocessing.append(record)
+        return record
+
+    def sampler(self):
+        """
+        Gurobi callback sampling the incumbent, the bound and the gap every interval seconds
+        (and at each new incumbent). None when the trace is disabled.
+        """
+        if not self.enabled:
+            return None
+        next_sample = [0.0]
+        offset = time.perf_counter() - self.origin
+
+        def callback(model, where):
+            if where == GRB.Callback.MIP:
+                runtime = model.cbGet(GRB.Callback.RUNTIME)
+                if runtime < next_sample[0]:
+                    return
+                incumbent, bound = model.cbGet(GRB.Callback.MIP_OBJBST), model.cbGet(GRB.Callback.MIP_OBJBND)
+            elif where == GRB.Callback.MIPSOL:
+                runtime = model.cbGet(GRB.Callback.RUNTIME)
+                incumbent, bound = model.cbGet(GRB.Callback.MIPSOL_OBJBST), model.cbGet(GRB.Callback.MIPSOL_OBJBND)
+                # MIPSOL_OBJBST is the incumbent before this solution
+                incumbent = min(incumbent, model.cbGet(GRB.Callback.MIPSOL_OBJ))
+            else:
+                return
+            next_sample[0] = runtime + self.interval
+            incumbent = incumbent if abs(incumbent) < GRB.INFINITY else None
+            bound = bound if abs(bound) < GRB.INFINITY else None
+            # Gurobi relative gap, unknown without incumbent or bound
+            gap = abs(incumbent - bound) / abs(incumbent) if incumbent and bound is not None else None
+            self.samples.append({'time': offset + runtime, 'incumbent': incumbent, 'bound': bound, 'gap': gap})
+
+        return callback
+
+    def to_dict(self):
+        return {'phases': self.phases, 'preprocessing': self.preprocessing, 'models': self.models, 'samples': self.samples}
+
+    def write_json(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=4)
+
+    def write_chrome_trace(self, path):
+        """Chrome trace event format (chrome://tracing, Perfetto) : one slice per phase, counters for the progress."""
+        events = [{'name': phase['name'], 'ph': 'X', 'pid': 0, 'tid': 0,
+                   'ts': phase['start'] * 1e6, 'dur': phase['duration'] * 1e6} for phase in self.phases]
+        for sample in self.samples:
+            values = {key: sample[key] for key in ('incumbent', 'bound') if sample[key] is not None}
+            events.append({'name': 'objective', 'ph': 'C', 'pid': 0, 'ts': sample['time'] * 1e6, 'args': values})
+            if sample['gap'] is not None:
+                events.append({'name': 'gap', 'ph': 'C', 'pid': 0, 'ts': sample['time'] * 1e6, 'args': {'gap': sample['gap']}})
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
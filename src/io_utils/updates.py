@@ -0,0 +1,169 @@
+# p-center-problem/src/io_utils/updates.py
+#
+# Incremental updates of a pmed instance : edge length changes, added and removed edges, added and deactivated
+# nodes. The all pairs distance matrix is repaired from the rows affected by the change instead of being
+# recomputed, see src/solver/resolve.py for the re-solve warm-started from the previous centers.
+
+import numpy as np
+
+from src.io_utils.instance import as_instance
+from src.io_utils.read_instance import read_instance, parse_pmed
+from src.io_utils.shortest_paths import (build_weight_matrix, compact, shorter_edge, edge_sources, node_sources,
+                                         repair_rows)
+
+
+class InstanceGraph:
+    """
+    Instance kept with its graph (dense matrix of the edge lengths, inf without edge) and a float copy of its
+    distance matrix, repaired after each update :
+    - shorter or added edge : minimum with the paths through the edge, O(n^2) without shortest path computation,
+    - longer or removed edge, deactivated node : Dijkstra from the sources that had a shortest path through it,
+    - added node : distances through its neighbors, then minimum with the paths through the node, O(n^2).
+    The nodes are named by ids : their 0-based number in the file, then num_nodes, num_nodes + 1, ... for the
+    added nodes. A deactivated node is removed from the instance (neither client nor center, and no path goes
+    through it) and the rows of the following nodes move up : node_ids[i] is the id of the node of row i, the
+    centers and assignments of the solutions are rows.
+    An update that would disconnect the graph raises ValueError and leaves the instance unchanged.
+    """
+
+    def __init__(self, instance, weights):
+        """
+        Args:
+            instance (Instance): The instance (or instance_data dictionary), its distances are the shortest paths
+                of the graph.
+            weights (np.ndarray): (n, n) edge lengths (see build_weight_matrix).
+        """
+        self.instance = instance = as_instance(instance)
+        self.weights = np.array(weights, dtype=float)
+        self.distances = np.array(instance['distances'], dtype=float)
+        self.node_ids = np.arange(instance['num_nodes'])
+        self.next_id = instance['num_nodes']
+
+    @classmethod
+    def from_file(cls, file_path, capacitated=False, failure=False, alpha=0.0, use_cache=True, num_centers=None):
+        """
+        Graph of a pmed text instance, its distances come from read_instance (and the distance cache).
+        Raises:
+            ValueError: For the coordinate and binary instances, which have no edge list.
+        """
+        if file_path.endswith(('.csv', '.json', '.bin')):
+            raise ValueError("Incremental updates need a pmed text instance (edge list)")
+        instance = read_instance(file_path, capacitated=capacitated, failure=failure, alpha=alpha,
+                                 use_cache=use_cache, num_centers=num_centers)
+        parsed = parse_pmed(file_path)
+        return cls(instance, build_weight_matrix(parsed['num_nodes'], parsed['edges']))
+
+    def index(self, node):
+        """Row of an active node id."""
+        index = int(np.searchsorted(self.node_ids, node))
+        if index == len(self.node_ids) or self.node_ids[index] != node:
+            raise ValueError(f"Unknown or deactivated node: {node}")
+        return index
+
+    def update_instance(self):
+        # New distance matrix of the instance (narrow dtype), its sorted neighbors are computed again when needed
+        matrix = compact(self.distances)
+        self.instance.set_distances(matrix.copy() if matrix is self.distances else matrix)
+
+    def set_edge(self, node1, node2, distance):
+        """Change the length of the edge (node1, node2), the edge is added if missing."""
+        i, j = self.index(node1), self.index(node2)
+        if i == j:
+            raise ValueError("An edge needs two different nodes")
+        if not 0 <= distance < np.inf:
+            raise ValueError("Edge lengths must be finite and non-negative")
+        added = np.isinf(self.weights[i, j])
+        self.change_edge(i, j, distance)
+        if added:
+            self.instance['num_edges'] += 1
+
+    def remove_edge(self, node1, node2):
+        """Remove the edge (node1, node2)."""
+        i, j = self.index(node1), self.index(node2)
+        if i == j or np.isinf(self.weights[i, j]):
+            raise ValueError(f"No edge between {node1} and {node2}")
+        self.change_edge(i, j, np.inf)
+        self.instance['num_edges'] -= 1
+
+    def change_edge(self, i, j, distance):
+        # Edge length between the rows i and j (inf to remove it) and repair of the distance matrix
+        previous = self.weights[i, j]
+        if distance == previous:
+            return
+        # rows that may get longer, found with the previous length
+        sources = edge_sources(self.distances, i, j, previous) if distance > previous else None
+        self.weights[i, j] = self.weights[j, i] = distance
+        if sources is None:
+            shorter_edge(self.distances, i, j, distance)
+        else:
+            try:
+                repair_rows(self.weights, self.distances, sources)
+            except ValueError:
+                self.weights[i, j] = self.weights[j, i] = previous
+                raise
+        self.update_instance()
+
+    def add_node(self, edges, demand=None, capacity=None):
+        """
+        Add a node linked to active nodes, its row is the last one.
+        Args:
+            edges (dict): Length of the edge to each neighbor, by node id.
+            demand, capacity (int): Demand and capacity of the node, needed by the capacitated instances.
+        Returns:
+            int: Id of the added node.
+        """
+        if not edges:
+            raise ValueError("An added node needs at least one edge")
+        neighbors = np.array([self.index(node) for node in edges])
+        lengths = np.array(list(edges.values()), dtype=float)
+        if not ((lengths >= 0) & np.isfinite(lengths)).all():
+            raise ValueError("Edge lengths must be finite and non-negative")
+        capacitated = 'capacities' in self.instance
+        if capacitated and (demand is None or capacity is None):
+            raise ValueError("The nodes of a capacitated instance need a demand and a capacity")
+
+        # distances of the new node through its neighbors, then paths of the other pairs through the new node
+        num_nodes = len(self.node_ids)
+        row = (lengths[:, None] + self.distances[neighbors]).min(axis=0)
+        distances = np.zeros((num_nodes + 1, num_nodes + 1))
+        distances[:num_nodes, :num_nodes] = np.minimum(self.distances, row[:, None] + row[None, :])
+        distances[num_nodes, :num_nodes] = distances[:num_nodes, num_nodes] = row
+        weights = np.full((num_nodes + 1, num_nodes + 1), np.inf)
+        weights[:num_nodes, :num_nodes] = self.weights
+        weights[num_nodes, num_nodes] = 0
+        weights[num_nodes, neighbors] = weights[neighbors, num_nodes] = lengths
+        self.distances, self.weights = distances, weights
+
+        node = self.next_id
+        self.node_ids = np.append(self.node_ids, node)
+        self.next_id += 1
+        self.instance['num_nodes'] = num_nodes + 1
+        self.instance['num_edges'] += len(neighbors)
+        if capacitated:
+            self.instance['demands'] = np.append(self.instance['demands'], demand)
+            self.instance['capacities'] = np.append(self.instance['capacities'], capacity)
+        self.update_instance()
+        return node
+
+    def deactivate_node(self, node):
+        """Remove a node and its edges from the instance."""
+        i = self.index(node)
+        if len(self.node_ids) - 1 < self.instance['num_centers']:
+            raise ValueError("The instance would have fewer nodes than centers")
+
+        # rows with a shortest path through the node, numbered without it
+        sources = node_sources(self.distances, i)
+        sources = sources - (sources > i)
+        weights = np.delete(np.delete(self.weights, i, axis=0), i, axis=1)
+        distances = np.delete(np.delete(self.distances, i, axis=0), i, axis=1)
+        repair_rows(weights, distances, sources)
+        degree = np.isfinite(self.weights[i]).sum() - 1
+        self.distances, self.weights = distances, weights
+
+        self.node_ids = np.delete(self.node_ids, i)
+        self.instance['num_nodes'] = len(self.node_ids)
+        self.instance['num_edges'] -= int(degree)
+        if 'capacities' in self.instance:
+            self.instance['demands'] = np.delete(self.instance['demands'], i)
+            self.instance['capacities'] = np.delete(self.instance['capacities'], i)
+        self.update_instance()
@@ -4,20 +4,54 @@ import argparse
 
 from src.io_utils.read_instance import read_instance
 from src.io_utils.display_instance import display_instance
-from src.io_utils.display_solution import display_solution
+from src.io_utils.display_solution import display_preprocessing, display_solution, display_sweep
+from src.io_utils.distance_cache import clear_cache
+from src.io_utils.trace import Trace
+from src.io_utils.solution_file import save_solution, load_solution
 from src.solver.solve import solve
+from src.solver.sweep import sweep
+from src.solver.portfolio import portfolio
+from src.solver.heuristic import heuristic
+from src.solver.capacitated_heuristic import capacitated_heuristic
+from src.solver.euclidean import euclidean_heuristic
+from src.solver.evaluate import evaluate
 import sys
 
 def main():
 
     # If there is an argument, use it as the instance file path
     parser = argparse.ArgumentParser(description='p-center problem and its variants solver')
-    parser.add_argument('--file', nargs='?', default=None, help='Path to the instance file. If not provided, it will prompt for input.')
+    parser.add_argument('--file', nargs='?', default=None, help='Path to the instance file (or _clients.csv / _clients.json coordinate file). If not provided, it will prompt for input.')
+    parser.add_argument('--num-centers', type=int, default=None, help='Number of centers p, overrides the value of the instance file.')
     
     # if it is the capacitated version, add the argument
     parser.add_argument('--capacitated', action='store_true', help='If set, the solver will handle capacitated p-center problem instances.')
     parser.add_argument('--failure', nargs='?', default=None, help='If set, the solver will handle p-center problem instances with failure foresight.')
+    parser.add_argument('--model', choices=['classical', 'compact', 'radius'], default='classical', help='Formulation used for the classical p-center problem (ignored with --capacitated or --failure).')
+    parser.add_argument('--heuristic', action='store_true', help='If set, the problem is solved with the heuristic only (no Gurobi), the capacitated heuristic for the capacitated variants.')
+    parser.add_argument('--no-warm-start', action='store_true', help='If set, the heuristic solution is not given to Gurobi as MIP start.')
+    parser.add_argument('--lazy', action='store_true', help='If set, the distance constraints of the classical, capacitated and failure models are added only when violated (lazy constraint callback).')
+    parser.add_argument('--no-reduction', action='store_true', help='If set, the models are built over all the client-center pairs (no bound-driven elimination).')
+
+    # distance matrix cache
+    parser.add_argument('--no-cache', action='store_true', help='If set, the distance matrix is recomputed and not stored in the cache.')
+    parser.add_argument('--clear-cache', action='store_true', help='If set, the distance matrix cache is emptied before reading the instance.')
+    parser.add_argument('--evaluate', default=None, help='If set, the solution of this file (see --save-solution) is evaluated on the instance instead of solving it.')
+    parser.add_argument('--sweep-p', nargs='+', type=int, default=None, help='If set, the instance is solved for each of these p values with a single model (trade-off curve).')
+    parser.add_argument('--sweep-alpha', nargs='+', type=float, default=None, help='If set (with --failure), the instance is solved for each of these alpha values with a single model.')
+    parser.add_argument('--portfolio', action='store_true', help='If set, several strategies (formulations, Gurobi settings, heuristic) race in parallel processes sharing their solutions, the first to prove optimality wins.')
+    parser.add_argument('--workers', type=int, default=None, help='Number of strategies run by --portfolio (default: number of cores).')
+    parser.add_argument('--save-solution', default=None, help='If set, the solution is saved to this file (.npz, or .json if the path ends with .json).')
+
+    # instrumentation
+    parser.add_argument('--trace', nargs='?', const='trace.json', default=None, help='If set, the phase timings, model size and solver progress are written to this JSON file (default: trace.json).')
+    parser.add_argument('--chrome-trace', default=None, help='If set, the trace is also written to this file in the Chrome trace format (chrome://tracing, Perfetto).')
+    parser.add_argument('--trace-interval', type=float, default=1.0, help='Seconds between two samples of the solver progress (incumbent, bound, gap).')
     args = parser.parse_args()
+
+    if args.clear_cache:
+        removed = clear_cache()
+        print(f"Distance cache cleared ({removed} files removed).")
     
     if args.file:
         file_path = args.file
@@ -35,7 +69,7 @@ def main():
     # Instance reading
     is_capacitated = False
     is_failure = False
-    model_class = "classical"
+    model_class = args.model
     if args.failure:
         # If the instance is with failure foresight, read the failure foresight instance
         is_failure = True
@@ -45,17 +79,73 @@ def main():
         is_capacitated = True
         model_class = "capacitated"
     
-        
-    instance_data = read_instance(file_path, capacitated=is_capacitated, failure=is_failure, alpha=alpha)
+
+    if args.sweep_p and args.sweep_alpha:
+        print("Error: --sweep-p and --sweep-alpha cannot be used together.")
+        sys.exit(1)
+    if (args.sweep_p or args.sweep_alpha) and model_class == 'radius':
+        print("Error: sweeps need one of the classical, compact, capacitated or failure models.")
+        sys.exit(1)
+    if args.portfolio and (args.sweep_p or args.sweep_alpha or args.heuristic or args.evaluate):
+        print("Error: --portfolio cannot be used with --sweep-p, --sweep-alpha, --heuristic or --evaluate.")
+        sys.exit(1)
+    if args.sweep_alpha and (not is_failure or any(a < 0 or a > 1 for a in args.sweep_alpha)):
+        print("Error: --sweep-alpha needs --failure and alpha values between 0 and 1.")
+        sys.exit(1)
+
+    trace = Trace(enabled=args.trace is not None or args.chrome_trace is not None, interval=args.trace_interval)
+    instance_data = read_instance(file_path, capacitated=is_capacitated, failure=is_failure, alpha=alpha, use_cache=not args.no_cache, trace=trace, num_centers=args.num_centers)
 
     # Problem solving
-    solution = solve(instance_data, model_class=model_class)
+    if args.sweep_p or args.sweep_alpha:
+        solutions = sweep(instance_data, model_class, num_centers=args.sweep_p, alphas=args.sweep_alpha,
+                          warm_start=not args.no_warm_start, reduce=not args.no_reduction, trace=trace)
+        display_sweep(solutions)
+        # the solution of the last point is displayed and saved
+        solution = solutions[-1]
+    elif args.evaluate:
+        loaded = load_solution(args.evaluate)
+        with trace.phase('evaluation'):
+            solution = evaluate(instance_data, loaded['centers'], model_class,
+                                assignments=loaded.get('assignments', loaded.get('primary_assignments')),
+                                backup_assignments=loaded.get('backup_assignments'))
+    elif args.portfolio:
+        # the strategies cover the formulations of the problem, --model is ignored
+        problem = model_class if model_class in ('capacitated', 'failure') else 'classical'
+        with trace.phase('portfolio'):
+            solution = portfolio(instance_data, problem, workers=args.workers,
+                                 options={'warm_start': not args.no_warm_start, 'reduce': not args.no_reduction, 'lazy': args.lazy})
+    elif args.heuristic:
+        with trace.phase('heuristic'):
+            if 'coordinates' in instance_data:
+                solution = euclidean_heuristic(instance_data)
+            elif model_class in ('capacitated', 'failure'):
+                solution = capacitated_heuristic(instance_data, failure=model_class == 'failure')
+            else:
+                solution = heuristic(instance_data)
+    else:
+        solution = solve(instance_data, model_class=model_class, warm_start=not args.no_warm_start, reduce=not args.no_reduction, lazy=args.lazy, trace=trace)
 
     # Instance informations display
     # display_instance(instance_data)
     
     # Solution display
+    display_preprocessing(trace.preprocessing)
     display_solution(solution)
+
+    if args.save_solution:
+        save_solution(solution, args.save_solution)
+        print(f"Solution saved to {args.save_solution}")
+
+    # Instrumentation output
+    if trace.enabled:
+        print("Phases: " + ", ".join(f"{name} {duration:.3f}s" for name, duration in Trace.total_times(trace.phases).items()))
+    if args.trace:
+        trace.write_json(args.trace)
+        print(f"Trace written to {args.trace}")
+    if args.chrome_trace:
+        trace.write_chrome_trace(args.chrome_trace)
+        print(f"Chrome trace written to {args.chrome_trace}")
     
 if __name__ == "__main__":
     main()
\ No newline at end of file
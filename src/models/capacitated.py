@@ -1,8 +1,15 @@
 from gurobipy import Model, GRB
+import numpy as np
+import scipy.sparse as sp
+from .reduction import candidate_pairs, distance_rows, incidence, record_reduction
 
-def capacitated_model(instance_data):
+def capacitated_model(instance_data, lower_bound=None, upper_bound=None, lazy=False):
     """
     Gurobi model for the capacitated p-center problem.
+    Built with the matrix API : x is a vector over the candidate client-center pairs (model._pairs['x']).
+    The bounds of the optimal radius (if given) remove the pairs farther than upper_bound
+    and the maximum distance rows of the pairs closer than lower_bound.
+    With lazy set, the maximum distance rows are left to a lazy constraint callback.
     """
 
     model = Model("capacitated-p-center")
@@ -11,36 +18,46 @@ def capacitated_model(instance_data):
     model.setParam('Threads', 1)
 
     # Extract data
-    distances = instance_data['distances']
+    distances = np.asarray(instance_data['distances'])
     num_nodes = instance_data['num_nodes']
     num_edges = instance_data['num_edges']
     num_centers = instance_data['num_centers']
-    demands = instance_data['demands']
-    capacities = instance_data['capacities']
+    demands = np.asarray(instance_data['demands'])
+    capacities = np.asarray(instance_data['capacities'])
+
+    # Bound-driven reduction of the assignment pairs and of the maximum distance rows
+    clients, centers = candidate_pairs(distances, upper_bound)
+    pair_distances = distances[clients, centers]
+    rows = distance_rows(pair_distances, lower_bound)
+    num_pairs = len(clients)
+    model._pairs = {'x': (clients, centers)}
+    record_reduction(model, num_nodes**2 - num_pairs, 2 * num_nodes**2 - num_pairs - len(rows))
 
     # Decision variables
-    x = model.addVars(num_nodes, num_nodes, vtype=GRB.BINARY, name="x")  # Client-to-center assignment
-    y = model.addVars(num_nodes, vtype=GRB.BINARY, name="y")             # Center opened
-    max_distance = model.addVar(vtype=GRB.CONTINUOUS, name="max_distance")
+    x = model.addMVar(num_pairs, vtype=GRB.BINARY, name="x")             # Client-to-center assignment
+    y = model.addMVar(num_nodes, vtype=GRB.BINARY, name="y")             # Center opened
+    max_distance = model.addMVar(1, lb=lower_bound or 0, vtype=GRB.CONTINUOUS, name="max_distance")
 
     # Objective: minimize max distance
-    model.setObjective(max_distance, GRB.MINIMIZE)
+    model.setObjective(max_distance.sum(), GRB.MINIMIZE)
+    model._max_distance = max_distance
 
     # Constraints
 
-    # Exactly p centers are opened
-    model.addConstr(y.sum() == num_centers, "num_centers")
+    # Exactly p centers are opened (kept on the model, the parametric sweep changes its right-hand side)
+    model._num_centers = model.addConstr(y.sum() == num_centers, "num_centers")
 
     # Each client is assigned to exactly one center
-    model.addConstrs((x.sum(i, '*') == 1 for i in range(num_nodes)),name="client_assignment")
+    model.addConstr(incidence(clients, num_nodes) @ x == 1, name="client_assignment")
 
     # Clients can only be assigned to opened centers
-    model.addConstrs((x[i, j] <= y[j] for i in range(num_nodes) for j in range(num_nodes)),name="assign_if_open")
+    model.addConstr(x - incidence(centers, num_nodes).T @ y <= 0, name="assign_if_open")
 
     # Respect capacity constraints
-    model.addConstrs((sum(x[i, j] * demands[i] for i in range(num_nodes)) <= capacities[j] for j in range(num_nodes)),name="capacity_limit")
+    model.addConstr(incidence(centers, num_nodes, demands[clients]) @ x <= capacities, name="capacity_limit")
 
     # Maximum distance constraint
-    model.addConstrs((x[i, j] * distances[i][j] <= max_distance for i in range(num_nodes) for j in range(num_nodes)),name="distance_limit")
+    if not lazy:  # otherwise added only when violated by the lazy constraint callback
+        model.addConstr(incidence(rows, num_pairs, pair_distances[rows]).T @ x - sp.csr_matrix(np.ones((len(rows), 1))) @ max_distance <= 0, name="distance_limit")
 
     return model, x, y
@@ -1,8 +1,16 @@
 from gurobipy import Model, GRB
+import numpy as np
+import scipy.sparse as sp
+from .reduction import candidate_pairs, distance_rows, incidence, record_reduction
 
-def classical_model(instance_data):
+def classical_model(instance_data, lower_bound=None, upper_bound=None, lazy=False):
     """
     This function is a placeholder for the classical p-center problem model.
+    The model is built with the matrix API : x is a vector over the candidate client-center pairs
+    (model._pairs['x'] gives their clients and centers).
+    With bounds of the optimal radius, the pairs farther than upper_bound get no assignment variable
+    and the maximum distance rows of the pairs closer than lower_bound are removed.
+    With lazy set, the maximum distance rows are left to a lazy constraint callback.
     """
 
     # Create a new model
@@ -12,31 +20,41 @@ def classical_model(instance_data):
     model.setParam('Threads', 1)
 
     # Extract data from instance_data
-    distances = instance_data['distances']
+    distances = np.asarray(instance_data['distances'])
     num_nodes = instance_data['num_nodes']
     num_edges = instance_data['num_edges']
     num_centers = instance_data['num_centers']
 
+    # Bound-driven reduction of the assignment pairs and of the maximum distance rows
+    clients, centers = candidate_pairs(distances, upper_bound)
+    pair_distances = distances[clients, centers]
+    rows = distance_rows(pair_distances, lower_bound)
+    num_pairs = len(clients)
+    model._pairs = {'x': (clients, centers)}
+    record_reduction(model, num_nodes**2 - num_pairs, 2 * num_nodes**2 - num_pairs - len(rows))
+
     # Create decision variables
-    x = model.addVars(num_nodes,num_nodes, vtype=GRB.BINARY, name="x")  # Assignment of clients to centers
-    y = model.addVars(num_nodes, vtype=GRB.BINARY, name="y")  # Location of centers
+    x = model.addMVar(num_pairs, vtype=GRB.BINARY, name="x")  # Assignment of clients to centers
+    y = model.addMVar(num_nodes, vtype=GRB.BINARY, name="y")  # Location of centers
 
     # Objective: Minimize the maximum distance from any location to its assigned center
-    max_distance = model.addVar(vtype=GRB.CONTINUOUS, name="max_distance")
-    model.setObjective(max_distance, GRB.MINIMIZE)
+    max_distance = model.addMVar(1, lb=lower_bound or 0, vtype=GRB.CONTINUOUS, name="max_distance")
+    model.setObjective(max_distance.sum(), GRB.MINIMIZE)
+    model._max_distance = max_distance
 
     # Constraints
 
-    # There is exactly p centers
-    model.addConstr(y.sum() == num_centers, "num_centers")
+    # There is exactly p centers (kept on the model, the parametric sweep changes its right-hand side)
+    model._num_centers = model.addConstr(y.sum() == num_centers, "num_centers")
 
     # Each client must be assigned to exactly one center
-    model.addConstrs((x.sum(i, '*') == 1 for i in range(num_nodes)), "client_assignment")
+    model.addConstr(incidence(clients, num_nodes) @ x == 1, "client_assignment")
 
     # Each client must be assigned to an open center
-    model.addConstrs((x[i, j] <= y[j] for i in range(num_nodes) for j in range(num_nodes)), "assignment")
+    model.addConstr(x - incidence(centers, num_nodes).T @ y <= 0, "assignment")
 
     # The maximum distance from any client to its assigned center must be less than or equal to max_distance
-    model.addConstrs((x[i, j] * distances[i][j] <= max_distance for i in range(num_nodes) for j in range(num_nodes)), "max_distance_constraint")
+    if not lazy:  # otherwise added only when violated by the lazy constraint callback
+        model.addConstr(incidence(rows, num_pairs, pair_distances[rows]).T @ x - sp.csr_matrix(np.ones((len(rows), 1))) @ max_distance <= 0, "max_distance_constraint")
     
-    return model, x, y
\ No newline at end of file
+    return model, x, y
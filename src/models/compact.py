@@ -0,0 +1,79 @@
+from gurobipy import Model, GRB, LinExpr, quicksum
+import numpy as np
+from .reduction import record_reduction
+from ..io_utils.instance import sorted_neighbors
+
+def compact_model(instance_data, lower_bound=None, upper_bound=None):
+    """
+    Compact Gurobi model for the classical p-center problem (Elloumi et al. formulation).
+    The radius is described by sorted distinct distance levels D_0 < D_1 < ... < D_K,
+    with one binary z_k per level (z_k = 1 if the radius is at least D_k) instead of assignment variables.
+    Only the levels between the bounds of the optimal radius (if given) are modeled.
+    """
+
+    model = Model("p-center-compact")
+
+    model.setParam("Timelimit", 3600)
+    model.setParam('Threads', 1)
+
+    # Extract data
+    distances = np.asarray(instance_data['distances'])
+    num_nodes = instance_data['num_nodes']
+    num_centers = instance_data['num_centers']
+
+    # Distance levels, no level above the radius of the best single center (always feasible)
+    all_levels = np.unique(distances)
+    if upper_bound is None:
+        upper_bound = distances.max(axis=0).min()
+    levels = all_levels[all_levels <= upper_bound]
+    if lower_bound is not None:
+        # D_0 is the highest level below the lower bound
+        levels = levels[levels >= levels[max(0, np.searchsorted(levels, lower_bound, side='right') - 1)]]
+    num_levels = len(levels)
+    record_reduction(model, len(all_levels) - num_levels, 0)
+
+    # Decision variables
+    y = model.addMVar(num_nodes, vtype=GRB.BINARY, name="y")           # Center opened
+    y_vars = y.tolist()
+    z = model.addVars(range(1, num_levels), vtype=GRB.BINARY, name="z")  # Radius at least levels[k]
+
+    # Objective: D_0 + sum of the level increments reached
+    model.setObjective(levels[0].item() + LinExpr([(levels[k] - levels[k-1]).item() for k in z], [z[k] for k in z]), GRB.MINIMIZE)
+
+    # Constraints
+
+    # There is exactly p centers (kept on the model, the parametric sweep changes its right-hand side)
+    model._num_centers = model.addConstr(y.sum() == num_centers, "num_centers")
+
+    # If the radius is below levels[k], each client has an open center strictly closer than levels[k]
+    # Only the levels appearing in the row of the client are needed, the other rows are dominated
+    level_index = {value: k for k, value in enumerate(levels.tolist())}
+    order = sorted_neighbors(instance_data)
+    for i in range(num_nodes):
+        row = distances[i, order[i]]
+        values, first = np.unique(row, return_index=True)
+        closer = LinExpr()  # centers strictly closer than the current value
+        start = 0
+        k = 0
+        for value, end in zip(values.tolist(), first.tolist()):
+            if value > upper_bound:
+                break
+            closer.addTerms([1.0] * (end - start), [y_vars[j] for j in order[i, start:end].tolist()])
+            start = end
+            k = level_index.get(value, 0)
+            if k > 0:
+                model.addLConstr(closer + z[k], GRB.GREATER_EQUAL, 1, name=f"level_cover[{i},{k}]")
+
+        # The highest level is not in the row : its row is not dominated by a later one
+        if k < num_levels - 1:
+            end = np.searchsorted(row, levels[-1], side='left')
+            closer.addTerms([1.0] * (end - start), [y_vars[j] for j in order[i, start:end].tolist()])
+            model.addLConstr(closer + z[num_levels - 1], GRB.GREATER_EQUAL, 1, name=f"level_cover[{i},{num_levels - 1}]")
+
+    # The radius never exceeds the highest level : each client has an open center within it
+    model.addConstrs((quicksum(y_vars[j] for j in np.flatnonzero(distances[i] <= levels[-1]).tolist()) >= 1 for i in range(num_nodes)), name="top_cover")
+
+    # The levels are reached in increasing order
+    model.addConstrs((z[k] >= z[k+1] for k in range(1, num_levels - 1)), name="level_order")
+
+    return model, z, y
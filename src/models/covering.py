@@ -0,0 +1,78 @@
+from gurobipy import Model, GRB, quicksum
+import numpy as np
+
+def covering_model(instance_data, radius):
+    """
+    Gurobi feasibility model : can num_centers centers cover every client within radius ?
+    The coverage rows are updated in place by set_radius to test another radius.
+    """
+
+    model = Model("p-center-covering")
+
+    model.setParam("Timelimit", 3600)
+    model.setParam('Threads', 1)
+
+    # Extract data
+    distances = np.asarray(instance_data['distances'])
+    num_nodes = instance_data['num_nodes']
+    num_centers = instance_data['num_centers']
+
+    # Decision variables
+    y = model.addVars(num_nodes, vtype=GRB.BINARY, name="y")  # Center opened
+
+    # Feasibility problem, the first solution found is optimal
+    model.setObjective(0, GRB.MINIMIZE)
+
+    # Constraints
+
+    # At most p centers are opened
+    model.addConstr(y.sum() <= num_centers, "num_centers")
+
+    # Each client is within radius of at least one opened center
+    coverage = model.addConstrs((quicksum(y[j] for j in np.flatnonzero(distances[i] <= radius)) >= 1 for i in range(num_nodes)), name="coverage")
+
+    return model, y, coverage
+
+
+def set_radius(model, y, coverage, distances, old_radius, new_radius):
+    """
+    Update the coverage rows of a covering model from old_radius to new_radius.
+    Only the coefficients of the pairs with a distance between the two radii change.
+    Returns:
+        int: Number of changed coefficients.
+    """
+    distances = np.asarray(distances)
+    low, high = min(old_radius, new_radius), max(old_radius, new_radius)
+    value = 1.0 if new_radius > old_radius else 0.0
+
+    clients, centers = np.nonzero((distances > low) & (distances <= high))
+    for i, j in zip(clients.tolist(), centers.tolist()):
+        model.chgCoeff(coverage[i], y[j], value)
+    return len(clients)
+
+
+def sparse_covering_model(coverage, num_centers):
+    """
+    Covering model built with the matrix API from a sparse (clients x centers) coverage matrix
+    (coordinate instances : the coverage comes from a KD-tree, there is no distance matrix).
+    The coefficients of the coverage rows are changed by chgCoeff to test another radius.
+    """
+
+    model = Model("p-center-covering")
+
+    model.setParam("Timelimit", 3600)
+    model.setParam('Threads', 1)
+
+    # Decision variables
+    y = model.addMVar(coverage.shape[1], vtype=GRB.BINARY, name="y")  # Center opened
+
+    # Feasibility problem, the first solution found is optimal
+    model.setObjective(0, GRB.MINIMIZE)
+
+    # At most p centers are opened
+    model.addConstr(y.sum() <= num_centers, "num_centers")
+
+    # Each client is within radius of at least one opened center
+    coverage = model.addConstr(coverage @ y >= 1, name="coverage")
+
+    return model, y, coverage
@@ -1,8 +1,16 @@
-from gurobipy import Model, GRB, quicksum
+from gurobipy import Model, GRB
+import numpy as np
+import scipy.sparse as sp
+from .reduction import candidate_pairs, distance_rows, incidence, record_reduction
 
-def failure_model(instance_data):
+def failure_model(instance_data, lower_bound=None, upper_bound=None, lazy=False):
     """
     Gurobi model for the capacitated p-center problem with Failure Foresight.
+    Built with the matrix API : x and w are vectors over client-center pairs (model._pairs['x'] and model._pairs['w']).
+    The bounds of the optimal radius (if given) remove the main assignments farther than upper_bound
+    and the maximum distance rows of the pairs closer than lower_bound.
+    The backup distance is not bounded by the objective, so every backup pair is kept.
+    With lazy set, the maximum distance and backup distance rows are left to a lazy constraint callback.
     """
 
     model = Model("Capacitated p-Center with Failure Foresight")
@@ -11,60 +19,76 @@ def failure_model(instance_data):
     model.setParam('Threads', 1)
 
     # Extract data
-    distances = instance_data['distances']
+    distances = np.asarray(instance_data['distances'])
     num_nodes = instance_data['num_nodes']
     num_edges = instance_data['num_edges']
     num_centers = instance_data['num_centers']
-    demands = instance_data['demands']
-    capacities = instance_data['capacities']
+    demands = np.asarray(instance_data['demands'])
+    capacities = np.asarray(instance_data['capacities'])
     alpha = instance_data['alpha']
     
 
+    # Bound-driven reduction of the main assignment pairs and of the maximum distance rows
+    clients, centers = candidate_pairs(distances, upper_bound)
+    pair_distances = distances[clients, centers]
+    rows = distance_rows(pair_distances, lower_bound)
+    num_pairs = len(clients)
+    # every backup pair, in row-major order : the pair (i, j) is at position i * num_nodes + j
+    backup_clients, backup_centers = candidate_pairs(distances)
+    backup_distances = distances[backup_clients, backup_centers]
+    model._pairs = {'x': (clients, centers), 'w': (backup_clients, backup_centers)}
+    # x, assignment, different_centers and the maximum distance row of each removed pair
+    record_reduction(model, num_nodes**2 - num_pairs, 3 * num_nodes**2 - 2 * num_pairs - len(rows))
+
     # Decision variables
-    x = model.addVars(num_nodes, num_nodes, vtype=GRB.BINARY, name="x")  # Client-to-center (primary)
-    w = model.addVars(num_nodes, num_nodes, vtype=GRB.BINARY, name="w")  # Client-to-backup-center
-    y = model.addVars(num_nodes, vtype=GRB.BINARY, name="y")             # Center opened
-    max_distance = model.addVar(vtype=GRB.CONTINUOUS, name="max_distance")
+    x = model.addMVar(num_pairs, vtype=GRB.BINARY, name="x")             # Client-to-center (primary)
+    w = model.addMVar(num_nodes**2, vtype=GRB.BINARY, name="w")          # Client-to-backup-center
+    y = model.addMVar(num_nodes, vtype=GRB.BINARY, name="y")             # Center opened
+    max_distance = model.addMVar(1, lb=lower_bound or 0, vtype=GRB.CONTINUOUS, name="max_distance")
 
     # Objective: minimize max distance (primary or backup)
-    model.setObjective(max_distance, GRB.MINIMIZE)
+    model.setObjective(max_distance.sum(), GRB.MINIMIZE)
+    model._max_distance = max_distance
+
+    # Coefficient matrices
+    client_sum = incidence(clients, num_nodes)
+    backup_client_sum = incidence(backup_clients, num_nodes)
+    distance_rows_matrix = incidence(rows, num_pairs, pair_distances[rows]).T
+    max_distance_column = sp.csr_matrix(np.ones((len(rows), 1)))
+    primary_load = incidence(centers, num_nodes, demands[clients])
 
     # Constraints
 
-    # There is exactly p centers
-    model.addConstr(y.sum() == num_centers, "num_centers")
+    # There is exactly p centers (kept on the model, the parametric sweep changes its right-hand side)
+    model._num_centers = model.addConstr(y.sum() == num_centers, "num_centers")
 
     # Each client must be assigned to exactly one center (main)
-    model.addConstrs((x.sum(i, '*') == 1 for i in range(num_nodes)), "client_assignment")
+    model.addConstr(client_sum @ x == 1, "client_assignment")
 
     # Each client must be assigned to exactly one backup center
-    model.addConstrs((w.sum(i, '*') == 1 for i in range(num_nodes)), "backup_assignment")
+    model.addConstr(backup_client_sum @ w == 1, "backup_assignment")
 
     # Each client must be assigned to an open center (main)
-    model.addConstrs((x[i, j] <= y[j] for i in range(num_nodes) for j in range(num_nodes)), "assignment")
+    model.addConstr(x - incidence(centers, num_nodes).T @ y <= 0, "assignment")
 
     # Each client must be assigned to an open backup center
-    model.addConstrs((w[i, j] <= y[j] for i in range(num_nodes) for j in range(num_nodes)), "backup_assignment_open")
+    model.addConstr(w - incidence(backup_centers, num_nodes).T @ y <= 0, "backup_assignment_open")
 
     # The maximum distance from any client to its assigned center must be less than or equal to max_distance
-    model.addConstrs((x[i, j] * distances[i][j] <= max_distance for i in range(num_nodes) for j in range(num_nodes)), "max_distance_constraint")
+    if not lazy:  # otherwise added only when violated by the lazy constraint callback
+        model.addConstr(distance_rows_matrix @ x - max_distance_column @ max_distance <= 0, "max_distance_constraint")
 
     # The distance to the backup center must be at least superior or equal to the primary center distance
-    model.addConstrs((quicksum(w[i, j] * distances[i][j] for j in range(num_nodes)) >= quicksum(x[i, j] * distances[i][j] for j in range(num_nodes)) for i in range(num_nodes)), name="backup_distance_constraint")
+    if not lazy:
+        model.addConstr(incidence(backup_clients, num_nodes, backup_distances) @ w - incidence(clients, num_nodes, pair_distances) @ x >= 0, name="backup_distance_constraint")
 
     # The backup center and the main center must be different
-    model.addConstrs((x[i, j] + w[i, j] <= 1 for i in range(num_nodes) for j in range(num_nodes)), "different_centers")
-
-    # Respect capacity constraints
-    model.addConstrs((sum(x[i, j] * demands[i] for i in range(num_nodes)) <= capacities[j] for j in range(num_nodes)),name="capacity_limit")
+    model.addConstr(x + incidence(clients * num_nodes + centers, num_nodes**2).T @ w <= 1, "different_centers")
 
     # Respect capacity constraints
-    model.addConstrs((sum(x[i, j] * demands[i] for i in range(num_nodes)) + sum(w[i, j] * demands[i] for i in range(num_nodes)) <= (1+alpha)*capacities[j] for j in range(num_nodes)),name="capacity_limit")
-
-    # Maximum distance constraint
-    model.addConstrs((x[i, j] * distances[i][j] <= max_distance for i in range(num_nodes) for j in range(num_nodes)),name="distance_limit")
-
-
+    model.addConstr(primary_load @ x <= capacities, name="capacity_limit")
 
+    # Respect capacity constraints (overload rule, the parametric sweep changes its alpha)
+    model._overload = model.addConstr(primary_load @ x + incidence(backup_centers, num_nodes, demands[backup_clients]) @ w <= (1+alpha)*capacities, name="failure_capacity")
 
     return model, x, w, y
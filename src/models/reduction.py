@@ -0,0 +1,43 @@
+import numpy as np
+import scipy.sparse as sp
+
+def candidate_pairs(distances, upper_bound=None):
+    """
+    Client-center pairs that can appear in an optimal assignment : d(i, j) <= upper_bound
+    (all the pairs without upper bound), in row-major order.
+    Returns:
+        tuple: (clients, centers) index arrays.
+    """
+    distances = np.asarray(distances)
+    if upper_bound is None:
+        return np.indices(distances.shape).reshape(2, -1)
+    return np.nonzero(distances <= upper_bound)
+
+
+def distance_rows(pair_distances, lower_bound=None):
+    """
+    Pairs whose maximum distance row is needed : d(i, j) > lower_bound, the other rows are implied
+    by the bound of max_distance (rows with a null distance are always redundant).
+    Returns:
+        np.ndarray: Positions of these pairs in the pair arrays.
+    """
+    return np.flatnonzero(pair_distances > (lower_bound or 0))
+
+
+def incidence(rows, num_rows, values=None):
+    """
+    Sparse (num_rows, len(rows)) matrix with values[k] (1 by default) at (rows[k], k),
+    e.g. the matrix summing the pair variables of each client or of each center.
+    """
+    rows = np.asarray(rows)
+    if values is None:
+        values = np.ones(len(rows))
+    return sp.csr_matrix((values, (rows, np.arange(len(rows)))), shape=(num_rows, len(rows)))
+
+
+def record_reduction(model, removed_variables, removed_constraints):
+    """
+    Store the number of variables and constraints removed thanks to the bounds on the model (recorded in the trace by solve).
+    """
+    model._removed_variables = removed_variables
+    model._removed_constraints = removed_constraints
@@ -0,0 +1,371 @@
+# p-center-problem/src/service.py
+#
+# Long-lived solver service : listens on a Unix socket or a localhost HTTP port and runs the jobs on a pool of
+# long-lived worker processes, each keeping the parsed instances (with their distance matrices) in an LRU memory
+# cache. A job pays neither the Python start-up, the gurobipy import, the parsing nor the shortest paths
+# once its instance is cached. Usage:
+#   python -m src.service [--socket /tmp/p-center.sock | --port 8765] [--workers 4] [--cache-size 8]
+#   python -m src.client instances/pmed/pmed1.txt --model compact [--socket /tmp/p-center.sock]
+#
+# Requests (JSON bodies and responses) :
+#   POST /solve     {"file", "model", "alpha", "num_centers", "heuristic", "time_limit", "warm_start", "reduce", "lazy", "threads"}
+#                   -> {"solution", "cached", "times": {"queue", "load", "run"}}
+#   GET  /status    -> instances cached by each worker, hits and misses, queued and running jobs
+#   POST /shutdown  -> stops the service
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from src.io_utils.read_instance import COORDINATE_EXTENSIONS, read_instance
+from src.io_utils.solution_file import solution_to_json
+from src.solver.solve import solve
+from src.solver.heuristic import heuristic
+from src.solver.capacitated_heuristic import capacitated_heuristic
+from src.solver.euclidean import euclidean_heuristic
+from src.client import DEFAULT_HOST, DEFAULT_PORT
+
+# Default values of the job fields
+JOB_DEFAULTS = {'model': 'classical', 'alpha': 0.0, 'num_centers': None, 'heuristic': False, 'time_limit': 3600,
+                'warm_start': True, 'reduce': True, 'lazy': False, 'threads': 1}
+MODELS = ('classical', 'compact', 'radius', 'capacitated', 'failure')
+# Largest accepted request body (bytes)
+MAX_BODY = 1 << 20
+
+
+class InstanceCache:
+    """
+    Parsed instances kept in memory by a worker process (one cache per process, used by its single thread), the
+    least recently used ones are evicted above max_instances.
+    An entry is keyed by the file (path, modification time and size), by whether the capacities were read and,
+    for the coordinate instances whose p may only come from the job, by num_centers. Its distance matrix is
+    computed when it is stored (read_instance, with the on-disk distance cache).
+    """
+
+    def __init__(self, max_instances=8, use_cache=True):
+        self.max_instances = max_instances
+        self.use_cache = use_cache
+        self.instances = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(file_path, capacitated, num_centers=None):
+        stat = os.stat(file_path)
+        if not file_path.endswith(COORDINATE_EXTENSIONS):
+            num_centers = None
+        return (os.path.realpath(file_path), stat.st_mtime_ns, stat.st_size, capacitated, num_centers)
+
+    def get(self, file_path, capacitated=False, num_centers=None):
+        """
+        Instance of a file, read on the first request.
+        Args:
+            num_centers (int): Number of centers p, overrides the value of the instance file (required by the
+                coordinate files whose name does not give it).
+        Returns:
+            tuple: (instance, True if it was already cached).
+        """
+        key = self.key(file_path, capacitated, num_centers)
+        if key in self.instances:
+            self.instances.move_to_end(key)
+            self.hits += 1
+            return self.instances[key], True
+        self.misses += 1
+
+        instance = read_instance(file_path, capacitated=capacitated, use_cache=self.use_cache, num_centers=num_centers)
+        if 'distances' in instance:
+            instance['distances']  # computed once, shared by the jobs
+        self.instances[key] = instance
+        while len(self.instances) > self.max_instances:
+            self.instances.popitem(last=False)
+        return instance, False
+
+    def status(self):
+        return {'instances': [{'file': key[0], 'capacitated': key[3], 'num_nodes': instance['num_nodes']}
+                              for key, instance in self.instances.items()],
+                'hits': self.hits, 'misses': self.misses}
+
+
+def parse_job(job):
+    """
+    Job of a /solve request with the default values of the missing fields.
+    Raises:
+        ValueError: If a field is missing or not valid.
+    """
+    if not isinstance(job, dict) or 'file' not in job:
+        raise ValueError("a job needs the instance file")
+    unknown = set(job) - set(JOB_DEFAULTS) - {'file'}
+    if unknown:
+        raise ValueError(f"unknown job fields: {sorted(unknown)}")
+    job = dict(JOB_DEFAULTS, **job)
+    if job['model'] not in MODELS:
+        raise ValueError(f"unknown model: {job['model']}")
+    if not 0 <= job['alpha'] <= 1:
+        raise ValueError("alpha must be between 0 and 1")
+    if not os.path.isfile(job['file']):
+        raise ValueError(f"instance file not found: {job['file']}")
+    return job
+
+
+def solve_job(instance_data, job):
+    """Solve a job as main does (heuristic only, or solve)."""
+    model_class = job['model']
+    if job['heuristic']:
+        if 'coordinates' in instance_data:
+            return euclidean_heuristic(instance_data)
+        if model_class in ('capacitated', 'failure'):
+            return capacitated_heuristic(instance_data, failure=model_class == 'failure')
+        return heuristic(instance_data)
+    return solve(instance_data, model_class=model_class, warm_start=job['warm_start'], reduce=job['reduce'],
+                 lazy=job['lazy'], time_limit=job['time_limit'], threads=job['threads'])
+
+
+def job_instance(cache, job):
+    """Instance of a job from a cache, with the num_centers and alpha of the job."""
+    instance, cached = cache.get(job['file'], capacitated=job['model'] in ('capacitated', 'failure'),
+                                 num_centers=job['num_centers'])
+    fields = {'alpha': job['alpha']} if job['model'] == 'failure' else {}
+    if job['num_centers'] is not None:
+        fields['num_centers'] = job['num_centers']
+    return instance.replace(**fields), cached
+
+
+def worker_process(connection, cache_size, use_cache, quiet):
+    """
+    Main loop of a worker process : receives jobs, sends back ('ok', result) or ('error', message), stops on
+    None. The result holds the JSON solution, whether the instance was in the cache of this process, the load
+    time and the state of the cache. The distance matrices computed by a worker are stored in the on-disk
+    distance cache, the other workers memory-map them (shared page cache, nothing is recomputed).
+    """
+    # the solver and Gurobi logs are discarded unless the service is verbose
+    if quiet:
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, 1)
+        os.close(devnull)
+    cache = InstanceCache(cache_size, use_cache)
+    while True:
+        job = connection.recv()
+        if job is None:
+            break
+        try:
+            start = time.perf_counter()
+            instance_data, cached = job_instance(cache, job)
+            load_time = time.perf_counter() - start
+            connection.send(('ok', {'solution': solution_to_json(solve_job(instance_data, job)), 'cached': cached,
+                                    'load': load_time, 'cache': cache.status()}))
+        except Exception as e:
+            connection.send(('error', str(e)))
+    connection.close()
+
+
+class WorkerProcess:
+    """
+    Long-lived worker process, started with the spawn method : the service never forks itself, which is
+    unsafe once it runs the asyncio loop and the thread pool (a fork only copies the calling thread, with the
+    locks held by the others). Each process has its own Gurobi environment.
+    """
+
+    def __init__(self, cache_size, use_cache, quiet):
+        self.arguments = (cache_size, use_cache, quiet)
+        self.connection, self.process = None, None
+        self.cache = None  # state of the instance cache of the process, after its last job
+        self.start()
+
+    def start(self):
+        context = multiprocessing.get_context('spawn')
+        self.connection, child = context.Pipe()
+        self.process = context.Process(target=worker_process, args=(child,) + self.arguments, daemon=True)
+        self.process.start()
+        child.close()
+        self.cache = {'instances': [], 'hits': 0, 'misses': 0}
+
+    def run(self, job):
+        """
+        Solve a job in the process.
+        Returns:
+            dict: The JSON-compatible solution, whether the instance was already cached by the process and the
+                load time (seconds).
+        Raises:
+            RuntimeError: If the job failed, the process is restarted if it died.
+        """
+        try:
+            self.connection.send(job)
+            status, result = self.connection.recv()
+        except (EOFError, OSError):
+            self.process.join(timeout=1)
+            exitcode = self.process.exitcode
+            self.connection.close()
+            self.start()
+            status, result = 'error', f"the worker process exited with code {exitcode}"
+        if status != 'ok':
+            raise RuntimeError(result)
+        self.cache = result['cache']
+        return result
+
+    def stop(self):
+        try:
+            self.connection.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.connection.close()
+
+
+class SolverService:
+    """
+    Job queue (bounded asyncio queue) consumed by `workers` tasks, each running one job at a time in its
+    worker process. Each worker process keeps its own instance cache : the first worker to read an instance
+    stores its distance matrix in the on-disk distance cache, the others memory-map it. Without the on-disk
+    cache (use_cache=False), each worker process computes the distances it needs.
+    """
+
+    def __init__(self, workers=1, cache_size=8, max_queue=100, use_cache=True, quiet=True):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.quiet = quiet
+        self.cache_size = cache_size
+        self.use_cache = use_cache
+        # threads waiting for the worker processes, one per worker task
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.processes = []
+        self.queue = None
+        self.running = 0
+        self.done = 0
+        self.stopped = None
+
+    def run_job(self, process, job):
+        # Thread of the pool : the job in the worker process, which reads the instance through its own cache
+        start = time.perf_counter()
+        result = process.run(job)
+        return result['solution'], result['cached'], result['load'], time.perf_counter() - start - result['load']
+
+    async def worker(self, process):
+        loop = asyncio.get_running_loop()
+        while True:
+            job, future, submitted = await self.queue.get()
+            self.running += 1
+            started = time.perf_counter()
+            try:
+                solution, cached, load_time, run_time = await loop.run_in_executor(self.executor, self.run_job, process, job)
+                if not future.cancelled():
+                    future.set_result({'solution': solution, 'cached': cached,
+                                       'times': {'queue': started - submitted, 'load': load_time, 'run': run_time}})
+            except Exception as e:
+                if not future.cancelled():
+                    future.set_exception(e)
+            finally:
+                self.running -= 1
+                self.done += 1
+                self.queue.task_done()
+
+    def status(self):
+        caches = [process.cache for process in self.processes]
+        return {'instances': [cache['instances'] for cache in caches],
+                'hits': sum(cache['hits'] for cache in caches), 'misses': sum(cache['misses'] for cache in caches),
+                'queued': self.queue.qsize(), 'running': self.running, 'done': self.done, 'workers': self.workers}
+
+    async def handle(self, reader, writer):
+        """One HTTP request per connection, JSON bodies."""
+        try:
+            code, response = await self.respond(reader)
+        except (ValueError, TypeError) as e:
+            code, response = 400, {'error': str(e)}
+        except Exception as e:
+            code, response = 500, {'error': str(e)}
+        body = json.dumps(response).encode()
+        reasons = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+        writer.write(f"HTTP/1.1 {code} {reasons[code]}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        writer.close()
+
+    async def respond(self, reader):
+        # Request line, headers and body
+        request_line = (await reader.readline()).decode().split()
+        if len(request_line) < 2:
+            raise ValueError("malformed request")
+        method, path = request_line[0], request_line[1]
+        length = 0
+        while True:
+            line = (await reader.readline()).decode().strip()
+            if not line:
+                break
+            name, _, value = line.partition(':')
+            if name.strip().lower() == 'content-length':
+                length = int(value)
+        if length > MAX_BODY:
+            raise ValueError("request body too large")
+        body = await reader.readexactly(length) if length else b''
+
+        if method == 'GET' and path == '/status':
+            return 200, self.status()
+        if method == 'POST' and path == '/shutdown':
+            self.stopped.set()
+            return 200, {'status': 'stopping'}
+        if method == 'POST' and path == '/solve':
+            job = parse_job(json.loads(body or b'{}'))
+            if self.queue.full():
+                return 503, {'error': f"{self.max_queue} jobs already queued"}
+            future = asyncio.get_running_loop().create_future()
+            self.queue.put_nowait((job, future, time.perf_counter()))
+            try:
+                return 200, await future
+            except RuntimeError as e:
+                return 500, {'error': str(e)}
+        return 404, {'error': f"unknown request: {method} {path}"}
+
+    async def serve(self, socket_path=None, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """Serve until a /shutdown request."""
+        self.processes = [WorkerProcess(self.cache_size, self.use_cache, self.quiet) for _ in range(self.workers)]
+        self.queue = asyncio.Queue(maxsize=self.max_queue)
+        self.stopped = asyncio.Event()
+        if socket_path is not None:
+            if os.path.exists(socket_path):
+                os.remove(socket_path)
+            server = await asyncio.start_unix_server(self.handle, path=socket_path)
+            print(f"Solver service listening on {socket_path}")
+        else:
+            server = await asyncio.start_server(self.handle, host=host, port=port)
+            print(f"Solver service listening on http://{host}:{port}")
+        tasks = [asyncio.create_task(self.worker(process)) for process in self.processes]
+        async with server:
+            await self.stopped.wait()
+        for task in tasks:
+            task.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        for process in self.processes:
+            process.stop()
+        if socket_path is not None and os.path.exists(socket_path):
+            os.remove(socket_path)
+        print("Solver service stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='p-center solver service')
+    parser.add_argument('--socket', default=None, help='If set, the service listens on this Unix socket instead of the HTTP port.')
+    parser.add_argument('--host', default=DEFAULT_HOST, help='Host of the HTTP port (localhost only by default).')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='HTTP port.')
+    parser.add_argument('--workers', type=int, default=None, help='Number of jobs run at the same time (default: number of cores).')
+    parser.add_argument('--cache-size', type=int, default=8, help='Number of instances kept in memory by each worker process.')
+    parser.add_argument('--max-queue', type=int, default=100, help='Number of queued jobs above which the requests are rejected.')
+    parser.add_argument('--no-cache', action='store_true', help='If set, the distance matrix cache on disk is not used.')
+    parser.add_argument('--verbose', action='store_true', help='If set, the solver and Gurobi logs of the jobs are printed.')
+    args = parser.parse_args()
+
+    service = SolverService(workers=args.workers or os.cpu_count() or 1, cache_size=args.cache_size,
+                            max_queue=args.max_queue, use_cache=not args.no_cache, quiet=not args.verbose)
+    asyncio.run(service.serve(socket_path=args.socket, host=args.host, port=args.port))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import numpy as np
+
+from .heuristic import farthest_first
+
+def snap_to_distance(distances, value):
+    """
+    Smallest distance of the matrix greater than or equal to value.
+    The optimal radius of every variant is the distance of an assigned pair, so a lower bound can be raised to it.
+    """
+    levels = np.unique(distances)
+    k = np.searchsorted(levels, value - 1e-9, side='left')
+    return levels[min(k, len(levels) - 1)].item()
+
+
+def lower_bound(distances, num_centers):
+    """
+    Lower bound of the optimal radius, valid for all the variants (capacities only increase the radius).
+    - At most p clients are centers : the radius is at least the (p+1)-th largest distance of a client
+      to its nearest other node.
+    - Two of the p+1 farthest-first nodes share a center : the radius is at least half their smallest distance.
+    """
+    distances = np.asarray(distances)
+    num_nodes = distances.shape[0]
+    if num_centers >= num_nodes:
+        return 0
+
+    others = distances + np.diag(np.full(num_nodes, np.inf))
+    nearest = np.sort(others.min(axis=1))[::-1]
+    bound = nearest[num_centers]
+
+    points = farthest_first(distances, num_centers + 1)
+    sub = distances[np.ix_(points, points)] + np.diag(np.full(len(points), np.inf))
+    bound = max(bound, sub.min() / 2)
+
+    return snap_to_distance(distances, bound)
+
+
+def compute_bounds(instance_data, model_class, start=None):
+    """Bounds of the optimal radius used to reduce the models.
+    Args:
+        instance_data (dict): The instance data containing distances, number of nodes, etc.
+        model_class (str): The model class to solve.
+        start (dict): Heuristic solution feasible for model_class (classical heuristic for the classical
+            formulations, capacitated heuristic for the capacitated variants), if available.
+    Returns:
+        tuple: (lower bound, upper bound), the upper bound is None when no valid one is known.
+    """
+    distances = np.asarray(instance_data['distances'])
+    lower = lower_bound(distances, instance_data['num_centers'])
+    upper = None
+    if start is not None and start['objective_value'] is not None:
+        upper = start['objective_value']
+    return lower, upper
@@ -0,0 +1,182 @@
+import time
+
+import numpy as np
+
+from .heuristic import farthest_first, nearest_two, _evaluate_removals
+from .evaluate import (capacitated_assignment, min_capacitated_radius, backup_assignment, classical_radius,
+                       insert_client)
+from .solution import UNASSIGNED
+
+
+def initial_centers(instance_data, first=None):
+    """
+    Farthest-first centers, the centers of smallest capacity are replaced by the nodes of largest capacity
+    until the total capacity covers the total demand.
+    """
+    distances = np.asarray(instance_data['distances'])
+    capacities = np.asarray(instance_data['capacities'])
+    total_demand = np.sum(instance_data['demands'])
+
+    centers = np.array(farthest_first(distances, instance_data['num_centers'], first=first))
+    others = np.setdiff1d(np.arange(len(capacities)), centers)
+    others = others[np.argsort(-capacities[others], kind='stable')]
+    k = 0
+    while capacities[centers].sum() < total_demand and k < len(others):
+        smallest = int(np.argmin(capacities[centers]))
+        if capacities[others[k]] <= capacities[centers[smallest]]:
+            break
+        centers[smallest] = others[k]
+        k += 1
+    return centers
+
+
+def reassign(instance_data, centers, assignment, radius):
+    """
+    Assignment of the clients to new centers within radius, starting from the previous assignment :
+    the clients whose center is still open and within radius keep it, the other ones are inserted
+    one by one. The max-flow assignment (without greedy fallback) is only computed if the insertion fails.
+    Returns:
+        np.ndarray: (n,) assignment array, or None.
+    """
+    distances = np.asarray(instance_data['distances'])
+    demands = np.asarray(instance_data['demands'])
+    capacities = np.asarray(instance_data['capacities'])
+    num_nodes = instance_data['num_nodes']
+    centers = np.asarray(centers)
+
+    is_open = np.zeros(num_nodes, dtype=bool)
+    is_open[centers] = True
+    rows = np.arange(num_nodes)
+    keep = is_open[assignment] & (distances[rows, assignment] <= radius)
+    new = np.where(keep, assignment, UNASSIGNED).astype(np.int32)
+    remaining = capacities - np.bincount(new[keep], weights=demands[keep], minlength=num_nodes).astype(np.int64)
+    if np.all(remaining >= 0):
+        within = distances[:, centers] <= radius
+        options = [centers[row] for row in within]
+        moved = np.flatnonzero(~keep)
+        if all(insert_client(i, new, remaining, demands, options) for i in moved[np.argsort(-demands[moved], kind='stable')].tolist()):
+            return new
+    return capacitated_assignment(instance_data, centers, radius, fallback=False)
+
+
+def capacitated_local_search(instance_data, centers, assignment, max_iterations=100, deadline=None):
+    """
+    Vertex substitution local search for the capacitated p-center problem.
+    At each iteration, the radius is lowered to the next distance level : a swap (center added close to the
+    farthest client, center removed) is accepted if the clients can be assigned within this radius.
+    The swaps whose radius without capacities is too large, or whose total capacity is below the total demand,
+    are skipped without solving the assignment. The search stops at the deadline (time.perf_counter value).
+    Returns:
+        tuple: (centers, radius, assignment, number of swaps).
+    """
+    distances = np.asarray(instance_data['distances'])
+    capacities = np.asarray(instance_data['capacities'])
+    total_demand = np.sum(instance_data['demands'])
+    num_nodes = instance_data['num_nodes']
+    levels = np.unique(distances)
+    centers = np.array(centers)
+    num_centers = len(centers)
+    radius = classical_radius(distances, centers, assignment)
+
+    swaps = 0
+    while swaps < max_iterations:
+        level = int(np.searchsorted(levels, radius))
+        if level == 0:
+            break
+        target = levels[level - 1]
+
+        # The farthest client must be served by a center within the target radius
+        critical = int(np.argmax(distances[np.arange(num_nodes), assignment]))
+        center_index = np.full(num_nodes, -1)
+        center_index[centers] = np.arange(num_centers)
+        state = nearest_two(distances, centers)
+        candidates = np.flatnonzero((distances[critical] <= target) & (center_index < 0))
+
+        move = None
+        for added in candidates.tolist():
+            removal_radius, _ = _evaluate_removals(distances[:, added], state, center_index, num_centers, radius)
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+            for k in np.flatnonzero(removal_radius <= target).tolist():
+                if capacities[centers].sum() - capacities[centers[k]] + capacities[added] < total_demand:
+                    continue
+                new_centers = centers.copy()
+                new_centers[k] = added
+                new_assignment = reassign(instance_data, new_centers, assignment, target)
+                if new_assignment is not None:
+                    move = (new_centers, new_assignment)
+                    break
+            if move is not None:
+                break
+
+        if move is None:
+            break
+        centers, assignment = move
+        radius = classical_radius(distances, centers, assignment)
+        swaps += 1
+
+    return centers.tolist(), radius, assignment, swaps
+
+
+def capacitated_heuristic(instance_data, restarts=5, max_iterations=100, seed=0, failure=False, time_limit=60):
+    """Solve the capacitated p-center problem without Gurobi : farthest-first start (repaired to cover the demand),
+    smallest radius assignment by bisection over max-flow subproblems, then vertex substitution.
+    The first start begins with the best single center, the other ones with a random first center.
+    Args:
+        instance_data (dict): The instance data containing distances, demands, capacities, etc.
+        restarts (int): Number of starts.
+        max_iterations (int): Maximum number of swaps of each local search.
+        seed (int): Seed of the random first centers.
+        failure (bool): If set, a backup assignment ((1 + alpha) overload rule) is also required.
+        time_limit (float): Time limit (seconds), the restarts and the swaps stop when it is reached.
+    Returns:
+        dict: A dictionary containing the solution with objective value, centers and assignments
+            (primary_assignments and backup_assignments if failure), objective value None if no solution was found.
+    """
+    start = time.perf_counter()
+    num_nodes = instance_data['num_nodes']
+    rng = np.random.default_rng(seed)
+    deadline = start + time_limit
+
+    best, swaps = None, 0
+    if failure:
+        # Main and backup demands must fit in the (1 + alpha) overload capacity of the p largest centers
+        largest = np.sort(instance_data['capacities'])[::-1][:instance_data['num_centers']]
+        if 2 * np.sum(instance_data['demands']) > (1 + instance_data['alpha']) * largest.sum():
+            restarts = 0
+    for restart in range(restarts):
+        if restart > 0 and time.perf_counter() > deadline:
+            break
+        first = None if restart == 0 else int(rng.integers(num_nodes))
+        start_centers = initial_centers(instance_data, first=first)
+        radius, assignment = min_capacitated_radius(instance_data, start_centers)
+        if assignment is None:
+            continue
+        centers, radius, assignment, candidate_swaps = capacitated_local_search(instance_data, start_centers, assignment, max_iterations, deadline)
+        swaps += candidate_swaps
+
+        backup = backup_assignment(instance_data, centers, assignment) if failure else None
+        if failure and backup is None:
+            continue
+        if best is None or radius < best[1]:
+            best = (centers, radius, assignment, backup)
+
+    solution = {
+        'objective_value': None,
+        'gurobi_status': None,
+        'centers': [],
+        'assignments': np.full(num_nodes, UNASSIGNED, dtype=np.int32),
+        'swaps': swaps,
+        'time': time.perf_counter() - start,
+    }
+    if best is not None:
+        centers, _, assignment, backup = best
+        # radius of the assignment, a Python number of the type of the distances
+        solution.update({'objective_value': classical_radius(instance_data['distances'], centers, assignment),
+                         'centers': sorted(centers)})
+        if failure:
+            del solution['assignments']
+            solution['primary_assignments'], solution['backup_assignments'] = assignment, backup
+        else:
+            solution['assignments'] = assignment
+    return solution
@@ -0,0 +1,393 @@
+import time
+
+import numpy as np
+import scipy.sparse as sp
+from gurobipy import GRB
+from scipy.spatial import cKDTree
+
+from ..models.covering import sparse_covering_model
+from .heuristic import _evaluate_removals
+
+# Coordinate instances (read_clients) : instance_data['coordinates'] is the (n, 2) array of the points and
+# instance_data['tree'] a cKDTree over them, the n x n distance matrix is never computed.
+
+
+def spatial_index(instance_data):
+    """KD-tree of the points of a coordinate instance (built once and kept in instance_data)."""
+    if 'tree' not in instance_data:
+        instance_data['tree'] = cKDTree(instance_data['coordinates'])
+    return instance_data['tree']
+
+
+def point_distances(coordinates, point):
+    """Distance of every point to the point of index point (a column of the distance matrix)."""
+    difference = coordinates - coordinates[point]
+    return np.sqrt(np.einsum('ij,ij->i', difference, difference))
+
+
+def closest_points(coordinates, centers):
+    """
+    Closest center of each point and its distance, with a KD-tree over the centers.
+    Returns:
+        tuple: ((n,) array of node indices, (n,) distances).
+    """
+    centers = np.asarray(centers)
+    dist, index = cKDTree(coordinates[centers]).query(coordinates)
+    return centers[index].astype(np.int32), dist
+
+
+def nearest_two_points(coordinates, centers, rows=None):
+    """
+    Nearest and second nearest centers of each point (of the points rows if given), see heuristic.nearest_two.
+    """
+    centers = np.asarray(centers)
+    points = coordinates if rows is None else coordinates[rows]
+    if len(centers) == 1:
+        first_dist = np.sqrt(((points - coordinates[centers[0]]) ** 2).sum(axis=1))
+        return (np.full(len(points), centers[0]), first_dist,
+                np.full(len(points), centers[0]), np.full(len(points), np.inf))
+    dist, index = cKDTree(coordinates[centers]).query(points, k=2)
+    return centers[index[:, 0]], dist[:, 0], centers[index[:, 1]], dist[:, 1]
+
+
+def _update_nearest_points(coordinates, centers, state, added, removed):
+    """Update of the nearest / second nearest arrays after replacing the center removed by added."""
+    first, first_dist, second, second_dist = state
+    column = point_distances(coordinates, added)
+
+    # Clients whose nearest or second nearest center disappears
+    lost = (first == removed) | (second == removed)
+
+    closer = ~lost & (column < first_dist)
+    second[closer], second_dist[closer] = first[closer], first_dist[closer]
+    first[closer], first_dist[closer] = added, column[closer]
+    between = ~lost & ~closer & (column < second_dist)
+    second[between], second_dist[between] = added, column[between]
+
+    if lost.any():
+        rows = np.flatnonzero(lost)
+        f, fd, s, sd = nearest_two_points(coordinates, centers, rows)
+        first[rows], first_dist[rows], second[rows], second_dist[rows] = f, fd, s, sd
+    return first, first_dist, second, second_dist
+
+
+def farthest_first_points(coordinates, num_centers, first=None):
+    """
+    Gonzalez farthest-first traversal on points, O(n p).
+    The first center is by default the point closest to the middle of the bounding box
+    (the best single center needs every distance).
+    """
+    if first is None:
+        middle = (coordinates.min(axis=0) + coordinates.max(axis=0)) / 2
+        first = int(np.argmin(((coordinates - middle) ** 2).sum(axis=1)))
+
+    centers = [first]
+    closest = point_distances(coordinates, first)
+    while len(centers) < num_centers:
+        farthest = int(np.argmax(closest))
+        if closest[farthest] == 0:
+            # every point is already a center or at distance 0 of one, any other node will do
+            farthest = next(j for j in range(len(closest)) if j not in centers)
+        centers.append(farthest)
+        np.minimum(closest, point_distances(coordinates, farthest), out=closest)
+    return centers
+
+
+def euclidean_local_search(instance_data, centers, max_iterations=1000, max_candidates=20, rng=None, deadline=None):
+    """
+    Vertex substitution local search (see heuristic.local_search) on a coordinate instance.
+    The candidates added are points within the radius of the critical client (query_ball_point),
+    at most max_candidates of them chosen at random, their distance columns are computed on demand.
+    Returns:
+        tuple: (centers, radius, number of swaps).
+    """
+    coordinates = instance_data['coordinates']
+    tree = spatial_index(instance_data)
+    rng = rng if rng is not None else np.random.default_rng(0)
+    num_nodes = len(coordinates)
+    centers = np.array(centers)
+    num_centers = len(centers)
+    state = nearest_two_points(coordinates, centers)
+    radius = state[1].max()
+    if num_centers == num_nodes:
+        return centers.tolist(), radius, 0
+
+    center_index = np.full(num_nodes, -1)
+    center_index[centers] = np.arange(num_centers)
+
+    swaps = 0
+    while swaps < max_iterations and radius > 0:
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+        critical = int(np.argmax(state[1]))
+        # Only a center closer to the critical client than the radius can reduce it
+        candidates = np.asarray(tree.query_ball_point(coordinates[critical], radius), dtype=np.int64)
+        candidates = candidates[center_index[candidates] < 0]
+        if len(candidates) > max_candidates:
+            candidates = rng.choice(candidates, max_candidates, replace=False)
+
+        best_score, best_move = (radius, np.count_nonzero(state[1] >= radius)), None
+        for added in candidates.tolist():
+            column = point_distances(coordinates, added)
+            removal_radius, removal_critical = _evaluate_removals(column, state, center_index, num_centers, radius)
+            k = int(np.lexsort((removal_critical, removal_radius))[0])
+            score = (removal_radius[k], removal_critical[k] if removal_radius[k] == radius else 0)
+            if score < best_score:
+                best_score, best_move = score, (added, k)
+
+        if best_move is None:
+            break
+
+        added, k = best_move
+        removed = int(centers[k])
+        centers[k] = added
+        center_index[removed], center_index[added] = -1, k
+        state = _update_nearest_points(coordinates, centers, state, added, removed)
+        radius = state[1].max()
+        swaps += 1
+
+    return centers.tolist(), radius, swaps
+
+
+def euclidean_heuristic(instance_data, restarts=3, max_iterations=1000, max_candidates=20, seed=0, time_limit=60):
+    """Solve the classical p-center problem on a coordinate instance without Gurobi nor distance matrix :
+    farthest-first start then vertex substitution, distances computed from the coordinates.
+    Args:
+        instance_data (dict): Coordinate instance (see read_clients).
+        restarts (int): Number of farthest-first starts.
+        max_iterations (int): Maximum number of swaps of each local search.
+        max_candidates (int): Maximum number of centers tried at each swap.
+        seed (int): Seed of the random first centers and candidates.
+        time_limit (float): Time limit (seconds), the restarts and the swaps stop when it is reached.
+    Returns:
+        dict: A dictionary containing the solution with objective value, centers and assignments.
+    """
+    start = time.perf_counter()
+    coordinates = instance_data['coordinates']
+    num_nodes = instance_data['num_nodes']
+    rng = np.random.default_rng(seed)
+    deadline = start + time_limit
+
+    radius, swaps = np.inf, 0
+    for restart in range(max(1, restarts)):
+        if restart > 0 and time.perf_counter() > deadline:
+            break
+        first = None if restart == 0 else int(rng.integers(num_nodes))
+        start_centers = farthest_first_points(coordinates, instance_data['num_centers'], first=first)
+        candidate, candidate_radius, candidate_swaps = euclidean_local_search(
+            instance_data, start_centers, max_iterations, max_candidates, rng, deadline)
+        swaps += candidate_swaps
+        if candidate_radius < radius:
+            centers, radius = candidate, candidate_radius
+
+    return {
+        'objective_value': float(radius),
+        'gurobi_status': None,
+        'centers': sorted(centers),
+        'assignments': closest_points(coordinates, centers)[0],
+        'swaps': swaps,
+        'time': time.perf_counter() - start,
+    }
+
+
+def euclidean_lower_bound(instance_data):
+    """
+    Lower bound of the optimal radius of a coordinate instance (see bounds.lower_bound) :
+    (p+1)-th largest distance of a point to its nearest other point, and half the smallest distance
+    between p+1 farthest-first points.
+    """
+    coordinates = instance_data['coordinates']
+    num_centers = instance_data['num_centers']
+    if num_centers >= len(coordinates):
+        return 0.0
+
+    nearest = np.sort(spatial_index(instance_data).query(coordinates, k=2)[0][:, 1])[::-1]
+    bound = nearest[num_centers]
+
+    points = coordinates[farthest_first_points(coordinates, num_centers + 1)]
+    gaps = np.sqrt(((points[:, None, :] - points[None, :, :]) ** 2).sum(axis=2)) + np.diag(np.full(len(points), np.inf))
+    return float(max(bound, gaps.min() / 2))
+
+
+def pairs_within(instance_data, radius):
+    """Number of (ordered, including i = j) pairs of points at distance at most radius : nonzeros of the coverage matrix."""
+    tree = spatial_index(instance_data)
+    return int(tree.count_neighbors(tree, radius))
+
+
+def sorted_pairs(instance_data, radius):
+    """
+    Ordered pairs of points (including i = j) at distance at most radius, by increasing distance
+    (KD-tree sparse_distance_matrix).
+    Returns:
+        tuple: (clients, centers, distances) arrays.
+    """
+    tree = spatial_index(instance_data)
+    pairs = tree.sparse_distance_matrix(tree, radius, output_type='ndarray')
+    order = np.argsort(pairs['v'], kind='stable')
+    return pairs['i'][order].astype(np.int32), pairs['j'][order].astype(np.int32), pairs['v'][order]
+
+
+def covering_within(instance_data, radius, num_centers, threads):
+    """
+    Covering model of one radius built from the neighbour lists of the KD-tree (query_pairs, each pair
+    within radius once, and the points themselves), without listing the pairs of a larger radius.
+    Returns:
+        tuple: (model, y).
+    """
+    num_nodes = instance_data['num_nodes']
+    pairs = spatial_index(instance_data).query_pairs(radius, output_type='ndarray')
+    nodes = np.arange(num_nodes)
+    rows = np.concatenate((pairs[:, 0], pairs[:, 1], nodes))
+    columns = np.concatenate((pairs[:, 1], pairs[:, 0], nodes))
+    del pairs
+    matrix = sp.csr_matrix((np.ones(len(rows), dtype=np.float32), (rows, columns)), shape=(num_nodes, num_nodes))
+    model, y, _ = sparse_covering_model(matrix, num_centers)
+    model.setParam('Threads', threads)
+    return model, y
+
+
+def euclidean_radius_search(instance_data, time_limit=3600, lower_bound=None, start=None, threads=1, trace=None,
+                            max_nonzeros=10**8):
+    """Solve the classical p-center problem on a coordinate instance by binary search on the radius.
+    The optimal radius is a distance between two points. While the pairs closer than the best radius found
+    exceed max_nonzeros, the search bisects the radius and builds the covering model of each step from the
+    neighbour lists of that radius only (covering_within), a smaller radius being tried when its model is
+    too large. Once they fit, the pairs are listed once by the KD-tree and sorted, and the search is a binary
+    search over their distinct distances : each step solves a set covering feasibility model, built once
+    (matrix API) and reused between the steps by changing only the coefficients of the pairs between the
+    previous and the new radius, a slice of the sorted pairs (see set_radius for the distance matrix instances).
+    The covering model has about n^2 / p nonzeros for uniform points : when even the model of a radius just
+    above the largest infeasible one exceeds max_nonzeros, the search stops with status GRB.INTERRUPTED and the
+    best centers found (those of start, flagged heuristic_only, if no covering model was solved). When the
+    lower bound already reaches the radius of start, start is optimal : the status is GRB.OPTIMAL without any
+    covering model. The time of a step is that of Gurobi on the covering model, a few seconds at 1,500 points.
+    Args:
+        instance_data (dict): Coordinate instance (see read_clients).
+        time_limit (float): Total time limit (seconds) for all the iterations.
+        lower_bound (float): Lower bound of the optimal radius.
+        start (dict): Known solution (e.g. euclidean_heuristic), the initial upper bound.
+        threads (int): Number of threads used by Gurobi.
+        trace (Trace): Trace receiving the size of the covering model.
+        max_nonzeros (int): Maximum number of nonzeros of a covering model.
+    Returns:
+        dict: The solution with objective value, gurobi status, centers, assignments, iterations (radius,
+            feasibility and time of each step) and heuristic_only (True if the search was interrupted before
+            its first covering model, the radius being that of start).
+    """
+    search_start = time.perf_counter()
+    coordinates = instance_data['coordinates']
+    num_nodes = len(coordinates)
+    num_centers = instance_data['num_centers']
+    if start is None or start['objective_value'] is None:
+        start = euclidean_heuristic(instance_data, restarts=1, time_limit=time_limit / 10)
+
+    centers = list(start['centers'])
+    iterations = []
+    status = GRB.OPTIMAL
+    # the optimal radius is above `below` (the largest infeasible radius) and at most `best`
+    best = float(start['objective_value'])
+    below = float(np.nextafter(lower_bound, -np.inf)) if lower_bound else -1.0
+
+    def solved(model, radius, feasible, iteration_start):
+        if trace is not None and not iterations:
+            trace.record_model(model)
+        iterations.append({'radius': float(radius), 'feasible': feasible, 'time': time.perf_counter() - iteration_start})
+
+    # Too many pairs within the best radius to list them : bisection with one covering model per radius
+    while below < best and pairs_within(instance_data, best) > max_nonzeros:
+        iteration_start = time.perf_counter()
+        remaining = time_limit - (time.perf_counter() - search_start)
+        if remaining <= 0:
+            status = GRB.TIME_LIMIT
+            break
+        if pairs_within(instance_data, max(below, 0.0)) > max_nonzeros:
+            # the covering model of any radius still to test is too large
+            status = GRB.INTERRUPTED
+            break
+        radius = (below + best) / 2
+        while pairs_within(instance_data, radius) > max_nonzeros:
+            middle = (below + radius) / 2
+            if middle in (below, radius):
+                # no float left between below and radius : every radius still to test is too large
+                radius = below
+                break
+            radius = middle
+        if radius <= below:
+            status = GRB.INTERRUPTED
+            break
+        model, y = covering_within(instance_data, radius, num_centers, threads)
+        model.setParam("Timelimit", remaining)
+        model.optimize()
+        model_status = model.Status
+        if model_status == GRB.OPTIMAL:
+            centers = np.flatnonzero(y.X > 0.5).tolist()
+            best = float(closest_points(coordinates, centers)[1].max())
+        elif model_status == GRB.INFEASIBLE:
+            below = radius
+        solved(model, radius, model_status == GRB.OPTIMAL, iteration_start)
+        model.dispose()
+        if model_status not in (GRB.OPTIMAL, GRB.INFEASIBLE):
+            # time limit reached without answer, the best radius found so far is returned
+            status = model_status
+            break
+
+    levels = []
+    if status == GRB.OPTIMAL and below < best:
+        # candidate radii : distinct distances above the largest infeasible radius, up to the best radius
+        clients, pair_centers, distances = sorted_pairs(instance_data, best)
+        levels = np.unique(distances[distances > below])
+    # levels[high] is the radius of the best centers, levels below low are infeasible
+    low, high = 0, len(levels) - 1
+
+    model, y, rows, columns, covered = None, None, None, None, 0
+    while low < high:
+        mid = (low + high) // 2
+        iteration_start = time.perf_counter()
+
+        remaining = time_limit - (time.perf_counter() - search_start)
+        if remaining <= 0:
+            status = GRB.TIME_LIMIT
+            break
+        # the first pairs (by distance) are the coverage coefficients of the radius
+        count = int(np.searchsorted(distances, levels[mid], side='right'))
+        if model is None:
+            matrix = sp.csr_matrix((np.ones(count, dtype=np.float32), (clients[:count], pair_centers[:count])),
+                                   shape=(num_nodes, num_nodes))
+            model, y, coverage = sparse_covering_model(matrix, num_centers)
+            model.setParam('Threads', threads)
+            model.update()
+            rows, columns = coverage.tolist(), y.tolist()
+        else:
+            value = 1.0 if count > covered else 0.0
+            for i, j in zip(clients[min(count, covered):max(count, covered)].tolist(),
+                            pair_centers[min(count, covered):max(count, covered)].tolist()):
+                model.chgCoeff(rows[i], columns[j], value)
+        covered = count
+        model.setParam("Timelimit", remaining)
+        model.optimize()
+
+        if model.Status == GRB.OPTIMAL:
+            feasible = True
+            centers = np.flatnonzero(y.X > 0.5).tolist()
+            radius = float(closest_points(coordinates, centers)[1].max())
+            high = min(mid, int(np.searchsorted(levels, radius)))
+        elif model.Status == GRB.INFEASIBLE:
+            feasible = False
+            low = mid + 1
+        else:
+            # time limit reached without answer, the best radius found so far is returned
+            status = model.Status
+            break
+        solved(model, levels[mid], feasible, iteration_start)
+
+    # Each client is assigned to its closest open center
+    assignments, dist = closest_points(coordinates, centers)
+    return {
+        'objective_value': float(dist.max()),
+        'gurobi_status': status,
+        'centers': sorted(centers),
+        'assignments': assignments,
+        'iterations': iterations,
+        'heuristic_only': status == GRB.INTERRUPTED and not iterations,
+    }
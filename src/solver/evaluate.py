@@ -0,0 +1,300 @@
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import maximum_flow
+
+from .solution import closest_centers, UNASSIGNED
+
+
+def classical_radius(distances, centers, assignments=None):
+    """
+    Radius of a center set for the classical p-center problem : distance of the farthest client
+    to its closest center, or to its assigned center if assignments are given.
+    """
+    distances = np.asarray(distances)
+    if assignments is None:
+        return distances[:, np.asarray(centers)].min(axis=1).max().item()
+    return distances[np.arange(len(distances)), np.asarray(assignments)].max().item()
+
+
+def batch_radius(distances, center_sets, max_elements=2**24):
+    """
+    Radius of many center sets at once (classical p-center problem).
+    Args:
+        distances (np.ndarray): (n, n) distance matrix.
+        center_sets (array-like): (k, p) array, one center set per row.
+        max_elements (int): Maximum size of the (n, chunk, p) intermediate array.
+    Returns:
+        np.ndarray: (k,) radii.
+    """
+    distances = np.asarray(distances)
+    center_sets = np.asarray(center_sets)
+    num_sets, num_centers = center_sets.shape
+    chunk = max(1, max_elements // max(1, len(distances) * num_centers))
+
+    radii = np.empty(num_sets, dtype=distances.dtype)
+    for start in range(0, num_sets, chunk):
+        # (n, chunk, p) distances of each client to the centers of each set
+        sub = distances[:, center_sets[start:start + chunk]]
+        radii[start:start + chunk] = sub.min(axis=2).max(axis=0)
+    return radii
+
+
+def flow_assignment(demands, capacities, clients, centers, num_nodes, fallback=True):
+    """
+    Single source assignment of every client to a center over the eligible pairs (clients[k], centers[k]),
+    with the loads of the centers within their capacities.
+    The split assignment is a max-flow (source -> clients -> centers -> sink), the clients whose demand is split
+    are then assigned one by one (largest demand first) to the eligible center with the most remaining capacity.
+    If this rounding fails, a greedy assignment of all the clients is tried (if fallback is set).
+    Args:
+        demands (np.ndarray): (n,) integer demands.
+        capacities (np.ndarray): (n,) integer capacities (remaining capacity of each node as center).
+        clients, centers (np.ndarray): Eligible client-center pairs, sorted by client.
+        num_nodes (int): Number of nodes.
+        fallback (bool): If set, the greedy assignment is tried when the rounding fails.
+    Returns:
+        np.ndarray: (n,) assignment array, or None if no assignment was found (always None if the split
+            assignment is infeasible, the rounding may also fail on a feasible instance).
+    Raises:
+        ValueError: If the total demand exceeds the int32 arc capacities of the max-flow solver.
+    """
+    demands = np.asarray(demands, dtype=np.int64)
+    capacities = np.maximum(np.asarray(capacities), 0).astype(np.int64)
+    clients, centers = np.asarray(clients), np.asarray(centers)
+    if np.any(np.bincount(clients, minlength=num_nodes) == 0):
+        return None  # a client has no eligible center
+    # maximum_flow converts the capacities to int32 (silently wrapping larger values) : the flow is at most the
+    # total demand, so the center capacities are clipped to it and only the total demand has to fit
+    total_demand = int(demands.sum())
+    if total_demand > np.iinfo(np.int32).max:
+        raise ValueError(f"The total demand {total_demand} exceeds the int32 capacities of the flow network")
+
+    # Flow network : source 0, client i is 1 + i, center j is 1 + n + j, sink 1 + 2n
+    source, sink = 0, 2 * num_nodes + 1
+    used = np.unique(centers)
+    tails = np.concatenate([np.zeros(num_nodes, dtype=np.int64), 1 + clients, 1 + num_nodes + used])
+    heads = np.concatenate([1 + np.arange(num_nodes), 1 + num_nodes + centers, np.full(len(used), sink)])
+    values = np.concatenate([demands, demands[clients], np.minimum(capacities[used], total_demand)])
+    network = sp.csr_matrix((values.astype(np.int32), (tails, heads)), shape=(sink + 1, sink + 1))
+
+    result = maximum_flow(network, source, sink)
+    if result.flow_value < total_demand:
+        return None
+
+    # flow of each eligible pair
+    pair_flow = np.asarray(result.flow[1 + clients, 1 + num_nodes + centers]).ravel()
+    whole = pair_flow == demands[clients]
+    assignment = np.full(num_nodes, UNASSIGNED, dtype=np.int32)
+    assignment[clients[whole]] = centers[whole]
+
+    remaining = capacities - np.bincount(assignment[assignment >= 0], weights=demands[assignment >= 0],
+                                         minlength=num_nodes).astype(np.int64)
+    split = np.flatnonzero(assignment == UNASSIGNED)
+    if len(split) == 0:
+        return assignment
+    bounds = np.searchsorted(clients, np.arange(num_nodes + 1))
+    options = [centers[bounds[i]:bounds[i + 1]] for i in range(num_nodes)]
+    if all(insert_client(i, assignment, remaining, demands, options) for i in split[np.argsort(-demands[split], kind='stable')].tolist()):
+        return assignment
+    if not fallback:
+        return None
+
+    # Rounding failed : greedy assignment from scratch, the clients with the fewest eligible centers first
+    assignment[:] = UNASSIGNED
+    remaining = capacities.copy()
+    order = np.lexsort((-demands, [len(o) for o in options]))
+    if all(insert_client(i, assignment, remaining, demands, options) for i in order.tolist()):
+        return assignment
+    return None
+
+
+def insert_client(i, assignment, remaining, demands, options):
+    """
+    Assign client i to the eligible center with the most remaining capacity. If none has enough capacity,
+    try to make room by moving one client of an eligible center to another of its eligible centers.
+    assignment and remaining (capacity of each center) are updated in place, options[k] are the eligible centers of k.
+    Returns:
+        bool: True if the client was assigned.
+    """
+    eligible = options[i]
+    fits = eligible[remaining[eligible] >= demands[i]]
+    if len(fits):
+        j = fits[np.argmax(remaining[fits])]
+    else:
+        move = None
+        for j in eligible.tolist():
+            for k in np.flatnonzero(assignment == j).tolist():
+                if remaining[j] + demands[k] < demands[i]:
+                    continue
+                others = options[k][(options[k] != j) & (remaining[options[k]] >= demands[k])]
+                if len(others):
+                    move = (k, others[np.argmax(remaining[others])])
+                    break
+            if move is not None:
+                break
+        if move is None:
+            return False
+        k, target = move
+        assignment[k] = target
+        remaining[target] -= demands[k]
+        remaining[j] += demands[k]
+    assignment[i] = j
+    remaining[j] -= demands[i]
+    return True
+
+
+def capacitated_assignment(instance_data, centers, radius, fallback=True):
+    """
+    Assignment of the clients to the centers within radius respecting the capacities (see flow_assignment).
+    Returns:
+        np.ndarray: (n,) assignment array, or None.
+    """
+    distances = np.asarray(instance_data['distances'])
+    centers = np.asarray(centers)
+    clients, index = np.nonzero(distances[:, centers] <= radius)
+    return flow_assignment(instance_data['demands'], instance_data['capacities'], clients, centers[index],
+                           instance_data['num_nodes'], fallback=fallback)
+
+
+def min_capacitated_radius(instance_data, centers):
+    """
+    Smallest radius for which an assignment of the clients to the given centers respects the capacities,
+    by bisection over the distances to the centers (the classical radius is a lower bound).
+    The single source assignment is NP-hard : the radius found is exact when the max-flow is integral
+    at the optimal radius, an upper bound otherwise.
+    Returns:
+        tuple: (radius, assignment array), (None, None) if no assignment was found.
+    """
+    distances = np.asarray(instance_data['distances'])
+    centers = np.asarray(centers)
+    levels = np.unique(distances[:, centers])
+    low = int(np.searchsorted(levels, classical_radius(distances, centers)))
+    high = len(levels) - 1
+
+    best = capacitated_assignment(instance_data, centers, levels[high])
+    if best is None:
+        return None, None
+    while low < high:
+        mid = (low + high) // 2
+        assignment = capacitated_assignment(instance_data, centers, levels[mid])
+        if assignment is None:
+            low = mid + 1
+        else:
+            best, high = assignment, mid
+    return classical_radius(distances, centers, best), best
+
+
+def backup_assignment(instance_data, centers, assignments):
+    """
+    Backup centers of the failure foresight variant : an open center different from the main center,
+    not closer than it, the main and backup loads of each center within (1 + alpha) * capacity.
+    Returns:
+        np.ndarray: (n,) backup assignment array, or None.
+    """
+    distances = np.asarray(instance_data['distances'])
+    demands = np.asarray(instance_data['demands'])
+    capacities = np.asarray(instance_data['capacities'])
+    num_nodes = instance_data['num_nodes']
+    centers = np.asarray(centers)
+    assignments = np.asarray(assignments)
+
+    main_distance = distances[np.arange(num_nodes), assignments]
+    sub = distances[:, centers]
+    eligible = (centers[None, :] != assignments[:, None]) & (sub >= main_distance[:, None])
+    clients, index = np.nonzero(eligible)
+    main_load = np.bincount(assignments, weights=demands, minlength=num_nodes)
+    remaining = np.floor((1 + instance_data['alpha']) * capacities - main_load + 1e-9)
+    return flow_assignment(demands, remaining, clients, centers[index], num_nodes)
+
+
+def check_solution(instance_data, centers, assignments, backup_assignments=None, capacitated=False):
+    """
+    Check the assignments of a solution : open centers, capacities (if capacitated or backup_assignments given)
+    and failure foresight rules (backup open, different and not closer than the main center, (1 + alpha) overload).
+    Returns:
+        list: Violated rules (empty if the solution is feasible).
+    """
+    distances = np.asarray(instance_data['distances'])
+    num_nodes = instance_data['num_nodes']
+    assignments = np.asarray(assignments)
+    is_open = np.zeros(num_nodes, dtype=bool)
+    is_open[np.asarray(centers)] = True
+
+    violations = []
+    if len(centers) != instance_data['num_centers']:
+        violations.append(f"{len(centers)} centers instead of {instance_data['num_centers']}")
+    if np.any(assignments < 0) or not is_open[assignments].all():
+        violations.append("clients not assigned to an open center")
+        return violations
+
+    if capacitated or backup_assignments is not None:
+        demands = np.asarray(instance_data['demands'])
+        capacities = np.asarray(instance_data['capacities'])
+        main_load = np.bincount(assignments, weights=demands, minlength=num_nodes)
+        over = np.flatnonzero(main_load > capacities)
+        if len(over):
+            violations.append(f"capacity exceeded at centers {over.tolist()}")
+
+    if backup_assignments is not None:
+        backup = np.asarray(backup_assignments)
+        if np.any(backup < 0) or not is_open[backup].all():
+            violations.append("clients without an open backup center")
+            return violations
+        if np.any(backup == assignments):
+            violations.append("backup center equal to the main center")
+        rows = np.arange(num_nodes)
+        if np.any(distances[rows, backup] < distances[rows, assignments]):
+            violations.append("backup center closer than the main center")
+        total_load = main_load + np.bincount(backup, weights=demands, minlength=num_nodes)
+        over = np.flatnonzero(total_load > (1 + instance_data['alpha']) * capacities + 1e-9)
+        if len(over):
+            violations.append(f"(1 + alpha) capacity exceeded at centers {over.tolist()}")
+    return violations
+
+
+def evaluate(instance_data, centers, model_class='classical', assignments=None, backup_assignments=None):
+    """Evaluate a center set without Gurobi.
+    Missing assignments are computed : closest centers (classical), smallest radius capacitated assignment
+    (capacitated, failure) and backup assignment (failure).
+    Args:
+        instance_data (dict): The instance data containing distances, number of nodes, etc.
+        centers (list): The open centers.
+        model_class (str): 'classical' (or 'compact', 'radius'), 'capacitated' or 'failure'.
+        assignments, backup_assignments (np.ndarray): Optional (n,) assignment arrays.
+    Returns:
+        dict: The solution (objective value, centers, assignments, primary/backup assignments for 'failure')
+            with the list of violated rules, objective value None if infeasible.
+    """
+    distances = np.asarray(instance_data['distances'])
+    centers = sorted(int(j) for j in centers)
+    capacitated = model_class in ('capacitated', 'failure')
+    if model_class != 'failure':
+        backup_assignments = None
+
+    if assignments is None:
+        if capacitated:
+            _, assignments = min_capacitated_radius(instance_data, centers)
+        else:
+            assignments = closest_centers(distances, centers)
+    if model_class == 'failure' and backup_assignments is None and assignments is not None:
+        backup_assignments = backup_assignment(instance_data, centers, assignments)
+
+    if assignments is None:
+        violations = ["no capacity feasible assignment found"]
+    elif model_class == 'failure' and backup_assignments is None:
+        violations = ["no feasible backup assignment found"]
+    else:
+        violations = check_solution(instance_data, centers, assignments, backup_assignments, capacitated)
+
+    solution = {
+        'objective_value': classical_radius(distances, centers, assignments) if not violations else None,
+        'gurobi_status': None,
+        'centers': centers,
+        'violations': violations,
+    }
+    if model_class == 'failure':
+        solution['primary_assignments'] = assignments
+        solution['backup_assignments'] = backup_assignments
+    else:
+        solution['assignments'] = assignments
+    return solution
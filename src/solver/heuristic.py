@@ -0,0 +1,199 @@
+import time
+
+import numpy as np
+
+from .solution import closest_centers
+
+def farthest_first(distances, num_centers, first=None):
+    """
+    Gonzalez farthest-first traversal, a 2-approximation of the p-center problem.
+    Args:
+        distances (np.ndarray): (n, n) distance matrix.
+        num_centers (int): Number of centers.
+        first (int): First center, by default the best single center.
+    Returns:
+        list: The selected centers.
+    """
+    distances = np.asarray(distances)
+    if first is None:
+        first = int(np.argmin(distances.max(axis=0)))
+
+    centers = [first]
+    closest = distances[:, first].astype(float)
+    while len(centers) < num_centers:
+        # the next center is the client farthest from the current centers
+        farthest = int(np.argmax(closest))
+        if closest[farthest] == 0:
+            # every client is already a center or at distance 0 of one, any other node will do
+            farthest = next(j for j in range(len(closest)) if j not in centers)
+        centers.append(farthest)
+        np.minimum(closest, distances[:, farthest], out=closest)
+    return centers
+
+
+def nearest_two(distances, centers):
+    """
+    Nearest and second nearest centers of each client.
+    Returns:
+        tuple: (first, first_dist, second, second_dist) arrays of size n, first and second are node indices.
+            When there is a single center, second_dist is inf.
+    """
+    centers = np.asarray(centers)
+    sub = np.asarray(distances)[:, centers].astype(float)
+    num_nodes = sub.shape[0]
+    if len(centers) == 1:
+        return (np.full(num_nodes, centers[0]), sub[:, 0],
+                np.full(num_nodes, centers[0]), np.full(num_nodes, np.inf))
+
+    two = np.argpartition(sub, 1, axis=1)[:, :2]
+    rows = np.arange(num_nodes)[:, None]
+    two_dist = sub[rows, two]
+    swap = two_dist[:, 0] > two_dist[:, 1]
+    two[swap] = two[swap][:, ::-1]
+    two_dist[swap] = two_dist[swap][:, ::-1]
+    return centers[two[:, 0]], two_dist[:, 0], centers[two[:, 1]], two_dist[:, 1]
+
+
+def _update_nearest(distances, centers, state, added, removed):
+    """
+    Update the nearest / second nearest arrays after replacing the center removed by added.
+    Only the clients whose nearest or second nearest center was removed are recomputed over all centers.
+    """
+    first, first_dist, second, second_dist = state
+    column = distances[:, added]
+
+    # Clients whose nearest or second nearest center disappears
+    lost = (first == removed) | (second == removed)
+
+    closer = ~lost & (column < first_dist)
+    second[closer], second_dist[closer] = first[closer], first_dist[closer]
+    first[closer], first_dist[closer] = added, column[closer]
+    between = ~lost & ~closer & (column < second_dist)
+    second[between], second_dist[between] = added, column[between]
+
+    if lost.any():
+        rows = np.flatnonzero(lost)
+        f, fd, s, sd = nearest_two(distances[rows], centers)
+        first[rows], first_dist[rows], second[rows], second_dist[rows] = f, fd, s, sd
+    return first, first_dist, second, second_dist
+
+
+def _evaluate_removals(column, state, center_index, num_centers, radius):
+    """
+    Evaluate adding the center of the given distance column and removing each current center,
+    for all the removals at once in O(n + p).
+    Returns:
+        tuple: (radius, number of clients at distance >= current radius) for the removal of each center
+            (in the order of center_index).
+    """
+    first, first_dist, _, second_dist = state
+    groups = center_index[first]
+    # client distance if its nearest center is kept / removed
+    kept = np.minimum(column, first_dist)
+    moved = np.minimum(column, second_dist)
+
+    kept_max = np.full(num_centers, -np.inf)
+    np.maximum.at(kept_max, groups, kept)
+    moved_max = np.full(num_centers, -np.inf)
+    np.maximum.at(moved_max, groups, moved)
+
+    # maximum of kept over the clients of the other centers : top two of the group maxima
+    order = np.argsort(kept_max)
+    others_max = np.full(num_centers, kept_max[order[-1]])
+    others_max[order[-1]] = kept_max[order[-2]] if num_centers > 1 else -np.inf
+
+    # critical clients (still at distance >= radius) with the same decomposition
+    kept_critical = np.bincount(groups, weights=kept >= radius, minlength=num_centers)
+    moved_critical = np.bincount(groups, weights=moved >= radius, minlength=num_centers)
+    critical = kept_critical.sum() - kept_critical + moved_critical
+
+    return np.maximum(others_max, moved_max), critical
+
+
+def local_search(distances, centers, max_iterations=1000):
+    """
+    Vertex substitution local search for the p-center problem.
+    At each iteration, the best swap (center added close to a critical client, center removed) is applied
+    while it reduces the radius, or the number of clients at the radius when the radius does not change.
+    Args:
+        distances (np.ndarray): (n, n) distance matrix.
+        centers (list): Initial centers.
+        max_iterations (int): Maximum number of swaps.
+    Returns:
+        tuple: (centers, radius, number of swaps).
+    """
+    distances = np.asarray(distances)
+    num_nodes = distances.shape[0]
+    centers = np.array(centers)
+    num_centers = len(centers)
+    state = nearest_two(distances, centers)
+    radius = state[1].max()
+    if num_centers == num_nodes:
+        return centers.tolist(), radius, 0
+
+    center_index = np.full(num_nodes, -1)
+    center_index[centers] = np.arange(num_centers)
+
+    swaps = 0
+    while swaps < max_iterations and radius > 0:
+        critical = int(np.argmax(state[1]))
+        # Only a center closer to the critical client than the radius can reduce it
+        candidates = np.flatnonzero((distances[critical] < radius) & (center_index < 0))
+
+        best_score, best_move = (radius, np.count_nonzero(state[1] >= radius)), None
+        for added in candidates.tolist():
+            removal_radius, removal_critical = _evaluate_removals(distances[:, added], state, center_index, num_centers, radius)
+            k = int(np.lexsort((removal_critical, removal_radius))[0])
+            score = (removal_radius[k], removal_critical[k] if removal_radius[k] == radius else 0)
+            if score < best_score:
+                best_score, best_move = score, (added, k)
+
+        if best_move is None:
+            break
+
+        added, k = best_move
+        removed = int(centers[k])
+        centers[k] = added
+        center_index[removed], center_index[added] = -1, k
+        state = _update_nearest(distances, centers, state, added, removed)
+        radius = state[1].max()
+        swaps += 1
+
+    return centers.tolist(), radius, swaps
+
+
+def heuristic(instance_data, restarts=10, max_iterations=1000, seed=0):
+    """Solve the classical p-center problem without Gurobi : farthest-first start then vertex substitution.
+    The first start begins with the best single center, the other ones with a random first center.
+    Args:
+        instance_data (dict): The instance data containing distances, number of nodes, etc.
+        restarts (int): Number of farthest-first starts.
+        max_iterations (int): Maximum number of swaps of each local search.
+        seed (int): Seed of the random first centers.
+    Returns:
+        dict: A dictionary containing the solution with objective value, centers and assignments.
+    """
+    start = time.perf_counter()
+    distances = np.asarray(instance_data['distances'])
+    num_nodes = instance_data['num_nodes']
+    rng = np.random.default_rng(seed)
+
+    radius, swaps = np.inf, 0
+    for restart in range(max(1, restarts)):
+        first = None if restart == 0 else int(rng.integers(num_nodes))
+        start_centers = farthest_first(distances, instance_data['num_centers'], first=first)
+        candidate, candidate_radius, candidate_swaps = local_search(distances, start_centers, max_iterations)
+        swaps += candidate_swaps
+        if candidate_radius < radius:
+            centers, radius = candidate, candidate_radius
+
+    # radius read from the distances : a Python number of their type (the search works on float arrays)
+    assignments = closest_centers(distances, centers)
+    return {
+        'objective_value': distances[np.arange(num_nodes), assignments].max().item(),
+        'gurobi_status': None,
+        'centers': sorted(centers),
+        'assignments': assignments,
+        'swaps': swaps,
+        'time': time.perf_counter() - start,
+    }
@@ -0,0 +1,64 @@
+import time
+
+import numpy as np
+from gurobipy import GRB, LinExpr
+
+def lazy_callback(instance_data, model, x, w=None, tolerance=1e-6):
+    """Callback adding the maximum distance rows (and the backup distance rows of the failure model)
+    only when an integer solution violates them. The model must be built with lazy=True.
+    Args:
+        instance_data (dict): The instance data containing distances, number of nodes, etc.
+        model: The Gurobi model (classical, capacitated or failure).
+        x, w: Main and backup assignment variables (MVar over model._pairs['x'] and model._pairs['w']).
+        tolerance (float): Violation tolerance.
+    Returns:
+        tuple: (callback, stats) where stats is filled during the optimization with the number of
+            cuts and the list of rounds (cuts added and time spent in each callback call).
+    """
+    distances = np.asarray(instance_data['distances'])
+    num_nodes = instance_data['num_nodes']
+
+    clients, centers = model._pairs['x']
+    pair_distances = distances[clients, centers].astype(float)
+    # the pairs are in row-major order : the pairs of client i are in [x_start[i], x_start[i+1])
+    x_start = np.searchsorted(clients, np.arange(num_nodes + 1))
+    x_vars = x.tolist()
+    max_distance = model._max_distance.tolist()[0]
+
+    if w is not None:
+        backup_clients, backup_centers = model._pairs['w']
+        backup_distances = distances[backup_clients, backup_centers].astype(float)
+        w_start = np.searchsorted(backup_clients, np.arange(num_nodes + 1))
+        w_vars = w.tolist()
+
+    stats = {'cuts': 0, 'rounds': []}
+
+    def callback(model, where):
+        if where != GRB.Callback.MIPSOL:
+            return
+        start = time.perf_counter()
+        x_values = np.array(model.cbGetSolution(x_vars))
+        radius = model.cbGetSolution(max_distance)
+
+        # Maximum distance rows : d(i, j) * x[i, j] <= max_distance
+        chosen = np.flatnonzero(x_values > 0.5)
+        violated = chosen[pair_distances[chosen] > radius + tolerance]
+        for k in violated.tolist():
+            model.cbLazy(pair_distances[k] * x_vars[k] <= max_distance)
+        cuts = len(violated)
+
+        if w is not None:
+            # Backup distance rows : the backup center is at least as far as the main center
+            w_values = np.array(model.cbGetSolution(w_vars))
+            primary = np.bincount(clients, weights=pair_distances * x_values, minlength=num_nodes)
+            backup = np.bincount(backup_clients, weights=backup_distances * w_values, minlength=num_nodes)
+            for i in np.flatnonzero(backup < primary - tolerance).tolist():
+                backup_expr = LinExpr(backup_distances[w_start[i]:w_start[i+1]].tolist(), w_vars[w_start[i]:w_start[i+1]])
+                primary_expr = LinExpr(pair_distances[x_start[i]:x_start[i+1]].tolist(), x_vars[x_start[i]:x_start[i+1]])
+                model.cbLazy(backup_expr >= primary_expr)
+                cuts += 1
+
+        stats['cuts'] += cuts
+        stats['rounds'].append({'cuts': cuts, 'time': time.perf_counter() - start})
+
+    return callback, stats
@@ -0,0 +1,363 @@
+import math
+import multiprocessing
+import os
+import queue
+import time
+
+import numpy as np
+from gurobipy import GRB
+
+from .solve import solve
+from .heuristic import heuristic
+from .capacitated_heuristic import capacitated_heuristic
+from .bounds import compute_bounds
+from .solution import closest_centers, assignment_array, UNASSIGNED
+from .evaluate import classical_radius
+
+# Default strategies of each problem, one process each (the first ones are kept when there are fewer workers).
+# 'model_class' is a model class of solve or 'heuristic', 'params' are the Gurobi parameters of the model
+# (keyword arguments of the heuristic for 'heuristic').
+STRATEGIES = {
+    'classical': [
+        {'name': 'classical', 'model_class': 'classical', 'params': {}},
+        {'name': 'compact', 'model_class': 'compact', 'params': {}},
+        {'name': 'radius', 'model_class': 'radius', 'params': {}},
+        {'name': 'heuristic', 'model_class': 'heuristic', 'params': {'restarts': 100, 'seed': 1}},
+        {'name': 'classical-feasibility', 'model_class': 'classical', 'params': {'MIPFocus': 1, 'Seed': 1}},
+        {'name': 'compact-bound', 'model_class': 'compact', 'params': {'MIPFocus': 2, 'Seed': 2}},
+        {'name': 'classical-bound', 'model_class': 'classical', 'params': {'MIPFocus': 3, 'Seed': 3}},
+        {'name': 'compact-feasibility', 'model_class': 'compact', 'params': {'MIPFocus': 1, 'Seed': 4}},
+    ],
+    'capacitated': [
+        {'name': 'capacitated', 'model_class': 'capacitated', 'params': {}},
+        {'name': 'heuristic', 'model_class': 'heuristic', 'params': {'restarts': 50, 'seed': 1}},
+        {'name': 'capacitated-feasibility', 'model_class': 'capacitated', 'params': {'MIPFocus': 1, 'Seed': 1}},
+        {'name': 'capacitated-bound', 'model_class': 'capacitated', 'params': {'MIPFocus': 2, 'Seed': 2}},
+        {'name': 'capacitated-optimality', 'model_class': 'capacitated', 'params': {'MIPFocus': 3, 'Seed': 3}},
+    ],
+    'failure': [
+        {'name': 'failure', 'model_class': 'failure', 'params': {}},
+        {'name': 'heuristic', 'model_class': 'heuristic', 'params': {'restarts': 50, 'seed': 1}},
+        {'name': 'failure-feasibility', 'model_class': 'failure', 'params': {'MIPFocus': 1, 'Seed': 1}},
+        {'name': 'failure-bound', 'model_class': 'failure', 'params': {'MIPFocus': 2, 'Seed': 2}},
+        {'name': 'failure-optimality', 'model_class': 'failure', 'params': {'MIPFocus': 3, 'Seed': 3}},
+    ],
+}
+
+# Seconds given to the processes after the time limit (preprocessing, build) before they are killed
+GRACE_TIME = 10
+
+
+class SharedIncumbent:
+    """
+    Best solution and best lower bound of the radius shared (in shared memory) by the processes of a portfolio.
+    Each process publishes its solutions and bounds, the Gurobi ones receive the better solutions of the others
+    as new incumbents (which also cuts their search tree) through the callback. The gap is closed when the best
+    solution reaches the best bound : every process is then stopped.
+    """
+
+    def __init__(self, num_nodes, context=None, tolerance=1e-6):
+        context = context if context is not None else multiprocessing.get_context('spawn')
+        self.tolerance = tolerance
+        self.lock = context.Lock()
+        self.stop = context.Event()
+        self.objective = context.Value('d', math.inf, lock=False)
+        self.bound = context.Value('d', -math.inf, lock=False)
+        self.version = context.Value('i', 0, lock=False)   # number of published solutions
+        self.owner = context.Value('i', -1, lock=False)    # strategy of the best solution
+        self.closer = context.Value('i', -1, lock=False)   # strategy whose solution or bound closed the gap
+        self.num_open = context.Value('i', 0, lock=False)
+        self.centers = context.Array('i', num_nodes, lock=False)
+        self.assignments = context.Array('i', num_nodes, lock=False)
+        self.backup = context.Array('i', num_nodes, lock=False)
+        self.strategy = -1  # strategy of the current process, set in each worker
+
+    def _close(self):
+        # The lock is held : the first strategy that closes the gap stops the portfolio
+        if self.objective.value <= self.bound.value + self.tolerance and self.closer.value < 0:
+            self.closer.value = self.strategy
+            self.stop.set()
+
+    def publish(self, solution):
+        """Share a solution if it is better than the best one. Returns True if it was shared."""
+        objective = solution.get('objective_value')
+        if objective is None or objective >= self.objective.value - self.tolerance:
+            return False
+        with self.lock:
+            if objective >= self.objective.value - self.tolerance:
+                return False
+            centers = np.asarray(solution['centers'], dtype=np.int32)
+            np.frombuffer(self.centers, dtype=np.int32)[:len(centers)] = centers
+            self.num_open.value = len(centers)
+            np.frombuffer(self.assignments, dtype=np.int32)[:] = solution.get('assignments', solution.get('primary_assignments'))
+            if 'backup_assignments' in solution:
+                np.frombuffer(self.backup, dtype=np.int32)[:] = solution['backup_assignments']
+            self.objective.value = objective
+            self.owner.value = self.strategy
+            self.version.value += 1
+            self._close()
+        return True
+
+    def raise_bound(self, bound):
+        """Share a lower bound of the optimal radius if it is better than the best one."""
+        if bound <= self.bound.value + self.tolerance:
+            return
+        with self.lock:
+            if bound > self.bound.value:
+                self.bound.value = bound
+                self._close()
+
+    def snapshot(self, lock=True):
+        """
+        Best solution as a dictionary (objective_value, centers, assignments, backup_assignments), None if there is none.
+        lock must be False once the processes were killed (one of them may have held it).
+        """
+        if lock:
+            with self.lock:
+                return self.snapshot(lock=False)
+        if self.objective.value == math.inf:
+            return None
+        return {
+            'objective_value': self.objective.value,
+            'centers': np.frombuffer(self.centers, dtype=np.int32)[:self.num_open.value].tolist(),
+            'assignments': np.frombuffer(self.assignments, dtype=np.int32).copy(),
+            'backup_assignments': np.frombuffer(self.backup, dtype=np.int32).copy(),
+            'version': self.version.value,
+        }
+
+    def callback(self, instance_data, model_class, model, x=None, w=None, y=None):
+        """
+        Gurobi callback of a model of solve : publishes its bound and its new solutions, sets the better
+        solutions of the other processes as incumbent, and stops the optimization when the portfolio stops.
+        """
+        distances = np.asarray(instance_data['distances'])
+        num_nodes = instance_data['num_nodes']
+        y_vars = y.tolist()
+        x_vars = x.tolist() if x is not None else None
+        w_vars = w.tolist() if w is not None else None
+        max_distance = getattr(model, '_max_distance', None)
+        max_distance = max_distance.tolist() if max_distance is not None else None
+        seen = [0]  # last solution set as incumbent or published by this process
+
+        def callback_solution(model):
+            # Solution of a MIPSOL callback, in the format of solve
+            centers = np.flatnonzero(np.array(model.cbGetSolution(y_vars)) > 0.5).tolist()
+            solution = {'centers': centers}
+            if model_class == 'compact':
+                solution['assignments'] = closest_centers(distances, centers)
+            else:
+                solution['assignments'] = assignment_array(num_nodes, *model._pairs['x'], model.cbGetSolution(x_vars))
+            if model_class == 'failure':
+                solution['backup_assignments'] = assignment_array(num_nodes, *model._pairs['w'], model.cbGetSolution(w_vars))
+            if np.any(solution['assignments'] == UNASSIGNED):
+                return None
+            solution['objective_value'] = classical_radius(distances, centers, solution['assignments'])
+            return solution
+
+        def set_incumbent(model, best):
+            # Partial solutions are completed by Gurobi (z levels of the compact formulation, unknown pairs)
+            values = np.zeros(num_nodes)
+            values[best['centers']] = 1
+            model.cbSetSolution(y_vars, values.tolist())
+            if x_vars is not None:
+                assignments = best['assignments'] if model_class != 'classical' else closest_centers(distances, best['centers'])
+                clients, centers = model._pairs['x']
+                model.cbSetSolution(x_vars, (assignments[clients] == centers).astype(float).tolist())
+            if w_vars is not None:
+                clients, centers = model._pairs['w']
+                model.cbSetSolution(w_vars, (best['backup_assignments'][clients] == centers).astype(float).tolist())
+            if max_distance is not None:
+                model.cbSetSolution(max_distance, [best['objective_value']])
+            model.cbUseSolution()
+
+        def callback(model, where):
+            if where == GRB.Callback.MIP:
+                # The bound is only shared with an incumbent : with a cutoff and no incumbent, Gurobi reports
+                # the cutoff (or infinity) once the tree is pruned
+                incumbent = model.cbGet(GRB.Callback.MIP_OBJBST)
+                if incumbent < GRB.INFINITY:
+                    self.raise_bound(min(model.cbGet(GRB.Callback.MIP_OBJBND), incumbent))
+                if self.stop.is_set():
+                    model.terminate()
+            elif where == GRB.Callback.MIPSOL:
+                solution = callback_solution(model)
+                if solution is not None and self.publish(solution):
+                    seen[0] = self.version.value
+            elif where == GRB.Callback.MIPNODE and model.cbGet(GRB.Callback.MIPNODE_STATUS) == GRB.OPTIMAL:
+                if self.version.value != seen[0] and self.objective.value < model.cbGet(GRB.Callback.MIPNODE_OBJBST) - self.tolerance:
+                    best = self.snapshot()
+                    seen[0] = best['version']
+                    set_incumbent(model, best)
+
+        return callback
+
+
+def run_heuristic(instance_data, problem, time_limit, **params):
+    """Heuristic of a problem (capacitated heuristic for the capacitated variants)."""
+    if problem in ('capacitated', 'failure'):
+        return capacitated_heuristic(instance_data, failure=problem == 'failure', time_limit=time_limit, **params)
+    return heuristic(instance_data, **params)
+
+
+def run_strategy(index, strategy, instance_data, problem, shared, results, time_limit, options, quiet):
+    """
+    Process of a strategy : solves the instance, shares its solution and puts its report in the results queue.
+    The report says if the strategy proved the optimality on its own (optimal Gurobi status, or heuristic
+    solution reaching the lower bound).
+    """
+    if quiet:
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, 1)
+        os.close(devnull)
+    shared.strategy = index
+    start = time.perf_counter()
+    report = {'name': strategy['name'], 'model_class': strategy['model_class'], 'objective_value': None,
+              'gurobi_status': None, 'proved': False, 'error': None}
+    try:
+        if strategy['model_class'] == 'heuristic':
+            solution = run_heuristic(instance_data, problem, time_limit, **strategy.get('params', {}))
+            shared.publish(solution)
+            lower_bound, _ = compute_bounds(instance_data, problem)
+            shared.raise_bound(lower_bound)
+            report['proved'] = solution['objective_value'] is not None and solution['objective_value'] <= lower_bound + shared.tolerance
+        else:
+            solution = solve(instance_data, strategy['model_class'], time_limit=time_limit, params=strategy.get('params'),
+                             share=shared, **options)
+            shared.publish(solution)
+            report['proved'] = solution['gurobi_status'] == GRB.OPTIMAL
+        report['objective_value'] = solution['objective_value']
+        report['gurobi_status'] = solution['gurobi_status']
+    except Exception as e:
+        report['error'] = str(e)
+    report['time'] = time.perf_counter() - start
+    results.put((index, report))
+
+
+def portfolio_status(reports, finished, winner, owner):
+    """
+    Gurobi status of a portfolio : optimal when a strategy proved the optimality, time limit when the portfolio
+    stopped at its deadline. When every strategy ended, the status they all ended with (infeasible when every
+    Gurobi strategy proved the infeasibility), or else the status of the strategy that found the best solution
+    (None when no strategy ran Gurobi, as for the heuristic solutions).
+    Args:
+        reports (dict): Reports of the ended strategies, by index.
+        finished (bool): True if every strategy ended before the deadline.
+        winner (int): Index of the strategy that proved the optimality, or None.
+        owner (int): Index of the strategy that found the best solution, negative if there is none.
+    """
+    if winner is not None:
+        return GRB.OPTIMAL
+    if not finished:
+        return GRB.TIME_LIMIT
+    statuses = [report['gurobi_status'] for report in reports.values() if report['gurobi_status'] is not None]
+    if len(set(statuses)) <= 1:
+        return statuses[0] if statuses else None
+    if owner in reports and reports[owner]['gurobi_status'] is not None:
+        return reports[owner]['gurobi_status']
+    return statuses[0]
+
+
+def portfolio(instance_data, problem='classical', strategies=None, workers=None, time_limit=3600, options=None, quiet=True):
+    """Race several strategies (formulations, Gurobi settings, heuristic) on the same instance, one process each.
+    The processes share their solutions and bounds (SharedIncumbent) : a better solution found by one of them
+    becomes the incumbent, so a cutoff, of the Gurobi ones. The portfolio returns as soon as a strategy proves the
+    optimality, or the best solution reaches the best bound of all the strategies, and kills the other processes.
+    Args:
+        instance_data (dict): The instance data containing distances, number of nodes, etc.
+        problem (str): 'classical', 'capacitated' or 'failure'.
+        strategies (list): Strategies ({'name', 'model_class', 'params'}), by default STRATEGIES[problem].
+        workers (int): Number of strategies run (the first ones), by default one per core.
+        time_limit (float): Time limit (seconds) of each strategy.
+        options (dict): warm_start, reduce, lazy and threads options given to solve.
+        quiet (bool): If set, the logs of the processes are discarded.
+    Returns:
+        dict: The best solution (see solve, with the status of portfolio_status) with the name of the winning
+            strategy ('winner', None if the optimality was not proved), the strategy that found the best solution ('incumbent_strategy'), the best lower bound
+            and the report of each strategy ('strategies', a strategy killed before its end has no objective value).
+    Raises:
+        ValueError: If the problem is not supported or the instance has no distance matrix.
+    """
+    if problem not in STRATEGIES:
+        raise ValueError(f"Unsupported problem for a portfolio: {problem}")
+    if 'distances' not in instance_data:
+        raise ValueError("The portfolio needs a distance matrix, coordinate instances are solved with model_class='radius'")
+    strategies = strategies if strategies is not None else STRATEGIES[problem]
+    workers = workers if workers is not None else os.cpu_count() or 1
+    strategies = strategies[:max(1, workers)]
+    options = options or {}
+
+    # Lazy distances are computed once here, before the processes are started
+    instance_data['distances']
+    num_nodes = instance_data['num_nodes']
+    # spawned processes, as the workers of the solver service : forking a process that already loaded the
+    # Gurobi library is unsafe (the instance is pickled to the processes)
+    context = multiprocessing.get_context('spawn')
+    shared = SharedIncumbent(num_nodes, context)
+    results = context.Queue()
+    processes = [context.Process(target=run_strategy, daemon=True,
+                                 args=(k, strategy, instance_data, problem, shared, results, time_limit, options, quiet))
+                 for k, strategy in enumerate(strategies)]
+
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+
+    reports, winner = {}, None
+    deadline = start + time_limit + GRACE_TIME
+    while len(reports) < len(processes) and winner is None:
+        try:
+            index, report = results.get(timeout=0.05)
+        except queue.Empty:
+            if shared.stop.is_set():
+                winner = shared.closer.value
+            elif time.perf_counter() > deadline:
+                break
+            continue
+        reports[index] = report
+        if report['proved']:
+            winner = index
+    if winner is None and shared.stop.is_set():
+        winner = shared.closer.value
+
+    # The other strategies are killed
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+        process.join()
+    elapsed = time.perf_counter() - start
+
+    best = shared.snapshot(lock=False)
+    bound = shared.bound.value if shared.bound.value > -math.inf else None
+    solution = {
+        'objective_value': None,
+        'gurobi_status': portfolio_status(reports, len(reports) == len(processes), winner, shared.owner.value),
+        'centers': [],
+        'assignments': np.full(num_nodes, UNASSIGNED, dtype=np.int32),
+    }
+    if best is not None:
+        # Exact radius of the assignments (the shared value is a float)
+        objective = classical_radius(instance_data['distances'], best['centers'], best['assignments'])
+        solution.update({'objective_value': objective, 'centers': sorted(best['centers'])})
+        if problem == 'failure':
+            del solution['assignments']
+            solution['primary_assignments'], solution['backup_assignments'] = best['assignments'], best['backup_assignments']
+        else:
+            solution['assignments'] = best['assignments']
+    objective = solution['objective_value']
+    if winner is not None:
+        # the proved optimum is the best bound
+        bound = objective
+        solution['gap'] = 0.0
+    else:
+        solution['gap'] = abs(objective - bound) / abs(objective) if objective and bound is not None else None
+    solution.update({
+        'winner': strategies[winner]['name'] if winner is not None else None,
+        'incumbent_strategy': strategies[shared.owner.value]['name'] if shared.owner.value >= 0 else None,
+        'lower_bound': bound,
+        'strategies': [reports.get(k, {'name': strategy['name'], 'model_class': strategy['model_class'],
+                                       'objective_value': None, 'gurobi_status': None, 'proved': False,
+                                       'error': None, 'time': None})
+                       for k, strategy in enumerate(strategies)],
+        'time': elapsed,
+    })
+    return solution
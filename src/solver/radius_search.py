@@ -0,0 +1,91 @@
+import time
+
+import numpy as np
+from gurobipy import GRB
+
+from ..models.covering import covering_model, set_radius
+from .solution import closest_centers
+
+def radius_search(instance_data, time_limit=3600, lower_bound=None, start=None, threads=1, trace=None):
+    """Solve the classical p-center problem by binary search over the sorted distinct distances.
+    Each step solves a set covering feasibility model (can p centers cover every client within r ?),
+    the same model is reused between the steps by changing only the coverage coefficients.
+    Args:
+        instance_data (dict): The instance data containing distances, number of nodes, etc.
+        time_limit (float): Total time limit (seconds) for all the iterations.
+        lower_bound (float): Lower bound of the optimal radius.
+        start (dict): Known solution (e.g. heuristic), its objective value is used as upper bound.
+        threads (int): Number of threads used by Gurobi.
+        trace (Trace): Trace receiving the size of the covering model.
+    Returns:
+        dict: The solution with objective value, gurobi status, centers, assignments
+            and iterations (radius, feasibility and time of each step).
+    """
+    search_start = time.perf_counter()
+    distances = np.asarray(instance_data['distances'])
+    num_nodes = instance_data['num_nodes']
+    num_centers = instance_data['num_centers']
+
+    levels = np.unique(distances)
+
+    # Upper bound : the best single center covers everybody, the p-1 other centers are arbitrary
+    eccentricities = distances.max(axis=0)
+    best_center = int(np.argmin(eccentricities))
+    centers = [best_center] + [j for j in range(num_nodes) if j != best_center][:num_centers - 1]
+    low, high = 0, int(np.searchsorted(levels, eccentricities[best_center]))
+    if start is not None and start['objective_value'] < levels[high]:
+        centers = list(start['centers'])
+        high = int(np.searchsorted(levels, start['objective_value']))
+    if lower_bound is not None:
+        low = min(high, int(np.searchsorted(levels, lower_bound)))
+
+    iterations = []
+    status = GRB.OPTIMAL
+    model, y, coverage, radius = None, None, None, None
+    while low < high:
+        mid = (low + high) // 2
+        iteration_start = time.perf_counter()
+
+        if model is None:
+            model, y, coverage = covering_model(instance_data, levels[mid])
+            model.setParam('Threads', threads)
+        else:
+            set_radius(model, y, coverage, distances, radius, levels[mid])
+        radius = levels[mid]
+
+        remaining = time_limit - (time.perf_counter() - search_start)
+        if remaining <= 0:
+            status = GRB.TIME_LIMIT
+            break
+        model.setParam("Timelimit", remaining)
+        model.optimize()
+        if trace is not None and not iterations:
+            trace.record_model(model)
+
+        if model.Status == GRB.OPTIMAL:
+            feasible = True
+            centers = np.flatnonzero(np.array(model.getAttr('X', y.values())) > 0.5).tolist()
+            high = mid
+        elif model.Status == GRB.INFEASIBLE:
+            feasible = False
+            low = mid + 1
+        else:
+            # time limit reached without answer, the best radius found so far is returned
+            status = model.Status
+            break
+
+        iterations.append({
+            'radius': levels[mid].item(),
+            'feasible': feasible,
+            'time': time.perf_counter() - iteration_start,
+        })
+
+    # Each client is assigned to its closest open center
+    closest = closest_centers(distances, centers)
+    return {
+        'objective_value': distances[np.arange(num_nodes), closest].max().item(),
+        'gurobi_status': status,
+        'centers': centers,
+        'assignments': closest,
+        'iterations': iterations,
+    }
@@ -0,0 +1,51 @@
+import numpy as np
+
+from .solve import solve
+from .sweep import add_centers
+from .evaluate import evaluate
+
+
+def warm_start(graph, model_class, previous):
+    """
+    Solution of an updated instance built from the centers of a previous solution : the centers still active
+    (by id, see InstanceGraph) are completed farthest-first, then improved by vertex substitution for the
+    classical formulations or given the assignments computed by evaluate for the capacitated variants.
+    Args:
+        graph (InstanceGraph): The updated instance.
+        model_class (str): The model class of the re-solve (see solve).
+        previous (dict): Solution before the updates, with center_ids (resolve) or centers (solution of the
+            instance before any node was deactivated).
+    Returns:
+        dict: The solution, None if no center is left or if no feasible assignment was found.
+    """
+    instance_data = graph.instance
+    ids = np.asarray(previous.get('center_ids', previous['centers']), dtype=np.int64)
+    ids = ids[np.isin(ids, graph.node_ids)]
+    centers = np.searchsorted(graph.node_ids, ids)[:instance_data['num_centers']].tolist()
+    if not centers:
+        return None
+
+    start = add_centers(instance_data, model_class, {'centers': centers})
+    if model_class in ('capacitated', 'failure'):
+        start = evaluate(instance_data, start['centers'], model_class)
+    return start if start['objective_value'] is not None else None
+
+
+def resolve(graph, model_class='classical', previous=None, **options):
+    """
+    Solve the instance of an InstanceGraph after updates, warm-started from a previous solution : the
+    solution of warm_start (previous centers) replaces the heuristic as MIP start and upper bound.
+    Args:
+        graph (InstanceGraph): The updated instance.
+        model_class (str): The model class (see solve).
+        previous (dict): Solution before the updates (of solve or resolve), None for the heuristic start.
+        options: Other arguments of solve (warm_start, reduce, lazy, time_limit, threads, trace).
+    Returns:
+        dict: The solution (see solve) with the ids of its centers (center_ids) and the objective value of
+            the warm start (start_value, None without warm start).
+    """
+    start = warm_start(graph, model_class, previous) if previous is not None else None
+    solution = solve(graph.instance, model_class, start=start, **options)
+    solution['center_ids'] = graph.node_ids[solution['centers']].tolist()
+    solution['start_value'] = start['objective_value'] if start is not None else None
+    return solution
@@ -0,0 +1,26 @@
+import numpy as np
+
+# Client assignments are stored as NumPy arrays : assignment[i] is the center of client i (-1 if unassigned)
+UNASSIGNED = -1
+
+
+def closest_centers(distances, centers):
+    """
+    Closest center of each client.
+    Returns:
+        np.ndarray: (n,) array of node indices.
+    """
+    centers = np.asarray(centers)
+    return centers[np.argmin(np.asarray(distances)[:, centers], axis=1)].astype(np.int32)
+
+
+def assignment_array(num_nodes, clients, centers, values):
+    """
+    Assignment array from the values of assignment variables over the client-center pairs (clients, centers).
+    Returns:
+        np.ndarray: (n,) array, the center of each client (UNASSIGNED if no pair is chosen).
+    """
+    assignment = np.full(num_nodes, UNASSIGNED, dtype=np.int32)
+    chosen = np.asarray(values) > 0.5
+    assignment[clients[chosen]] = centers[chosen]
+    return assignment
@@ -1,63 +1,237 @@
+import warnings
+
 from gurobipy import GRB
+import numpy as np
 from ..models.classical import classical_model
+from ..models.compact import compact_model
 from ..models.capacitated import capacitated_model
 from ..models.failure import failure_model
+from .radius_search import radius_search
+from .euclidean import euclidean_radius_search, euclidean_heuristic, euclidean_lower_bound
+from .heuristic import heuristic
+from .capacitated_heuristic import capacitated_heuristic
+from .bounds import compute_bounds
+from .lazy import lazy_callback
+from .solution import closest_centers, assignment_array, UNASSIGNED
+from .evaluate import classical_radius
+from ..io_utils.trace import Trace
+
+
+def set_warm_start(model, model_class, start, x=None, y=None, w=None):
+    """Give a heuristic solution to Gurobi as MIP start.
+    The start comes from the classical heuristic for the classical formulations and from the capacitated
+    heuristic for the capacitated variants, so it is feasible for the solved model : its centers and assignments
+    are given and its objective is used as cutoff. When the heuristic found no solution, nothing is given.
+    Args:
+        model: The Gurobi model.
+        model_class (str): The model class of the model.
+        start (dict): Solution of the heuristic (centers, assignments or primary/backup assignments, objective_value).
+        x, y, w: Assignment, location and backup assignment variables (MVar) of the model.
+    """
+    if start['objective_value'] is None:
+        return
+
+    start_y = np.zeros(y.shape)
+    start_y[start['centers']] = 1
+    y.Start = start_y
+
+    if model_class in ('classical', 'capacitated'):
+        clients, centers = model._pairs['x']
+        x.Start = (np.asarray(start['assignments'])[clients] == centers).astype(float)
+    elif model_class == 'failure':
+        clients, centers = model._pairs['x']
+        x.Start = (np.asarray(start['primary_assignments'])[clients] == centers).astype(float)
+        clients, centers = model._pairs['w']
+        w.Start = (np.asarray(start['backup_assignments'])[clients] == centers).astype(float)
+
+    model.setParam('Cutoff', start['objective_value'] + 1e-6)
 
-def solve(instance_data, model_class):
+
+def combine_callbacks(*callbacks):
+    """Single Gurobi callback calling each of the given callbacks (None are ignored), or None if there is none."""
+    callbacks = [callback for callback in callbacks if callback is not None]
+    if not callbacks:
+        return None
+    if len(callbacks) == 1:
+        return callbacks[0]
+
+    def callback(model, where):
+        for function in callbacks:
+            function(model, where)
+    return callback
+
+
+def initial_solution(instance_data, model_class, time_limit=3600):
+    """Heuristic solution feasible for model_class : capacitated heuristic (at most a tenth of the time limit,
+    60 seconds) for the capacitated variants, classical heuristic otherwise."""
+    if model_class in ('capacitated', 'failure'):
+        return capacitated_heuristic(instance_data, failure=model_class == 'failure', time_limit=min(60, time_limit / 10))
+    return heuristic(instance_data)
+
+
+def build_model(instance_data, model_class, lower_bound=None, upper_bound=None, lazy=False):
+    """Build the Gurobi model of a model class (not 'radius').
+    Returns:
+        tuple: (model, x, w, y), x is None for the compact formulation and w is None except for the failure model.
+    """
+    x, w = None, None
+    bounds = {'lower_bound': lower_bound, 'upper_bound': upper_bound}
+    if model_class == 'classical': # Classical p-center problem
+        model, x, y = classical_model(instance_data, **bounds, lazy=lazy)
+    elif model_class == 'compact': # Classical p-center problem, compact formulation
+        model, z, y = compact_model(instance_data, **bounds)
+    elif model_class == 'capacitated': # Capacitated p-center problem
+        model, x, y = capacitated_model(instance_data, **bounds, lazy=lazy)
+    elif model_class == 'failure':
+        model, x, w, y = failure_model(instance_data, **bounds, lazy=lazy)
+    else:
+        raise ValueError(f"Unknown model_class: {model_class}")
+    return model, x, w, y
+
+
+def extract_solution(instance_data, model_class, model, x=None, w=None, y=None):
+    """Solution of an optimized model : objective value, gurobi status, centers and assignments
+    (primary_assignments and backup_assignments for the failure model), objective value None without solution."""
+    num_nodes = instance_data['num_nodes']
+    if model.Status in (GRB.OPTIMAL, GRB.SUBOPTIMAL, GRB.TIME_LIMIT, GRB.INTERRUPTED) and model.SolCount > 0:
+        # Extract the solution
+        # Bulk read of the values of the vector variables, the assignments are arrays (center of each client)
+        centers = np.flatnonzero(y.X > 0.5).tolist()
+        solution = {
+            'objective_value': model.ObjVal,
+            'gurobi_status': model.status,
+            'centers': centers,
+        }
+        if model_class == 'compact':
+            # No assignment variables : each client is assigned to its closest open center
+            solution['assignments'] = closest_centers(instance_data['distances'], centers)
+        elif model_class == 'classical' or model_class == 'capacitated':
+            solution['assignments'] = assignment_array(num_nodes, *model._pairs['x'], x.X)
+        elif model_class == 'failure':
+            solution['primary_assignments'] = assignment_array(num_nodes, *model._pairs['x'], x.X)
+            solution['backup_assignments'] = assignment_array(num_nodes, *model._pairs['w'], w.X)
+        # Exact radius of the assignments, the objective value is subject to the solver tolerances : a Python
+        # number of the type of the distances (int for integral distances), as the heuristics and the radius search
+        assigned = solution['assignments'] if model_class != 'failure' else solution['primary_assignments']
+        solution['objective_value'] = classical_radius(instance_data['distances'], centers, assigned)
+    else:
+        solution = {
+            'objective_value': None,
+            'gurobi_status': model.status,
+            'centers': [],
+            'assignments': np.full(num_nodes, UNASSIGNED, dtype=np.int32)
+        }
+    return solution
+
+
+def solve(instance_data, model_class, warm_start=True, reduce=True, lazy=False, time_limit=3600, threads=1, trace=None,
+          params=None, share=None, start=None):
     """Solve the p-center problem using the specified model class.
     Args:
         instance_data (dict): The instance data containing distances, number of nodes, etc.
         model_class (str): The model class to use : 
             'classical' for the classical p-center problem.
+            'capacitated' for the capacitated p-center problem.
+            'failure' for the capacitated p-center problem with failure foresight.
+            'compact' for the classical p-center problem with the compact (distance levels) formulation.
+            'radius' for the classical p-center problem solved by binary search on the radius.
+        warm_start (bool): If set, the solution of the heuristic (capacitated heuristic for the capacitated variants)
+            is given to Gurobi as MIP start.
+        reduce (bool): If set, bounds of the optimal radius are computed first and the models are built
+            only over the client-center pairs that can be part of an optimal solution.
+        lazy (bool): If set, the maximum distance (and backup distance) constraints of the classical,
+            capacitated and failure models are only added when violated, through a lazy constraint callback.
+            The compact formulation and the radius search have no such constraints : the flag is ignored
+            with a warning.
+        time_limit (float): Time limit (seconds) of the optimization.
+        threads (int): Number of threads used by Gurobi.
+        trace (Trace): Trace receiving the phase timings, the model size and (if enabled) the progress samples.
+        params (dict): Other Gurobi parameters of the model (MIPFocus, Seed, ...), not used by the radius search.
+        share (SharedIncumbent): Incumbents and bounds exchanged with the other processes of a portfolio
+            (see src/solver/portfolio.py), not used by the radius search.
+        start (dict): Known solution feasible for model_class (e.g. the previous solution of an updated
+            instance, see src/solver/resolve.py), used as MIP start and upper bound instead of the heuristic.
     Returns:
-        dict: A dictionary containing the solution with objective value, gurobi status, centers, and assignments.
+        dict: A dictionary containing the solution with objective value, gurobi status, centers, and assignments
+            (array, center of each client, primary_assignments and backup_assignments for the failure model),
+            the MIP gap and the time (seconds) of each phase (preprocessing, build, solve, extraction).
     Raises:
         ValueError: If the model_class is not recognized.
     """
     try:
-        # Extract data from instance_data
-        num_nodes = instance_data['num_nodes']
         solution = None  # Initialize solution to ensure it's always defined
-        
-        if model_class == 'classical': # Classical p-center problem
-            model, x, y = classical_model(instance_data)
-        elif model_class == 'capacitated': # Capacitated p-center problem
-            model, x, y = capacitated_model(instance_data)
-        elif model_class == 'failure':
-            model, x, w, y = failure_model(instance_data)
-        else:
+        # Phases of this call only, the given trace may already hold the reading phases
+        trace = trace if trace is not None else Trace()
+        first_phase = len(trace.phases)
+
+        if model_class not in ('classical', 'compact', 'radius', 'capacitated', 'failure'):
             raise ValueError(f"Unknown model_class: {model_class}")
 
+        # Coordinate instances (read_clients) have no distance matrix, only the radius search runs on them
+        coordinates = 'distances' not in instance_data
+        if coordinates and model_class != 'radius':
+            raise ValueError("Coordinate instances are only solved with model_class='radius'")
+        if lazy and model_class in ('compact', 'radius'):
+            warnings.warn(f"lazy constraints only apply to the classical, capacitated and failure models, "
+                          f"the {model_class} model is built in full")
+            lazy = False
+
+        # Preprocessing : heuristic solution and bounds of the optimal radius
+        with trace.phase('preprocessing'):
+            if coordinates:
+                start = euclidean_heuristic(instance_data, time_limit=min(60, time_limit / 10)) if warm_start or reduce else None
+                lower_bound = euclidean_lower_bound(instance_data) if reduce else None
+                upper_bound = start['objective_value'] if reduce else None
+            else:
+                if start is None or start['objective_value'] is None:
+                    start = initial_solution(instance_data, model_class, time_limit) if warm_start or reduce else None
+                lower_bound, upper_bound = compute_bounds(instance_data, model_class, start) if reduce else (None, None)
+        # Printed by main (display_preprocessing), not by the batch, sweep, portfolio or service jobs
+        preprocessing = trace.record_preprocessing(lower_bound=lower_bound, upper_bound=upper_bound) if reduce else None
+
+        if model_class == 'radius': # Classical p-center problem, sequence of covering problems
+            with trace.phase('solve'):
+                search = euclidean_radius_search if coordinates else radius_search
+                solution = search(instance_data, time_limit=time_limit, lower_bound=lower_bound, start=start,
+                                  threads=threads, trace=trace)
+            solution['gap'] = 0.0 if solution['gurobi_status'] == GRB.OPTIMAL else None
+            solution['times'] = Trace.total_times(trace.phases[first_phase:])
+            return solution
+
+        with trace.phase('build'):
+            model, x, w, y = build_model(instance_data, model_class, lower_bound, upper_bound, lazy=lazy)
+
+            if warm_start:
+                set_warm_start(model, model_class, start, x=x, y=y, w=w)
+            model.setParam('Timelimit', time_limit)
+            model.setParam('Threads', threads)
+            for name, value in (params or {}).items():
+                model.setParam(name, value)
+
+        if reduce:
+            preprocessing.update(removed_variables=int(model._removed_variables), removed_constraints=int(model._removed_constraints))
+
         # Optimize the model
-        model.optimize()
-
-        if (model.Status == GRB.OPTIMAL or model.Status == GRB.SUBOPTIMAL or model.Status == GRB.TIME_LIMIT) and model.SolCount > 0:
-            # Extract the solution
-            if model_class == 'classical' or model_class == 'capacitated':
-                solution = {
-                    'objective_value': model.ObjVal,
-                    'gurobi_status': model.status,
-                    'centers': [j for j in range(num_nodes) if y[j].x > 0.5],
-                    'assignments': {i: j for i in range(num_nodes) for j in range(num_nodes) if x[i, j].X > 0.5}
-                }
-            elif model_class == 'failure':
-                solution = {
-                    'objective_value': model.ObjVal,
-                    'gurobi_status': model.status,
-                    'centers': [j for j in range(num_nodes) if y[j].x > 0.5],
-                    'primary_assignments': {i: j for i in range(num_nodes) for j in range(num_nodes) if x[i, j].X > 0.5},
-                    'backup_assignments': {i: j for i in range(num_nodes) for j in range(num_nodes) if w[i, j].X > 0.5}
-                }
-        
-        else:
-            solution = {
-                'objective_value': None,
-                'gurobi_status': model.status,
-                'centers': [],
-                'assignments': {}
-            }
+        lazy_stats = None
+        lazy_cb = None
+        if lazy:
+            model.setParam('LazyConstraints', 1)
+            lazy_cb, lazy_stats = lazy_callback(instance_data, model, x, w=w)
+        share_cb = share.callback(instance_data, model_class, model, x=x, w=w, y=y) if share is not None else None
+        callback = combine_callbacks(lazy_cb, share_cb, trace.sampler())
+        with trace.phase('solve'):
+            if callback is not None:
+                model.optimize(callback)
+            else:
+                model.optimize()
+        trace.record_model(model)
+
+        with trace.phase('extraction'):
+            solution = extract_solution(instance_data, model_class, model, x=x, w=w, y=y)
+        solution['gap'] = model.MIPGap if model.SolCount > 0 else None
+        solution['times'] = Trace.total_times(trace.phases[first_phase:])
+        if lazy_stats is not None:
+            solution['lazy_constraints'] = lazy_stats
         return solution
     except Exception as e:
         raise ValueError(f"An error occurred while solving the model: {e}")
-
-    
\ No newline at end of file
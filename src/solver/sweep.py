@@ -0,0 +1,134 @@
+import time
+
+import numpy as np
+
+from .solve import initial_solution, build_model, extract_solution, set_warm_start
+from .bounds import compute_bounds, lower_bound as radius_lower_bound
+from .heuristic import local_search
+from .solution import closest_centers
+from .evaluate import classical_radius
+from ..io_utils.instance import as_instance
+from ..io_utils.trace import Trace
+
+
+def add_centers(instance_data, model_class, solution):
+    """
+    Solution with instance_data['num_centers'] centers from a solution with fewer centers : the clients
+    farthest from the open centers are opened (farthest-first). The centers of the classical formulations are
+    improved by vertex substitution, the capacitated assignments are kept (the added centers are unused).
+    """
+    distances = np.asarray(instance_data['distances'])
+    centers = list(solution['centers'])
+
+    # distance of each client to the open centers, -1 for the centers so that they are never added again
+    nearest = distances[:, centers].min(axis=1).astype(float)
+    nearest[centers] = -1
+    while len(centers) < instance_data['num_centers']:
+        added = int(np.argmax(nearest))
+        centers.append(added)
+        nearest = np.minimum(nearest, distances[:, added])
+        nearest[added] = -1
+
+    if model_class in ('capacitated', 'failure'):
+        return dict(solution, centers=sorted(centers))
+    centers, _, _ = local_search(distances, centers)
+    return dict(solution, centers=sorted(centers), assignments=closest_centers(distances, centers),
+                objective_value=classical_radius(instance_data['distances'], centers))
+
+
+def tighten(instance_data, model, x, lower_bound, upper_bound):
+    """
+    Bounds of the optimal radius of the current point set on the variables (the reduction of the models built
+    for a single point) : max_distance at least lower_bound, assignments farther than upper_bound fixed to 0.
+    The compact formulation is left unchanged.
+    """
+    if x is None:
+        return
+    model._max_distance.LB = lower_bound
+    if upper_bound is not None:
+        clients, centers = model._pairs['x']
+        x.UB = (np.asarray(instance_data['distances'])[clients, centers] <= upper_bound).astype(float)
+
+
+def sweep(instance_data, model_class, num_centers=None, alphas=None, warm_start=True, reduce=True,
+          time_limit=3600, threads=1, trace=None):
+    """Solve a model class for a sequence of p values (or of alpha values for the failure model) with a single model.
+    The model is built once, only the right-hand side of the num_centers constraint (p) or of the overload
+    capacity constraint ((1 + alpha) * capacities) is changed between two points. The points are solved by
+    increasing value : the optimal radius does not increase with p nor with alpha, so each optimum (with
+    centers added for a larger p) is a feasible MIP start and a cutoff of the next point.
+    Args:
+        instance_data (dict): The instance data containing distances, number of nodes, etc.
+        model_class (str): 'classical', 'compact', 'capacitated' or 'failure' (see solve).
+        num_centers (list): p values of the sweep.
+        alphas (list): alpha values of the sweep (failure model only), exactly one of num_centers and alphas is given.
+        warm_start (bool): If set, the heuristic solution of the first point and the optimum of each point
+            are given to Gurobi as MIP start of the next point.
+        reduce (bool): If set, the model is built over the client-center pairs that can be part of an optimal
+            solution of every point (lower bound of the last point, upper bound of the first one).
+        time_limit (float): Time limit (seconds) of each point.
+        threads (int): Number of threads used by Gurobi.
+        trace (Trace): Trace receiving the phase timings.
+    Returns:
+        list: The solution of each point (see solve) with its num_centers, alpha and time (seconds).
+    Raises:
+        ValueError: If the model class or the swept parameter is not supported.
+    """
+    if (num_centers is None) == (alphas is None):
+        raise ValueError("Exactly one of num_centers and alphas must be given")
+    if model_class not in ('classical', 'compact', 'capacitated', 'failure'):
+        raise ValueError(f"Unsupported model_class for a sweep: {model_class}")
+    if alphas is not None and model_class != 'failure':
+        raise ValueError("alpha sweeps need the failure model")
+    trace = trace if trace is not None else Trace()
+
+    # One instance per point, by increasing value of the swept parameter
+    parameter = 'num_centers' if num_centers is not None else 'alpha'
+    values = sorted(set(num_centers if num_centers is not None else alphas))
+    if parameter == 'num_centers' and not all(0 < p <= instance_data['num_nodes'] for p in values):
+        raise ValueError("p values must be between 1 and the number of nodes")
+    # the points share the arrays, lazy distances and sorted neighbors of the instance
+    instance_data = as_instance(instance_data)
+    points = [instance_data.replace(**{parameter: value}) for value in values]
+
+    # Bounds valid at every point : lower bound of the largest p, heuristic solution of the first point
+    with trace.phase('preprocessing'):
+        start = initial_solution(points[0], model_class, time_limit) if warm_start or reduce else None
+        lower_bound, upper_bound = compute_bounds(points[-1], model_class, start) if reduce else (None, None)
+
+    with trace.phase('build'):
+        model, x, w, y = build_model(points[0], model_class, lower_bound, upper_bound)
+        model.setParam('Timelimit', time_limit)
+        model.setParam('Threads', threads)
+
+    solutions = []
+    previous = start if warm_start else None
+    for k, data in enumerate(points):
+        point_start = time.perf_counter()
+        with trace.phase('build'):
+            if k > 0 and parameter == 'num_centers':
+                model._num_centers.RHS = data['num_centers']
+            elif k > 0:
+                model._overload.RHS = (1 + data['alpha']) * np.asarray(data['capacities'])
+            if previous is not None and previous['objective_value'] is not None:
+                if len(previous['centers']) < data['num_centers']:
+                    previous = add_centers(data, model_class, previous)
+                set_warm_start(model, model_class, previous, x=x, y=y, w=w)
+            if reduce:
+                point_lower = radius_lower_bound(data['distances'], data['num_centers'])
+                point_upper = previous['objective_value'] if previous is not None else upper_bound
+                tighten(data, model, x, point_lower, point_upper)
+
+        with trace.phase('solve'):
+            model.optimize()
+        with trace.phase('extraction'):
+            solution = extract_solution(data, model_class, model, x=x, w=w, y=y)
+        solution['gap'] = model.MIPGap if model.SolCount > 0 else None
+        solution['num_centers'] = data['num_centers']
+        solution['alpha'] = data.get('alpha')
+        solution['time'] = time.perf_counter() - point_start
+        solutions.append(solution)
+
+        if warm_start and solution['objective_value'] is not None:
+            previous = solution
+    return solutions